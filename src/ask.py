@@ -1,15 +1,26 @@
+import time
+_STARTED = time.perf_counter()
+
 import argparse
 import json
-import faiss
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import numpy as np
-from sentence_transformers import SentenceTransformer
-from ollama import chat
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from src.profiling import StartupProfile, configure_trace_log
 
 # === Config ===
 FAISS_INDEX_PATH = "data/faiss_index.idx"
-METADATA_PATH = "data/faiss_metadata.json"
+METADATA_PATH = "data/faiss_metadata.sqlite"
+MANIFEST_PATH = "data/faiss_manifest.json"
 EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+EMBEDDING_SNAPSHOT = "data/models/all-MiniLM-L6-v2"  # local copy, skips hub lookups on cold start
 OLLAMA_MODEL = "mistral"  # must be available via `ollama list`
+QUERY_CACHE_PATH = "data/query_cache.sqlite"
+PROFILE_HISTORY_PATH = "data/startup_profile.jsonl"
+BATCH_WORKERS = 4  # concurrent generations; raise OLLAMA_NUM_PARALLEL on the server to match
 
 # === Functions ===
 def embed_query(query, model):
@@ -24,6 +35,17 @@ def retrieve_top_k(query_embedding, faiss_index, metadata, top_k=5):
             results.append(metadata[idx])
     return results
 
+def retrieve_top_k_batch(query_embeddings, faiss_index, metadata, top_k=5):
+    """One matrix search for every question; one result list per row."""
+    query_embeddings = np.asarray(query_embeddings, dtype="float32").reshape(len(query_embeddings), -1)
+    distances, indices = faiss_index.search(query_embeddings, top_k)
+    wanted = sorted({int(idx) for idx in indices.ravel() if 0 <= idx < len(metadata)})
+    if hasattr(metadata, "get_many"):
+        rows = dict(zip(wanted, metadata.get_many(wanted)))
+    else:
+        rows = {idx: metadata[idx] for idx in wanted}
+    return [[rows[int(idx)] for idx in row if int(idx) in rows] for row in indices]
+
 def format_context(paragraphs):
     lines = []
     for i, p in enumerate(paragraphs):
@@ -33,8 +55,8 @@ def format_context(paragraphs):
     return "\n\n".join(lines)
 
 
-def ask_llm(context, question):
-    prompt = f"""Use the following Equality Act paragraphs to answer the question. Be thorough and cite the references.
+def build_prompt(context, question):
+    return f"""Use the following Equality Act paragraphs to answer the question. Be thorough and cite the references.
 
 Context:
 {context}
@@ -43,36 +65,168 @@ Question: {question}
 
 Answer:"""
 
-    response = chat(model=OLLAMA_MODEL, messages=[{"role": "user", "content": prompt}])
+
+def ask_llm(context, question):
+    from src.llm import get_llm_client
+    response = get_llm_client().chat(model=OLLAMA_MODEL, messages=[{"role": "user", "content": build_prompt(context, question)}])
     return response["message"]["content"]
 
-# === Main Script ===
-if __name__ == "__main__":
+def read_batch(path):
+    """Questions from a JSONL file; each line is {"question": ...} with an optional "id"."""
+    questions = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line_number, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            questions.append({"id": str(item.get("id", line_number)), "question": item["question"]})
+    return questions
+
+def completed_ids(output_path):
+    """Ids already answered in a previous (possibly interrupted) run."""
+    done = set()
+    if os.path.exists(output_path):
+        with open(output_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    done.add(json.loads(line)["id"])
+                except (ValueError, KeyError):
+                    continue  # half-written last line of an interrupted run
+    return done
+
+def run_batch(questions, model, faiss_index, metadata, output_path, top_k=5, workers=BATCH_WORKERS, generate=ask_llm):
+    """Answer every question not yet in `output_path`, appending one JSON line per answer as it finishes.
+
+    A failed generation is logged and skipped, so the rest of the batch goes on
+    and the next run retries it. Returns how many answers were written.
+    """
+    done = completed_ids(output_path)
+    pending = [q for q in questions if q["id"] not in done]
+    if not pending:
+        return 0
+
+    query_embeddings = model.encode([q["question"] for q in pending])
+    retrieved = retrieve_top_k_batch(query_embeddings, faiss_index, metadata, top_k=top_k)
+
+    half_written = False
+    if os.path.exists(output_path) and os.path.getsize(output_path):
+        with open(output_path, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            half_written = f.read(1) != b"\n"
+
+    with open(output_path, "a", encoding="utf-8") as out, ThreadPoolExecutor(max_workers=workers) as pool:
+        if half_written:
+            out.write("\n")  # terminate the last line of an interrupted run
+        futures = {
+            pool.submit(generate, format_context(paragraphs), q["question"]): (q, paragraphs)
+            for q, paragraphs in zip(pending, retrieved)
+        }
+        # Results are written from this thread as they finish, so a crash loses at most the in-flight ones
+        answered = 0
+        try:
+            for future in as_completed(futures):
+                q, paragraphs = futures[future]
+                try:
+                    answer = future.result()
+                except Exception as e:
+                    print(f" {q['id']}: generation failed ({e}); it will be retried on the next run")
+                    continue
+                record = {
+                    "id": q["id"],
+                    "question": q["question"],
+                    "answer": answer,
+                    "sources": [p.get("Label") or p.get("Paragraph Label") for p in paragraphs],
+                }
+                out.write(json.dumps(record, ensure_ascii=False) + "\n")
+                out.flush()
+                answered += 1
+        except BaseException:
+            # Interrupted: do not keep calling the LLM for answers nobody will write
+            pool.shutdown(wait=False, cancel_futures=True)
+            raise
+    return answered
+
+def parse_args(argv=None):
     parser = argparse.ArgumentParser()
-    parser.add_argument("question", type=str, help="Legal question to ask")
+    parser.add_argument("question", type=str, nargs="?", help="Legal question to ask")
     parser.add_argument("--top-k", type=int, default=5, help="Number of paragraphs to retrieve (default=5)")
-    args = parser.parse_args()
-
-    # Load embedding model
-    print(f" Loading embedding model ({EMBEDDING_MODEL})...")
-    model = SentenceTransformer(EMBEDDING_MODEL)
+    parser.add_argument("--batch", metavar="QUESTIONS_JSONL", help="Answer every question in a JSONL file instead")
+    parser.add_argument("--output", help="Where batch answers are appended (default: <batch file>.answers.jsonl)")
+    parser.add_argument("--workers", type=int, default=BATCH_WORKERS, help=f"Concurrent generations in batch mode (default={BATCH_WORKERS})")
+    parser.add_argument("--profile", action="store_true", help="Print a startup profile and append it to " + PROFILE_HISTORY_PATH)
+    args = parser.parse_args(argv)
+    if not args.question and not args.batch:
+        parser.error("a question or --batch is required")
+    return args
+
+
+def main(argv=None):
+    # Parse before any heavy import so --help and usage errors return instantly
+    args = parse_args(argv)
+    profile = StartupProfile("ask", start=_STARTED)
+    configure_trace_log()
+
+    # Load the LLM while the questions are embedded and searched
+    from src.llm import get_llm_client
+    get_llm_client().warm_up_in_background()
+
+    with profile.stage("import retrieval"):
+        from src.retrieval.query_cache import QueryEmbeddingCache
+        from src.retrieval.embedding_model import load_sentence_transformer
+
+    # Load embedding model (only if the question is not already cached)
+    def load_model():
+        print(f" Loading embedding model ({EMBEDDING_MODEL})...")
+        with profile.stage("load embedding model"):
+            return load_sentence_transformer(EMBEDDING_MODEL, EMBEDDING_SNAPSHOT)
+
+    model = QueryEmbeddingCache(load_model, EMBEDDING_MODEL, disk_path=QUERY_CACHE_PATH)
 
     # Load FAISS + metadata
     print(" Loading FAISS index and metadata...")
-    index = faiss.read_index(FAISS_INDEX_PATH)
-    with open(METADATA_PATH, "r", encoding="utf-8") as f:
-        metadata = json.load(f)
-
-    # Embed query and retrieve
-    print(f" Sending prompt to Mistral via Ollama...\n")
-    query_vector = embed_query(args.question, model)
-    top_paragraphs = retrieve_top_k(query_vector, index, metadata, top_k=args.top_k)
+    with profile.stage("import faiss"):
+        from src.retrieval.index_builder import load_index
+        from src.retrieval.metadata_store import open_metadata
+    with profile.stage("load index"):
+        index, manifest = load_index(FAISS_INDEX_PATH, MANIFEST_PATH)
+        metadata = open_metadata(manifest.get("metadata_path", METADATA_PATH))
+
+    if args.batch:
+        output_path = args.output or os.path.splitext(args.batch)[0] + ".answers.jsonl"
+        questions = read_batch(args.batch)
+        print(f" Answering {len(questions)} questions from {args.batch} with {args.workers} workers...")
+        with profile.stage("batch", questions=len(questions), workers=args.workers) as span:
+            answered = run_batch(questions, model, index, metadata, output_path, top_k=args.top_k, workers=args.workers)
+            span["answered"] = answered
+        print(f" {answered} new answers written to {output_path} ({len(completed_ids(output_path))} of {len(questions)} done)")
+        profile.emit()
+        if args.profile:
+            profile.print_report()
+            profile.append_to(PROFILE_HISTORY_PATH)
+        return
+
+    with profile.stage("encode question") as span:
+        query_vectors, encode_info = model.encode_with_info([args.question])
+        query_vector = query_vectors[0]
+        span["cache_hit"] = encode_info["misses"] == 0
+
+    # Retrieve
+    with profile.stage("retrieve", k=args.top_k):
+        top_paragraphs = retrieve_top_k(query_vector, index, metadata, top_k=args.top_k)
     context = format_context(top_paragraphs)
 
-    # Generate answer
-    answer = ask_llm(context, args.question)
+    # Generate answer, printing tokens as they arrive
+    from src.llm import AnswerStream
+    print(f" Sending prompt to Mistral via Ollama...\n")
     print("\n Answer:\n")
-    print(answer)
+    stream = AnswerStream(build_prompt(context, args.question), model=OLLAMA_MODEL)
+    with profile.stage("generate", model=OLLAMA_MODEL) as span:
+        for piece in stream:
+            print(piece, end="", flush=True)
+        print()
+        span.update(stream.usage())
+    if stream.time_to_first_token is not None:
+        profile.add("time to first token", stream.time_to_first_token)
 
     print("\n Sources:")
     for i, para in enumerate(top_paragraphs, start=1):
@@ -80,3 +234,12 @@ if __name__ == "__main__":
         location = f"{para.get('Part', '')}.{para.get('Chapter', '')}.{para.get('Section', '')}".replace("..", ".")
         print(f"[{i}] {location} {label}: {para.get('Text', para.get('Paragraph Text', ''))[:100]}...")
 
+    profile.emit()
+    if args.profile:
+        profile.print_report()
+        profile.append_to(PROFILE_HISTORY_PATH)
+
+
+# === Main Script ===
+if __name__ == "__main__":
+    main()
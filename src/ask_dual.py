@@ -1,141 +1,145 @@
-import json
-import faiss
-import numpy as np
-from sentence_transformers import SentenceTransformer
-import ollama
+import time
+_STARTED = time.perf_counter()
+
+import argparse
+import os
 import sys
 
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from src.profiling import StartupProfile, configure_trace_log, approx_tokens
+
 # === Config ===
-K = 10   # Retrieve more initially for reranking
-FINAL_K = 5
-
-def rerank_with_llm(question, candidates):
-    numbered = []
-    for i, c in enumerate(candidates):
-        clean_text = c['text'][:300].replace('\n', ' ')
-        numbered.append(f"[{i+1}] {clean_text}")
-
-    context = "\n\n".join(numbered)
-
-    rerank_prompt = f"""
-You are a legal assistant. You will receive a question and 10 legal paragraphs (labeled [1] to [10]).
-Rank them from most to least relevant by returning a list of numbers.
-
-Question:
-{question}
-
-Paragraphs:
-{context}
-
-Return the ranking like this:
-[3, 1, 5, 2, 4, 6, 7, 8, 9, 10]
-Only return the list. No explanation.
-"""
-
-    response = ollama.chat(
-        model="mistral",
-        messages=[{"role": "user", "content": rerank_prompt}]
-    )
-    
-    # Parse the returned list
-    try:
-        text = response["message"]["content"]
-        order = eval(text.strip())  # Returns a list like [3,1,5,...]
-        return [candidates[i - 1] for i in order if 1 <= i <= len(candidates)]
-    except Exception as e:
-        print(" Rerank failed, using original order")
-        return candidates
-
-# === Load Embedding Model ===
-print("🔍 Loading embedding model...")
-model = SentenceTransformer("all-MiniLM-L6-v2")
-
-# === Load FAISS Indexes + Metadata ===
-faiss_legislation = faiss.read_index("data/faiss_index_with_refs.idx")
-with open("data/faiss_metadata_with_refs.json", "r", encoding="utf-8") as f:
-    metadata_legislation = json.load(f)
-
-faiss_cases = faiss.read_index("data/faiss_index_cases.idx")
-with open("data/faiss_metadata_cases.json", "r", encoding="utf-8") as f:
-    metadata_cases = json.load(f)
-
-# === Read User Query ===
-query = " ".join(sys.argv[1:])
-if not query:
-    print(" No query provided.")
-    sys.exit(1)
-
-query_embedding = model.encode([query])[0]
-query_embedding_np = np.array([query_embedding]).astype(np.float32)
-
-# === Retrieve Candidates ===
-D_leg, I_leg = faiss_legislation.search(query_embedding_np, K)
-D_case, I_case = faiss_cases.search(query_embedding_np, K)
-
-# === Collect all results with source type ===
-candidates = []
-
-for idx in I_leg[0]:
-    if idx == -1: continue
-    item = metadata_legislation[idx]
-    text = item["Text"]
-    label = item.get("Label", "Unknown")
-    embedding = model.encode(text)
-    candidates.append({
-        "text": text,
-        "ref": f"Equality Act - {label}",
-        "embedding": embedding
-    })
-
-for idx in I_case[0]:
-    if idx == -1: continue
-    item = metadata_cases[idx]
-    text = item["text"]
-    title = item.get("case_title", "Unknown")
-    embedding = model.encode(text)
-    candidates.append({
-        "text": text,
-        "ref": f"Case Law - {title}",
-        "embedding": embedding
-    })
-
-# === Cosine Rerank ===
-def cosine_similarity(a, b):
-    return np.dot(a, b) / (np.linalg.norm(a) * np.linalg.norm(b))
-
-for c in candidates:
-    c["score"] = cosine_similarity(query_embedding, c["embedding"])
-
-# LLM rerank
-reranked_chunks = rerank_with_llm(query, candidates)
-top_chunks = reranked_chunks[:FINAL_K]
-
-
-# === Build Prompt ===
-context = "\n\n".join([f"[{i+1}] {c['ref']}\n{c['text']}" for i, c in enumerate(top_chunks)])
-prompt = f"""
-You are a helpful UK legal assistant. Use only the context below to answer the question, citing the references.
-
-Context:
-{context}
-
-Question: {query}
-
-Answer:
-"""
-
-print(" Sending prompt to Mistral via Ollama...\n")
-
-# === LLM Call ===
-response = ollama.chat(
-    model="mistral",
-    messages=[{"role": "user", "content": prompt}]
-)
-
-print(" Answer:\n")
-print(response["message"]["content"])
-
-# === Print Sources ===
-print("\n Sources:")
-for i, c in enumerate(top_chunks):
-    print(f"[{i+1}] {c['ref']}")
\ No newline at end of file
+K = 12   # Hybrid dense + BM25 candidates (across all sources) for reranking
+FINAL_K = 4
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", 1500))  # prompt context size, in tokens
+CORPUS_MANIFEST = "data/faiss_manifest_corpus.json"
+EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+EMBEDDING_SNAPSHOT = "data/models/all-MiniLM-L6-v2"  # local copy, skips hub lookups on cold start
+QUERY_CACHE_PATH = "data/query_cache.sqlite"
+ANSWER_CACHE_PATH = "data/answer_cache.sqlite"
+ANSWER_CACHE_THRESHOLD = 0.95  # min cosine similarity to reuse a cached answer
+RERANKER = os.getenv("RERANKER", "llm")  # llm | cross-encoder | fusion
+GRAPH_EXPANSION = os.getenv("GRAPH_EXPANSION", "1") != "0"  # add parent sections, siblings and definitions from Neo4j
+PROFILE_HISTORY_PATH = "data/startup_profile.jsonl"
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Ask a question over the Equality Act and case law.")
+    parser.add_argument("question", nargs="+", help="Legal question to ask")
+    parser.add_argument("--profile", action="store_true", help="Print a startup profile and append it to " + PROFILE_HISTORY_PATH)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    # Parse before any heavy import so --help and usage errors return instantly
+    args = parse_args(argv)
+    query = " ".join(args.question)
+    profile = StartupProfile("ask_dual", start=_STARTED)
+    configure_trace_log()
+
+    # Load the LLM while the question is embedded and searched
+    from src.llm import get_llm_client
+    get_llm_client().warm_up_in_background()
+
+    with profile.stage("import retrieval"):
+        from src.retrieval.query_cache import QueryEmbeddingCache
+        from src.retrieval.embedding_model import load_sentence_transformer
+
+    # === Load Embedding Model (only if the question is not already cached) ===
+    def load_model():
+        print("🔍 Loading embedding model...")
+        with profile.stage("load embedding model"):
+            return load_sentence_transformer(EMBEDDING_MODEL, EMBEDDING_SNAPSHOT)
+
+    model = QueryEmbeddingCache(load_model, EMBEDDING_MODEL, disk_path=QUERY_CACHE_PATH)
+
+    with profile.stage("encode question") as span:
+        query_embeddings, encode_info = model.encode_with_info([query])
+        query_embedding = query_embeddings[0]
+        span["cache_hit"] = encode_info["misses"] == 0
+
+    # === Load Combined FAISS Index (legislation + case law) ===
+    with profile.stage("import faiss"):
+        from src.retrieval.corpus import Corpus
+    with profile.stage("load corpus"):
+        corpus = Corpus(CORPUS_MANIFEST)
+
+    # === Retrieve Candidates: dense + BM25 across every source, fused by reciprocal rank ===
+    with profile.stage("retrieve", k=K) as span:
+        candidates = corpus.search(query_embedding, K, question=query)
+        span["candidates"] = len(candidates)
+    chunk_ids = [c["id"] for c in candidates]
+
+    # === Answer Cache: near-duplicate question with the same chunks skips rerank + LLM ===
+    from src.retrieval.answer_cache import AnswerCache, manifest_fingerprint
+    answer_cache = AnswerCache(ANSWER_CACHE_PATH, manifest_fingerprint(corpus.manifest), threshold=ANSWER_CACHE_THRESHOLD)
+    with profile.stage("answer cache") as span:
+        cached = answer_cache.lookup(query_embedding, chunk_ids)
+        span["cache_hit"] = cached is not None
+
+    if cached:
+        print(f" Answer served from cache (similarity {cached['similarity']:.2f})\n")
+        answer = cached["answer"]
+        top_chunks = cached["sources"]
+        print(" Answer:\n")
+        print(answer)
+    else:
+        from src.retrieval.rerankers import get_reranker
+        from src.retrieval.context_packer import pack_context
+        from src.llm import AnswerStream, OLLAMA_MODEL, build_answer_prompt
+
+        # Rerank with the configured backend
+        reranker = get_reranker(RERANKER, embeddings=corpus.embeddings, llm_model=OLLAMA_MODEL)
+        with profile.stage("rerank", reranker=reranker.name) as span:
+            reranked_chunks, rerank_info = reranker.rerank_with_info(query, candidates, query_embedding)
+            span.update(rerank_info["usage"], fallback=rerank_info["fallback"])
+        if rerank_info["fallback"]:
+            print(" Rerank failed, using original order")
+        print(f" Reranked with {reranker.name} in {rerank_info['duration'] * 1000:.0f} ms")
+        # Statutory context for the top hits: one batched Neo4j query
+        extra_chunks = 0
+        if GRAPH_EXPANSION:
+            from src.retrieval.graph_context import GraphExpander
+            expander = GraphExpander()
+            with profile.stage("graph expand") as span:
+                reranked_chunks, graph_info = expander.expand_with_info(reranked_chunks, top_n=FINAL_K)
+                span.update(graph_info["stats"], fallback=graph_info["fallback"])
+            extra_chunks = graph_info["stats"].get("definitions", 0)
+            if graph_info["fallback"]:
+                print(" Graph unavailable, using retrieved paragraphs only")
+        # Parent sections absorb their retrieved subsections; pack to the prompt token budget
+        with profile.stage("pack context", budget=CONTEXT_TOKEN_BUDGET) as span:
+            top_chunks = pack_context(reranked_chunks, CONTEXT_TOKEN_BUDGET, max_chunks=FINAL_K + extra_chunks)
+            span.update(chunks=len(top_chunks), context_tokens=sum(approx_tokens(c["text"]) for c in top_chunks))
+
+        # === Build Prompt ===
+        prompt = build_answer_prompt(query, top_chunks)
+
+        print(" Sending prompt to Mistral via Ollama...\n")
+
+        # === LLM Call (printed as it streams) ===
+        print(" Answer:\n")
+        stream = AnswerStream(prompt, model=OLLAMA_MODEL)
+        with profile.stage("generate", model=OLLAMA_MODEL) as span:
+            for piece in stream:
+                print(piece, end="", flush=True)
+            print()
+            span.update(stream.usage())
+        answer = stream.text
+        answer_cache.put(query, query_embedding, chunk_ids, answer, top_chunks)
+        if stream.time_to_first_token is not None:
+            profile.add("time to first token", stream.time_to_first_token)
+
+    # === Print Sources ===
+    print("\n Sources:")
+    for i, c in enumerate(top_chunks):
+        print(f"[{i+1}] {c['ref']}")
+
+    profile.emit()
+    if args.profile:
+        profile.print_report()
+        profile.append_to(PROFILE_HISTORY_PATH)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+import argparse
+import json
+import os
+import sys
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# === Config ===
+QUESTIONS_PATH = "data/benchmark_questions.jsonl"
+CORPUS_MANIFEST = "data/faiss_manifest_corpus.json"  # build other index types with FAISS_INDEX_CONFIG
+EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+EMBEDDING_SNAPSHOT = "data/models/all-MiniLM-L6-v2"
+RESULTS_DIR = "data/benchmarks"
+
+
+def stub_chat(model, messages, stream=False, **kwargs):
+    """Stands in for ollama.chat so generation cost is only prompt building and plumbing."""
+    content = "Stub answer citing [1]."
+    if stream:
+        return iter([{"message": {"content": content}, "done": False}, {"message": {"content": ""}, "done": True}])
+    return {"message": {"content": content}}
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Measure retrieval quality and latency for one configuration.")
+    parser.add_argument("--questions", default=QUESTIONS_PATH, help="Labelled questions (JSONL)")
+    parser.add_argument("--manifest", default=CORPUS_MANIFEST, help="Corpus manifest to benchmark")
+    parser.add_argument("--reranker", default=os.getenv("RERANKER", "fusion"), help="llm | cross-encoder | fusion")
+    parser.add_argument("--k", type=int, default=12, help="First-stage candidates")
+    parser.add_argument("--final-k", type=int, default=4, help="Chunks kept after reranking")
+    parser.add_argument("--dense-only", action="store_true", help="Skip BM25 fusion")
+    parser.add_argument("--live-llm", action="store_true", help="Use Ollama instead of the stub for rerank and generation")
+    parser.add_argument("--output", help="Results JSON (default: data/benchmarks/<timestamp>.json)")
+    parser.add_argument("--baseline", help="Earlier results JSON to compare against")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    from src.retrieval.corpus import Corpus
+    from src.retrieval.query_cache import QueryEmbeddingCache
+    from src.retrieval.embedding_model import load_sentence_transformer
+    from src.retrieval.rerankers import get_reranker, LLMReranker
+    from src.retrieval.evaluation import load_benchmark, run_benchmark, compare_reports
+    from src.llm import AnswerStream, OLLAMA_MODEL, build_answer_prompt
+
+    questions = load_benchmark(args.questions)
+    print(f"✅ Loaded {len(questions)} labelled questions from {args.questions}")
+
+    print("🔍 Loading embedding model and corpus...")
+    model = QueryEmbeddingCache(lambda: load_sentence_transformer(EMBEDDING_MODEL, EMBEDDING_SNAPSHOT), EMBEDDING_MODEL)
+    corpus = Corpus(args.manifest)
+
+    chat = None if args.live_llm else stub_chat
+    if args.reranker == LLMReranker.name:
+        reranker = LLMReranker(model=OLLAMA_MODEL, chat=chat)
+    else:
+        reranker = get_reranker(args.reranker, embeddings=corpus.embeddings, llm_model=OLLAMA_MODEL)
+
+    def answer(question, chunks):
+        stream = AnswerStream(build_answer_prompt(question, chunks), model=OLLAMA_MODEL, chat=chat)
+        for _ in stream:
+            pass
+        return stream.text
+
+    print(f"📊 Running benchmark ({corpus.manifest['index_type']} index, {reranker.name} reranker, K={args.k}, FINAL_K={args.final_k})...")
+    report = run_benchmark(questions, model, corpus, reranker, args.k, args.final_k, answer=answer, hybrid=not args.dense_only)
+    report["config"] = {
+        "manifest": args.manifest,
+        "index_type": corpus.manifest["index_type"],
+        "index_config": corpus.manifest.get("config", {}),
+        "reranker": reranker.name,
+        "k": args.k,
+        "final_k": args.final_k,
+        "hybrid": not args.dense_only,
+        "llm": OLLAMA_MODEL if args.live_llm else "stub",
+    }
+    report["recorded_at"] = datetime.now(timezone.utc).isoformat()
+
+    for name, value in report["metrics"].items():
+        print(f"   {name:<12} {value:.3f}")
+    for stage, summary in report["latency"].items():
+        print(f"   {stage:<12} p50 {summary['p50_ms']:8.1f} ms   p95 {summary['p95_ms']:8.1f} ms")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            report["delta_vs_baseline"] = compare_reports(json.load(f), report)
+        print(f"📈 Change vs {args.baseline}: {report['delta_vs_baseline']}")
+
+    output = args.output
+    if not output:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        output = os.path.join(RESULTS_DIR, datetime.now().strftime("benchmark_%Y%m%d_%H%M%S.json"))
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"📁 Results saved to: {output}")
+
+
+if __name__ == "__main__":
+    main()
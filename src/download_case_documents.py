@@ -2,46 +2,277 @@
 
 import os
 import json
+import time
+import argparse
+import tempfile
+import threading
+from urllib.parse import urlsplit
+from concurrent.futures import ThreadPoolExecutor
+
 import requests
+from requests.adapters import HTTPAdapter
 from tqdm import tqdm
 
 # === Config ===
 CASE_LIST_PATH = "data/case_law_results.json"  # where your fetched cases are stored
 PDF_DIR = "data/case_pdfs"
 XML_DIR = "data/case_xmls"
+SITE_URL = "https://caselaw.nationalarchives.gov.uk"
+VALIDATORS_PATH = "data/download_validators.json"  # ETag / Last-Modified per URL, for revalidation
+WORKERS = int(os.getenv("DOWNLOAD_WORKERS", 8))
+RATE_PER_HOST = float(os.getenv("DOWNLOAD_RATE_PER_HOST", 5))  # requests per second to any one host
+TIMEOUT = (10, 60)             # connect, read (seconds)
+RETRIES = 4                    # attempts after the first one
+BACKOFF = 0.5                  # seconds, doubled on every retry
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+CHUNK_SIZE = 64 * 1024
+
+
+def case_filename(title):
+    """File stem for a case; also its case_id once parsed."""
+    return title.replace("/", "_").replace(" ", "_").replace(":", "").strip()
+
+
+def make_session(pool_size=WORKERS):
+    """One keep-alive session with a connection pool as large as the worker count."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers["User-Agent"] = "uk-legal-graph-rag/1.0"
+    return session
+
+
+class HostRateLimiter:
+    """Spaces requests to the same host at least 1/rate seconds apart, across threads."""
+
+    def __init__(self, rate_per_host=RATE_PER_HOST):
+        self.interval = 1.0 / rate_per_host if rate_per_host else 0.0
+        self._next = {}
+        self._lock = threading.Lock()
+
+    def wait(self, url):
+        if not self.interval:
+            return
+        host = urlsplit(url).netloc
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next.get(host, now))
+            self._next[host] = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class Downloader:
+    """Concurrent file downloads over one pooled session.
+
+    Bodies are streamed to a temp file next to the target and renamed into
+    place, so a crash never leaves a truncated document. Transient failures
+    are retried with exponential backoff. Files downloaded before are
+    revalidated with If-None-Match / If-Modified-Since, and a 304 costs no body.
+    """
+
+    def __init__(self, session=None, workers=WORKERS, rate_per_host=RATE_PER_HOST, timeout=TIMEOUT,
+                 retries=RETRIES, backoff=BACKOFF, validators_path=VALIDATORS_PATH):
+        self.session = session or make_session(workers)
+        self.workers = workers
+        self.limiter = HostRateLimiter(rate_per_host)
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.validators_path = validators_path
+        self.validators = self._load_validators()
+        self._lock = threading.Lock()
+
+    def _load_validators(self):
+        if self.validators_path and os.path.exists(self.validators_path):
+            with open(self.validators_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        return {}
+
+    def save_validators(self):
+        if not self.validators_path:
+            return
+        with self._lock:
+            data = json.dumps(self.validators, indent=2)
+        directory = os.path.dirname(self.validators_path) or "."
+        os.makedirs(directory, exist_ok=True)
+        with tempfile.NamedTemporaryFile("w", dir=directory, delete=False, encoding="utf-8") as f:
+            f.write(data)
+        os.replace(f.name, self.validators_path)
+
+    def _conditional_headers(self, url, path):
+        validator = self.validators.get(url)
+        if not validator or not os.path.exists(path):
+            return {}
+        headers = {}
+        if validator.get("etag"):
+            headers["If-None-Match"] = validator["etag"]
+        if validator.get("last_modified"):
+            headers["If-Modified-Since"] = validator["last_modified"]
+        return headers
+
+    def request(self, url, headers=None):
+        """GET with retries on connection errors, timeouts and 429/5xx responses."""
+        for attempt in range(self.retries + 1):
+            self.limiter.wait(url)
+            try:
+                response = self.session.get(url, headers=headers, stream=True, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt == self.retries:
+                    raise
+            else:
+                if response.status_code not in RETRY_STATUSES or attempt == self.retries:
+                    return response
+                retry_after = response.headers.get("Retry-After", "")
+                response.close()
+                if retry_after.isdigit():
+                    time.sleep(min(int(retry_after), 60))
+                    continue
+            time.sleep(self.backoff * 2 ** attempt)
+
+    def _write(self, response, path):
+        directory = os.path.dirname(path) or "."
+        os.makedirs(directory, exist_ok=True)
+        size = 0
+        with tempfile.NamedTemporaryFile("wb", dir=directory, prefix=".download-", delete=False) as f:
+            try:
+                for chunk in response.iter_content(CHUNK_SIZE):
+                    f.write(chunk)
+                    size += len(chunk)
+            except BaseException:
+                f.close()
+                os.remove(f.name)
+                raise
+        os.replace(f.name, path)
+        return size
+
+    def fetch(self, url, path, overwrite=False):
+        """Download `url` to `path`; returns a result dict with status and byte counts.
 
-# === Prepare folders ===
-os.makedirs(PDF_DIR, exist_ok=True)
-os.makedirs(XML_DIR, exist_ok=True)
-
-# === Load case list ===
-with open(CASE_LIST_PATH, "r", encoding="utf-8") as f:
-    cases = json.load(f)
-
-# === Download files ===
-for case in tqdm(cases, desc="Downloading cases"):
-    title = case["title"].replace("/", "_").replace(" ", "_").replace(":", "").strip()
-
-    # Download PDF
-    pdf_url = case.get("link_pdf")
-    if pdf_url:
-        pdf_path = os.path.join(PDF_DIR, f"{title}.pdf")
-        if not os.path.exists(pdf_path):
-            r = requests.get(pdf_url)
-            if r.status_code == 200:
-                with open(pdf_path, "wb") as f:
-                    f.write(r.content)
-
-    # Download XML
-    xml_url = case.get("link_xml")
-    if xml_url:
+        An existing file is kept without a request unless `overwrite` is set;
+        then it is revalidated, so an unchanged document is not sent again.
+        status is "downloaded", "not_modified", "exists" or "failed".
+        """
+        result = {"url": url, "path": path, "status": "failed", "bytes": 0, "saved_bytes": 0}
+        if os.path.exists(path) and not overwrite:
+            result["status"] = "exists"
+            return result
+        try:
+            response = self.request(url, self._conditional_headers(url, path))
+            with response:
+                if response.status_code == 304:
+                    result.update(status="not_modified", saved_bytes=os.path.getsize(path))
+                    return result
+                if response.status_code != 200:
+                    result["error"] = f"HTTP {response.status_code}"
+                    return result
+                result["bytes"] = self._write(response, path)
+                result["status"] = "downloaded"
+                validator = {
+                    "etag": response.headers.get("ETag"),
+                    "last_modified": response.headers.get("Last-Modified"),
+                }
+                with self._lock:
+                    if validator["etag"] or validator["last_modified"]:
+                        self.validators[url] = validator
+                    else:
+                        self.validators.pop(url, None)
+        except requests.RequestException as e:
+            result["error"] = str(e)
+        return result
+
+    def fetch_many(self, jobs, overwrite=False, progress=False):
+        """Run (url, path) jobs on the worker pool; returns (results, report)."""
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            futures = pool.map(lambda job: self.fetch(job[0], job[1], overwrite), jobs)
+            results = list(tqdm(futures, total=len(jobs), desc="Downloading", disable=not progress))
+        self.save_validators()
+        return results, download_report(results, time.perf_counter() - start)
+
+
+def download_report(results, seconds):
+    """Counts per status plus throughput and bytes avoided by revalidation."""
+    report = {status: sum(1 for r in results if r["status"] == status)
+              for status in ("downloaded", "not_modified", "exists", "failed")}
+    downloaded_bytes = sum(r["bytes"] for r in results)
+    report.update(
+        files=len(results),
+        bytes=downloaded_bytes,
+        saved_bytes=sum(r["saved_bytes"] for r in results),
+        seconds=round(seconds, 3),
+        files_per_s=round(len(results) / seconds, 1) if seconds else 0.0,
+        mb_per_s=round(downloaded_bytes / 1e6 / seconds, 2) if seconds else 0.0,
+    )
+    return report
+
+
+def case_jobs(case, pdf_dir=PDF_DIR, xml_dir=XML_DIR):
+    """{"pdf"|"xml": (url, path)} for one case's documents."""
+    title = case_filename(case["title"])
+    jobs = {}
+    if case.get("link_pdf"):
+        jobs["pdf"] = (case["link_pdf"], os.path.join(pdf_dir, f"{title}.pdf"))
+    if case.get("link_xml"):
         # The link_xml field is relative — need to add the domain!
-        full_xml_url = "https://caselaw.nationalarchives.gov.uk" + xml_url
-        xml_path = os.path.join(XML_DIR, f"{title}.xml")
-        if not os.path.exists(xml_path):
-            r = requests.get(full_xml_url)
-            if r.status_code == 200:
-                with open(xml_path, "wb") as f:
-                    f.write(r.content)
-
-print("\n✅ All PDFs and XMLs downloaded successfully!")
+        jobs["xml"] = (SITE_URL + case["link_xml"], os.path.join(xml_dir, f"{title}.xml"))
+    return jobs
+
+
+_shared_downloader = None
+_shared_lock = threading.Lock()
+
+
+def get_downloader():
+    """The process-wide Downloader (one session and connection pool)."""
+    global _shared_downloader
+    with _shared_lock:
+        if _shared_downloader is None:
+            _shared_downloader = Downloader()
+        return _shared_downloader
+
+
+def download_case(case, pdf_dir=PDF_DIR, xml_dir=XML_DIR, overwrite=False, downloader=None):
+    """Download one case's PDF and XML; returns their paths (None when unavailable).
+
+    Meant to be called from the caller's worker pool, one case per task; the
+    caller saves the downloader's validators once all cases are done.
+    """
+    downloader = downloader or get_downloader()
+    paths = {"pdf": None, "xml": None}
+    for kind, (url, path) in case_jobs(case, pdf_dir, xml_dir).items():
+        result = downloader.fetch(url, path, overwrite)
+        if result["status"] != "failed":
+            paths[kind] = result["path"]
+    return paths
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Download the PDF and XML of every fetched case.")
+    parser.add_argument("--cases", default=CASE_LIST_PATH, help="Case list written by fetch_case_law.py")
+    parser.add_argument("--workers", type=int, default=WORKERS, help=f"Concurrent downloads (default={WORKERS})")
+    parser.add_argument("--rate", type=float, default=RATE_PER_HOST, help=f"Max requests/sec per host (default={RATE_PER_HOST})")
+    parser.add_argument("--revalidate", action="store_true", help="Re-check files already on disk with conditional requests")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+
+    # === Load case list ===
+    with open(args.cases, "r", encoding="utf-8") as f:
+        cases = json.load(f)
+
+    # === Download files ===
+    downloader = Downloader(workers=args.workers, rate_per_host=args.rate)
+    jobs = [job for case in cases for job in case_jobs(case).values()]
+    results, report = downloader.fetch_many(jobs, overwrite=args.revalidate, progress=True)
+
+    for result in results:
+        if result["status"] == "failed":
+            print(f"⚠️ {result['url']}: {result.get('error')}")
+    print(f"\n✅ {report['downloaded']} downloaded, {report['not_modified']} unchanged, "
+          f"{report['exists']} already on disk, {report['failed']} failed")
+    print(f"📊 {report['files_per_s']} files/s, {report['mb_per_s']} MB/s, "
+          f"{report['saved_bytes'] / 1e6:.1f} MB saved by revalidation")
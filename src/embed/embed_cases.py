@@ -1,21 +1,36 @@
-import json
+import os
+import sys
 import faiss
 import numpy as np
 from sentence_transformers import SentenceTransformer
 from tqdm import tqdm
 
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from src.retrieval.vector_store import save_embeddings
+from src.retrieval.embedding_cache import EmbeddingCache, text_hash, compare_builds, load_hashes, save_hashes
+from src.retrieval.metadata_store import write_metadata_store
+from src.retrieval.corpus import load_records
+from src.retrieval.index_builder import load_index_config, prepare_embeddings, build_index, evaluate_index, write_manifest, write_report
+
 # === Config ===
-INPUT_JSON = "data/parsed_case_paragraphs.json"
+INPUT_JSONL = "data/parsed_case_paragraphs.jsonl"
 FAISS_INDEX_PATH = "data/faiss_index_cases.idx"
-METADATA_PATH = "data/faiss_metadata_cases.json"
+METADATA_PATH = "data/faiss_metadata_cases.sqlite"
+EMBEDDINGS_PATH = "data/faiss_embeddings_cases.npy"
+MANIFEST_PATH = "data/faiss_manifest_cases.json"
+REPORT_PATH = "data/faiss_report_cases.json"
+HASHES_PATH = "data/faiss_hashes_cases.json"
+EMBEDDING_CACHE_PATH = "data/embedding_cache.sqlite"  # (model, text hash) -> vector, shared by every embed script
+EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+INDEX_CONFIG = load_index_config(os.getenv("FAISS_INDEX_CONFIG"))  # JSON file, defaults to a flat index
 
 # === Load Data ===
-with open(INPUT_JSON, "r", encoding="utf-8") as f:
-    data = json.load(f)
+data = load_records(INPUT_JSONL)
 
-# === Load Model ===
-print("🔍 Loading embedding model...")
-model = SentenceTransformer("all-MiniLM-L6-v2")
+# === Load Model (only if some paragraph is not cached yet) ===
+def load_model():
+    print("🔍 Loading embedding model...")
+    return SentenceTransformer(EMBEDDING_MODEL)
 
 # === Prepare Texts and Metadata ===
 texts = []
@@ -26,24 +41,45 @@ for item in data:
     metadata.append({
         "text": item["text"],
         "case_title": item.get("case_id", "Unknown"),  # <-- MAKE SURE we save the title here!
-        "paragraph_id": item.get("paragraph_id", "Unknown")
+        "paragraph_id": item.get("paragraph_id", "Unknown"),
+        "court": item.get("court", ""),
+        "date": item.get("date", "")
     })
 
 print(f"✅ Loaded {len(texts)} case paragraphs")
 
-# === Embed Texts ===
+# === Embed Texts (new or edited paragraphs only) ===
 print("📐 Encoding texts...")
-embeddings = model.encode(texts, show_progress_bar=True, convert_to_numpy=True)
+cache = EmbeddingCache(EMBEDDING_CACHE_PATH, EMBEDDING_MODEL)
+embeddings = cache.encode(texts, load_model, show_progress_bar=True)
+hashes = [text_hash(text) for text in texts]
+changes = compare_builds(load_hashes(HASHES_PATH), hashes)
+print(f"♻️ Reused {cache.last_stats['reused']} vectors, encoded {cache.last_stats['encoded']} "
+      f"({changes['added']} added, {changes['removed']} removed since the last build)")
+embeddings = prepare_embeddings(embeddings, INDEX_CONFIG)  # unit vectors: inner product = cosine
 
 # === Save to FAISS ===
 print("💾 Saving FAISS index...")
-dimension = embeddings.shape[1]
-index = faiss.IndexFlatL2(dimension)
-index.add(embeddings)
+index = build_index(embeddings, INDEX_CONFIG)
 faiss.write_index(index, FAISS_INDEX_PATH)
+save_embeddings(embeddings, EMBEDDINGS_PATH)
+write_manifest(
+    MANIFEST_PATH, index, INDEX_CONFIG,
+    index_path=FAISS_INDEX_PATH,
+    metadata_path=METADATA_PATH,
+    embeddings_path=EMBEDDINGS_PATH,
+    model=EMBEDDING_MODEL,
+)
+
+print(f"📊 Measuring recall and latency of the {INDEX_CONFIG['type']} index...")
+report = evaluate_index(index, embeddings, INDEX_CONFIG)
+report["embedding_cache"] = dict(cache.last_stats, **changes)
+write_report(REPORT_PATH, report)
 
-with open(METADATA_PATH, "w", encoding="utf-8") as f:
-    json.dump(metadata, f, indent=2, ensure_ascii=False)
+write_metadata_store(metadata, METADATA_PATH, text_key="text")
+save_hashes(HASHES_PATH, hashes)
 
 print(f"📁 FAISS index saved to: {FAISS_INDEX_PATH}")
 print(f"📁 Metadata saved to: {METADATA_PATH}")
+print(f"📁 Embeddings saved to: {EMBEDDINGS_PATH}")
+print(f"📁 Build report saved to: {REPORT_PATH}")
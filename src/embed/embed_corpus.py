@@ -0,0 +1,91 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from src.retrieval.index_builder import load_index_config, prepare_embeddings, evaluate_index, write_report
+from src.retrieval.corpus import load_corpus_rows, write_corpus
+from src.retrieval.embedding_cache import EmbeddingCache, text_hash, compare_builds, load_hashes, save_hashes
+
+# === Config ===
+EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+INDEX_CONFIG = load_index_config(os.getenv("FAISS_INDEX_CONFIG"))  # JSON file, defaults to a flat index
+
+# Every corpus goes into the same index; add another Act here rather than another index.
+CORPORA = [
+    {
+        "source": "equality_act",
+        "title": "Equality Act",
+        "path": "data/equality_act_paragraphs_with_refs.json",
+        "text_key": "Text",
+        "ref_key": "Label",
+    },
+    {
+        "source": "case_law",
+        "title": "Case Law",
+        "path": "data/parsed_case_paragraphs.jsonl",
+        "text_key": "text",
+        "ref_key": "case_id",
+        "pretty_titles": True,
+    },
+]
+
+PATHS = {
+    "index": "data/faiss_index_corpus.idx",
+    "metadata": "data/faiss_metadata_corpus.sqlite",
+    "embeddings": "data/faiss_embeddings_corpus.npy",
+    "attributes": "data/faiss_attributes_corpus.npy",
+    "bm25": "data/bm25_corpus.npz",
+    "manifest": "data/faiss_manifest_corpus.json",
+}
+REPORT_PATH = "data/faiss_report_corpus.json"
+HASHES_PATH = "data/faiss_hashes_corpus.json"
+EMBEDDING_CACHE_PATH = "data/embedding_cache.sqlite"  # (model, text hash) -> vector, shared by every embed script
+
+
+def build_corpus_index(corpora=CORPORA, paths=PATHS, report_path=REPORT_PATH, hashes_path=HASHES_PATH):
+    """Rebuild the combined index from the corpus files; only new or edited paragraphs are encoded."""
+    # === Load Paragraphs ===
+    rows = load_corpus_rows(corpora)
+    for corpus in corpora:
+        count = sum(1 for row in rows if row["source"] == corpus["source"])
+        print(f"✅ Loaded {count} paragraphs from {corpus['path']}")
+
+    # === Embed Texts (new or edited paragraphs only) ===
+    def load_model():
+        from sentence_transformers import SentenceTransformer
+        print(f"🔍 Loading embedding model ({EMBEDDING_MODEL})...")
+        return SentenceTransformer(EMBEDDING_MODEL)
+
+    print("📐 Encoding texts...")
+    texts = [row["text"] for row in rows]
+    cache = EmbeddingCache(EMBEDDING_CACHE_PATH, EMBEDDING_MODEL)
+    embeddings = cache.encode(texts, load_model, show_progress_bar=True)
+    embeddings = prepare_embeddings(embeddings, INDEX_CONFIG)
+    hashes = [text_hash(text) for text in texts]
+    changes = compare_builds(load_hashes(hashes_path), hashes)
+    print(f"♻️ Reused {cache.last_stats['reused']} vectors, encoded {cache.last_stats['encoded']} "
+          f"({changes['added']} added, {changes['removed']} removed since the last build)")
+
+    # === Save Combined Index ===
+    print("💾 Saving combined FAISS index...")
+    index, manifest = write_corpus(
+        rows, embeddings, INDEX_CONFIG, paths,
+        sources=[corpus["source"] for corpus in corpora],
+        model_name=EMBEDDING_MODEL,
+    )
+
+    print(f"📊 Measuring recall and latency of the {INDEX_CONFIG['type']} index...")
+    report = evaluate_index(index, embeddings, INDEX_CONFIG)
+    report["embedding_cache"] = dict(cache.last_stats, **changes)
+    write_report(report_path, report)
+    save_hashes(hashes_path, hashes)
+
+    print(f"📁 Combined index ({index.ntotal} vectors) saved to: {manifest['index_path']}")
+    print(f"📁 BM25 keyword index saved to: {manifest['bm25_path']}")
+    print(f"📁 Manifest saved to: {paths['manifest']}")
+    print(f"📁 Build report saved to: {report_path}")
+    return manifest
+
+
+if __name__ == "__main__":
+    build_corpus_index()
@@ -1,14 +1,24 @@
 import json
 import os
+import sys
 import faiss
 import numpy as np
 from sentence_transformers import SentenceTransformer
 from tqdm import tqdm
 
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from src.retrieval.vector_store import save_embeddings
+from src.retrieval.metadata_store import write_metadata_store
+from src.retrieval.index_builder import load_index_config, prepare_embeddings, build_index, evaluate_index, write_manifest, write_report
+
 # === Config ===
 INPUT_JSON = "data/equality_act_paragraphs_fixed.json"
 FAISS_INDEX_PATH = "data/faiss_index.idx"
-METADATA_PATH = "data/faiss_metadata.json"
+METADATA_PATH = "data/faiss_metadata.sqlite"
+EMBEDDINGS_PATH = "data/faiss_embeddings.npy"
+MANIFEST_PATH = "data/faiss_manifest.json"
+REPORT_PATH = "data/faiss_report.json"
+INDEX_CONFIG = load_index_config(os.getenv("FAISS_INDEX_CONFIG"))  # JSON file, defaults to a flat index
 
 # === Load Paragraphs ===
 with open(INPUT_JSON, "r", encoding="utf-8") as f:
@@ -36,17 +46,29 @@ model = SentenceTransformer("all-MiniLM-L6-v2")
 # === Embed Texts ===
 print("📐 Encoding texts...")
 embeddings = model.encode(texts, show_progress_bar=True, convert_to_numpy=True)
+embeddings = prepare_embeddings(embeddings, INDEX_CONFIG)  # unit vectors: inner product = cosine
 
 # === Save FAISS Index ===
 print("💾 Saving FAISS index...")
-dimension = embeddings.shape[1]
-index = faiss.IndexFlatL2(dimension)
-index.add(embeddings)
+index = build_index(embeddings, INDEX_CONFIG)
 faiss.write_index(index, FAISS_INDEX_PATH)
+save_embeddings(embeddings, EMBEDDINGS_PATH)
+write_manifest(
+    MANIFEST_PATH, index, INDEX_CONFIG,
+    index_path=FAISS_INDEX_PATH,
+    metadata_path=METADATA_PATH,
+    embeddings_path=EMBEDDINGS_PATH,
+    model="all-MiniLM-L6-v2",
+)
+
+print(f"📊 Measuring recall and latency of the {INDEX_CONFIG['type']} index...")
+report = evaluate_index(index, embeddings, INDEX_CONFIG)
+write_report(REPORT_PATH, report)
 
 # === Save Metadata ===
-with open(METADATA_PATH, "w", encoding="utf-8") as f:
-    json.dump(data, f, indent=2, ensure_ascii=False)
+write_metadata_store(data, METADATA_PATH, text_key=key)
 
 print(f"\n✅ Done! Saved FAISS index to: {FAISS_INDEX_PATH}")
 print(f"📎 Saved metadata to: {METADATA_PATH}")
+print(f"📎 Saved embeddings to: {EMBEDDINGS_PATH}")
+print(f"📎 Build report saved to: {REPORT_PATH}")
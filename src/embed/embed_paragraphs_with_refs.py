@@ -1,13 +1,27 @@
 import os
+import sys
 import json
 import faiss
 import numpy as np
 from sentence_transformers import SentenceTransformer
 
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from src.retrieval.vector_store import save_embeddings
+from src.retrieval.embedding_cache import EmbeddingCache, text_hash, compare_builds, load_hashes, save_hashes
+from src.retrieval.metadata_store import write_metadata_store
+from src.retrieval.index_builder import load_index_config, prepare_embeddings, build_index, evaluate_index, write_manifest, write_report
+
 # === Config ===
 INPUT_JSON = "data/equality_act_paragraphs_with_refs.json"
 FAISS_INDEX_PATH = "data/faiss_index_with_refs.idx"
-METADATA_PATH = "data/faiss_metadata_with_refs.json"
+METADATA_PATH = "data/faiss_metadata_with_refs.sqlite"
+EMBEDDINGS_PATH = "data/faiss_embeddings_with_refs.npy"
+MANIFEST_PATH = "data/faiss_manifest_with_refs.json"
+REPORT_PATH = "data/faiss_report_with_refs.json"
+HASHES_PATH = "data/faiss_hashes_with_refs.json"
+EMBEDDING_CACHE_PATH = "data/embedding_cache.sqlite"  # (model, text hash) -> vector, shared by every embed script
+EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+INDEX_CONFIG = load_index_config(os.getenv("FAISS_INDEX_CONFIG"))  # JSON file, defaults to a flat index
 
 # === Load Paragraphs ===
 with open(INPUT_JSON, "r", encoding="utf-8") as f:
@@ -22,24 +36,44 @@ if not text_key:
 texts = [item[text_key] for item in data]
 print(f"✅ Loaded {len(texts)} paragraphs using key: '{text_key}'")
 
-# === Load Embedding Model ===
-print("🔍 Loading embedding model...")
-model = SentenceTransformer("all-MiniLM-L6-v2")
+# === Load Embedding Model (only if some paragraph is not cached yet) ===
+def load_model():
+    print("🔍 Loading embedding model...")
+    return SentenceTransformer(EMBEDDING_MODEL)
 
-# === Generate Embeddings ===
+# === Generate Embeddings (new or edited paragraphs only) ===
 print("📐 Generating embeddings...")
-embeddings = model.encode(texts, show_progress_bar=True, convert_to_numpy=True)
+cache = EmbeddingCache(EMBEDDING_CACHE_PATH, EMBEDDING_MODEL)
+embeddings = cache.encode(texts, load_model, show_progress_bar=True)
+hashes = [text_hash(text) for text in texts]
+changes = compare_builds(load_hashes(HASHES_PATH), hashes)
+print(f"♻️ Reused {cache.last_stats['reused']} vectors, encoded {cache.last_stats['encoded']} "
+      f"({changes['added']} added, {changes['removed']} removed since the last build)")
+embeddings = prepare_embeddings(embeddings, INDEX_CONFIG)  # unit vectors: inner product = cosine
 
 # === Create FAISS Index ===
 print("💾 Saving FAISS index...")
-dimension = embeddings.shape[1]
-index = faiss.IndexFlatL2(dimension)
-index.add(embeddings)
+index = build_index(embeddings, INDEX_CONFIG)
 faiss.write_index(index, FAISS_INDEX_PATH)
+save_embeddings(embeddings, EMBEDDINGS_PATH)
+write_manifest(
+    MANIFEST_PATH, index, INDEX_CONFIG,
+    index_path=FAISS_INDEX_PATH,
+    metadata_path=METADATA_PATH,
+    embeddings_path=EMBEDDINGS_PATH,
+    model=EMBEDDING_MODEL,
+)
+
+print(f"📊 Measuring recall and latency of the {INDEX_CONFIG['type']} index...")
+report = evaluate_index(index, embeddings, INDEX_CONFIG)
+report["embedding_cache"] = dict(cache.last_stats, **changes)
+write_report(REPORT_PATH, report)
 
 # === Save Metadata ===
-with open(METADATA_PATH, "w", encoding="utf-8") as f:
-    json.dump(data, f, indent=2, ensure_ascii=False)
+write_metadata_store(data, METADATA_PATH, text_key=text_key)
+save_hashes(HASHES_PATH, hashes)
 
 print(f"📁 FAISS index saved to: {FAISS_INDEX_PATH}")
 print(f"📁 Metadata saved to: {METADATA_PATH}")
+print(f"📁 Embeddings saved to: {EMBEDDINGS_PATH}")
+print(f"📁 Build report saved to: {REPORT_PATH}")
@@ -1,62 +1,264 @@
-import requests
-import feedparser
+import argparse
 import csv
 import json
 import os
+import sys
+from urllib.parse import urlencode, urlsplit, parse_qs
+from concurrent.futures import ThreadPoolExecutor
+
+import feedparser
+import requests
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from src.download_case_documents import Downloader
 
 # === Config ===
 QUERY = "Equality Act"
 BASE_URL = "https://caselaw.nationalarchives.gov.uk/atom.xml"
 OUTPUT_JSON = "data/case_law_results.json"
 OUTPUT_CSV = "data/case_law_results.csv"
-RESULTS_LIMIT = 100  # How many cases to fetch
-
-# === Create output folder if missing ===
-os.makedirs("data", exist_ok=True)
-
-# === Build API URL ===
-params = {
-    "query": QUERY,
-    "per_page": RESULTS_LIMIT
-}
-url = f"{BASE_URL}?query={QUERY}&per_page={RESULTS_LIMIT}"
-
-# === Fetch feed ===
-print(f"🔎 Fetching case law search for query: '{QUERY}'...")
-response = requests.get(url)
-if response.status_code != 200:
-    print("❌ Failed to fetch data:", response.status_code)
-    exit(1)
-
-# === Parse Atom feed ===
-feed = feedparser.parse(response.content)
-
-cases = []
-for entry in feed.entries:
-    case = {
-        "title": entry.title,
-        "updated": entry.updated,
-        "link_pdf": "",
-        "link_xml": "",
-        "summary": entry.summary if hasattr(entry, "summary") else ""
-    }
-    # Find links
-    for link in entry.links:
-        if link.type == "application/pdf":
-            case["link_pdf"] = link.href
-        if link.type == "application/akn+xml":
-            case["link_xml"] = link.href
-    cases.append(case)
-
-print(f"✅ Found {len(cases)} cases.")
-
-# === Save results ===
-with open(OUTPUT_JSON, "w", encoding="utf-8") as f:
-    json.dump(cases, f, indent=2, ensure_ascii=False)
-
-with open(OUTPUT_CSV, "w", newline="", encoding="utf-8") as f:
-    writer = csv.DictWriter(f, fieldnames=["title", "updated", "link_pdf", "link_xml", "summary"])
-    writer.writeheader()
-    writer.writerows(cases)
-
-print(f"📁 Saved {len(cases)} cases to {OUTPUT_JSON} and {OUTPUT_CSV}")
+FEED_PATH = "data/case_law_feed.jsonl"                # every crawled entry, one JSON object per line
+CRAWL_STATE_PATH = "data/case_law_crawl_state.json"   # high-water mark and the page an unfinished crawl stopped at
+PER_PAGE = int(os.getenv("CRAWL_PER_PAGE", 50))
+PAGE_WORKERS = int(os.getenv("CRAWL_WORKERS", 4))     # pages fetched at once
+PAGE_RATE = float(os.getenv("CRAWL_RATE", 2))         # feed requests per second
+ORDER = "-updated"  # newest first, so a crawl can stop at the high-water mark
+
+
+def feed_url(query=QUERY, page=1, per_page=PER_PAGE, order=ORDER, base_url=BASE_URL):
+    """Search feed URL with every parameter properly encoded."""
+    return f"{base_url}?{urlencode({'query': query, 'order': order, 'page': page, 'per_page': per_page})}"
+
+
+def _page_number(href):
+    pages = parse_qs(urlsplit(href).query).get("page")
+    return int(pages[0]) if pages and pages[0].isdigit() else None
+
+
+def parse_page(content):
+    """(cases, {"next": page, "last": page}) for one page of an Atom search feed."""
+    feed = feedparser.parse(content)
+
+    cases = []
+    for entry in feed.entries:
+        case = {
+            "title": entry.title,
+            "updated": entry.updated,
+            "link_pdf": "",
+            "link_xml": "",
+            "summary": entry.summary if hasattr(entry, "summary") else "",
+            "uri": entry.get("id", ""),
+        }
+        # Find links
+        for link in entry.links:
+            if link.get("type") == "application/pdf":
+                case["link_pdf"] = link.href
+            if link.get("type") == "application/akn+xml":
+                case["link_xml"] = link.href
+        cases.append(case)
+
+    links = {"next": None, "last": None}
+    for link in feed.feed.get("links", []):
+        if link.get("rel") in links:
+            links[link["rel"]] = _page_number(link.get("href", ""))
+    return cases, links
+
+
+def parse_feed(content):
+    """Case dicts (title, updated, PDF/XML links, summary, URI) from an Atom search feed."""
+    return parse_page(content)[0]
+
+
+def _write_json(path, data):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def iter_feed(path=FEED_PATH):
+    """Stream the crawled entries back from disk, oldest write first."""
+    if not os.path.exists(path):
+        return
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def latest_cases(path=FEED_PATH):
+    """Stream the newest version of every crawled judgment, in file order.
+
+    A first pass keeps only URI -> newest updated time; the second yields
+    each matching entry, so full entries are never held in memory.
+    """
+    newest = {}
+    for case in iter_feed(path):
+        key = case.get("uri") or case["title"]
+        if case["updated"] > newest.get(key, ""):
+            newest[key] = case["updated"]
+    for case in iter_feed(path):
+        key = case.get("uri") or case["title"]
+        if newest.get(key) == case["updated"]:
+            del newest[key]  # a duplicate line of the same version is yielded once
+            yield case
+
+
+class FeedCrawler:
+    """Walks every page of a Find Case Law search and appends new entries to a JSONL file.
+
+    Pages are fetched `workers` at a time through a rate-limited, pooled
+    session. The feed is ordered newest first, so once a page reaches the
+    high-water mark of the last completed crawl the rest is already on disk.
+    After every batch of pages the state file records where to resume;
+    entries are deduplicated by URI and updated time, so pages refetched
+    after a crash, or shifted by judgments published mid-crawl, add nothing.
+    """
+
+    def __init__(self, query=QUERY, feed_path=FEED_PATH, state_path=CRAWL_STATE_PATH, per_page=PER_PAGE,
+                 workers=PAGE_WORKERS, rate_per_host=PAGE_RATE, base_url=BASE_URL, session=None):
+        self.query = query
+        self.feed_path = feed_path
+        self.state_path = state_path
+        self.per_page = per_page
+        self.workers = workers
+        self.base_url = base_url
+        self.downloader = Downloader(session=session, workers=workers, rate_per_host=rate_per_host,
+                                     validators_path=None)
+
+    def load_state(self):
+        state = {"query": self.query, "high_water": None, "run": None}
+        if os.path.exists(self.state_path):
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                state.update(json.load(f))
+        if state["query"] != self.query:
+            raise RuntimeError(f"{self.state_path} belongs to the query '{state['query']}'")
+        return state
+
+    def save_state(self, state):
+        _write_json(self.state_path, state)
+
+    def fetch_page(self, page):
+        url = feed_url(self.query, page, self.per_page, base_url=self.base_url)
+        with self.downloader.request(url) as response:
+            if response.status_code != 200:
+                raise RuntimeError(f"Failed to fetch page {page}: {response.status_code}")
+            return parse_page(response.content)
+
+    def crawl(self, max_pages=None):
+        """Fetch everything newer than the high-water mark; returns a summary dict.
+
+        With `max_pages` the crawl may stop early; the next call carries on
+        from the same page and only then moves the high-water mark.
+        """
+        state = self.load_state()
+        run = state["run"] or {"next_page": 1, "last_page": None, "newest": state["high_water"]}
+        state["run"] = run
+        stop_at = state["high_water"]
+        seen = {(case.get("uri"), case["updated"]) for case in iter_feed(self.feed_path)}
+        summary = {"pages": 0, "entries": 0, "written": 0, "duplicates": 0, "complete": False}
+
+        directory = os.path.dirname(self.feed_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            while not summary["complete"]:
+                page = run["next_page"]
+                count = self.workers
+                if run["last_page"]:
+                    count = min(count, run["last_page"] - page + 1)
+                if max_pages is not None:
+                    count = min(count, max_pages - summary["pages"])
+                if count <= 0:
+                    summary["complete"] = run["last_page"] is not None and page > run["last_page"]
+                    break
+
+                results = list(pool.map(self.fetch_page, range(page, page + count)))
+                with open(self.feed_path, "a", encoding="utf-8") as out:
+                    for cases, links in results:
+                        summary["pages"] += 1
+                        summary["entries"] += len(cases)
+                        if links["last"]:
+                            run["last_page"] = links["last"]
+                        if not cases or links["next"] is None:
+                            summary["complete"] = True
+                        for case in cases:
+                            if stop_at and case["updated"] <= stop_at:
+                                summary["complete"] = True
+                                continue
+                            key = (case["uri"], case["updated"])
+                            if key in seen:
+                                summary["duplicates"] += 1
+                                continue
+                            seen.add(key)
+                            out.write(json.dumps(case, ensure_ascii=False) + "\n")
+                            summary["written"] += 1
+                            if not run["newest"] or case["updated"] > run["newest"]:
+                                run["newest"] = case["updated"]
+                run["next_page"] = page + count
+                if run["last_page"] and run["next_page"] > run["last_page"]:
+                    summary["complete"] = True
+                self.save_state(state)
+
+        if summary["complete"]:
+            state["high_water"] = run["newest"]
+            state["run"] = None
+            self.save_state(state)
+        summary["high_water"] = state["high_water"]
+        return summary
+
+
+def save_cases(cases, json_path=OUTPUT_JSON, csv_path=OUTPUT_CSV):
+    """Write the viewer's JSON array and CSV one case at a time; returns how many were written."""
+    count = 0
+    with open(json_path + ".tmp", "w", encoding="utf-8") as f_json, \
+            open(csv_path + ".tmp", "w", newline="", encoding="utf-8") as f_csv:
+        writer = csv.DictWriter(f_csv, fieldnames=["title", "updated", "link_pdf", "link_xml", "summary", "uri"],
+                                extrasaction="ignore")
+        writer.writeheader()
+        f_json.write("[")
+        for case in cases:
+            f_json.write(("," if count else "") + "\n  " + json.dumps(case, ensure_ascii=False))
+            writer.writerow(case)
+            count += 1
+        f_json.write("\n]\n")
+    os.replace(json_path + ".tmp", json_path)
+    os.replace(csv_path + ".tmp", csv_path)
+    return count
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Crawl every Find Case Law result for a search.")
+    parser.add_argument("--query", default=QUERY, help=f"Find Case Law search (default='{QUERY}')")
+    parser.add_argument("--max-pages", type=int, default=None, help="Stop after this many pages; rerun to continue")
+    parser.add_argument("--workers", type=int, default=PAGE_WORKERS, help=f"Pages fetched at once (default={PAGE_WORKERS})")
+    parser.add_argument("--rate", type=float, default=PAGE_RATE, help=f"Max feed requests/sec (default={PAGE_RATE})")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+
+    # === Create output folder if missing ===
+    os.makedirs("data", exist_ok=True)
+
+    # === Crawl feed ===
+    print(f"🔎 Crawling case law search for query: '{args.query}'...")
+    crawler = FeedCrawler(args.query, workers=args.workers, rate_per_host=args.rate)
+    try:
+        summary = crawler.crawl(args.max_pages)
+    except (RuntimeError, requests.RequestException) as e:
+        print("❌", e)
+        exit(1)
+
+    print(f"✅ {summary['written']} new entries from {summary['pages']} pages "
+          f"({summary['duplicates']} duplicates skipped)")
+    if not summary["complete"]:
+        print("⏸️ Crawl not finished; run again to continue from where it stopped.")
+
+    # === Save results ===
+    saved = save_cases(latest_cases())
+    print(f"📁 Saved {saved} cases to {OUTPUT_JSON} and {OUTPUT_CSV}")
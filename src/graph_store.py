@@ -0,0 +1,151 @@
+import os
+import json
+import time
+import threading
+from collections import OrderedDict
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+NEO4J_URI = os.getenv("NEO4J_URI")
+NEO4J_USER = os.getenv("NEO4J_USER")
+NEO4J_PASSWORD = os.getenv("NEO4J_PASSWORD")
+NEO4J_MAX_POOL_SIZE = int(os.getenv("NEO4J_MAX_POOL_SIZE", 20))               # a few Streamlit sessions + CLI
+NEO4J_ACQUIRE_TIMEOUT = float(os.getenv("NEO4J_ACQUIRE_TIMEOUT", 10))         # seconds to wait for a free connection
+NEO4J_MAX_CONNECTION_LIFETIME = float(os.getenv("NEO4J_MAX_CONNECTION_LIFETIME", 1800))
+GRAPH_CACHE_TTL = float(os.getenv("GRAPH_CACHE_TTL", 300))                    # seconds; 0 disables result caching
+GRAPH_CACHE_MAX_ENTRIES = int(os.getenv("GRAPH_CACHE_MAX_ENTRIES", 1000))
+
+
+def create_driver(uri=NEO4J_URI, user=NEO4J_USER, password=NEO4J_PASSWORD, max_pool_size=NEO4J_MAX_POOL_SIZE):
+    """A Neo4j driver with the pool settings above (no connection is opened until the first query)."""
+    from neo4j import GraphDatabase
+    return GraphDatabase.driver(
+        uri, auth=(user, password),
+        max_connection_pool_size=max_pool_size,
+        connection_acquisition_timeout=NEO4J_ACQUIRE_TIMEOUT,
+        max_connection_lifetime=NEO4J_MAX_CONNECTION_LIFETIME,
+    )
+
+
+def cache_key(cypher, params):
+    """Same query text (ignoring layout) and same parameters -> same key."""
+    return " ".join(cypher.split()), json.dumps(params, sort_keys=True, default=str)
+
+
+class GraphStore:
+    """One pooled Neo4j driver plus a TTL cache of read-query results.
+
+    The graph only changes when import_to_neo4j.py runs, so repeated reads
+    (Streamlit reruns, paging back) are served from memory; call
+    `clear_cache()` after an import to see the new data straight away.
+    """
+
+    def __init__(self, driver=None, ttl=GRAPH_CACHE_TTL, max_entries=GRAPH_CACHE_MAX_ENTRIES):
+        self._driver = driver
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._cache = OrderedDict()  # key -> (expires_at, rows), oldest first
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def driver(self):
+        with self._lock:
+            if self._driver is None:
+                self._driver = create_driver()
+            return self._driver
+
+    def _cached(self, key):
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._cache[key]
+            self.misses += 1
+            return None
+
+    def _store(self, key, rows, ttl):
+        with self._lock:
+            self._cache[key] = (time.monotonic() + ttl, rows)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+                self.evictions += 1
+
+    def query(self, cypher, ttl=None, **params):
+        """Rows of a read query as dicts, cached for `ttl` seconds (default: the store's TTL)."""
+        ttl = self.ttl if ttl is None else ttl
+        key = cache_key(cypher, params)
+        if ttl > 0:
+            rows = self._cached(key)
+            if rows is not None:
+                return [dict(row) for row in rows]
+        with self.driver.session() as session:
+            rows = session.run(cypher, **params).data()
+        if ttl > 0:
+            self._store(key, rows, ttl)
+        return [dict(row) for row in rows]
+
+    def query_single(self, cypher, ttl=None, **params):
+        """First row of a read query, or None."""
+        rows = self.query(cypher, ttl=ttl, **params)
+        return rows[0] if rows else None
+
+    def clear_cache(self):
+        with self._lock:
+            self._cache.clear()
+
+    def pool_stats(self):
+        """Configured pool size and current connections (read from the driver's pool, when it exposes one)."""
+        driver = self.driver
+        pool = getattr(driver, "_pool", None)
+        config = getattr(pool, "pool_config", None)
+        stats = {"max_size": getattr(config, "max_connection_pool_size", NEO4J_MAX_POOL_SIZE), "open": None, "in_use": None}
+        connections = getattr(pool, "connections", None)
+        if isinstance(connections, dict):
+            stats["open"] = sum(len(conns) for conns in connections.values())
+            stats["in_use"] = sum(pool.in_use_connection_count(address) for address in list(connections))
+        return stats
+
+    def cache_stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._cache),
+                "max_entries": self.max_entries,
+                "ttl_s": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "evictions": self.evictions,
+            }
+
+    def stats(self):
+        return {"pool": self.pool_stats(), "cache": self.cache_stats()}
+
+    def close(self):
+        with self._lock:
+            if self._driver is not None:
+                self._driver.close()
+                self._driver = None
+            self._cache.clear()
+
+
+_shared_store = None
+_shared_lock = threading.Lock()
+
+
+def get_graph_store():
+    """The process-wide GraphStore (one driver and connection pool per process)."""
+    global _shared_store
+    with _shared_lock:
+        if _shared_store is None:
+            _shared_store = GraphStore()
+        return _shared_store
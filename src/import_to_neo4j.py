@@ -1,18 +1,96 @@
-from neo4j import GraphDatabase
 import json
-from dotenv import load_dotenv
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
 import os
+import sys
 
-load_dotenv()
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from src.graph_store import create_driver
+from src.parse.parse_case_xmls import iter_paragraphs
+from src.retrieval.graph_context import is_definition
 
-NEO4J_URI = os.getenv("NEO4J_URI")
-NEO4J_USER = os.getenv("NEO4J_USER")
-NEO4J_PASSWORD = os.getenv("NEO4J_PASSWORD")
+PARAGRAPH_FILE = "data/equality_act_paragraphs_with_refs.json"
+CASE_PARAGRAPH_FILE = "data/parsed_case_paragraphs.jsonl"
+BATCH_SIZE = 1000
 
+driver = create_driver()  # same pool settings as query_graph and the Streamlit pages
 
-PARAGRAPH_FILE = "data/equality_act_paragraphs_with_refs.json"
+# === Schema: constraints back every MERGE key, so each MERGE is an index lookup ===
+SCHEMA = [
+    "CREATE CONSTRAINT paragraph_id IF NOT EXISTS FOR (pg:Paragraph) REQUIRE pg.id IS UNIQUE",
+    "CREATE CONSTRAINT part_name IF NOT EXISTS FOR (p:Part) REQUIRE p.name IS UNIQUE",
+    "CREATE CONSTRAINT chapter_name IF NOT EXISTS FOR (c:Chapter) REQUIRE c.name IS UNIQUE",
+    "CREATE CONSTRAINT section_name IF NOT EXISTS FOR (s:Section) REQUIRE s.name IS UNIQUE",
+    "CREATE CONSTRAINT case_id IF NOT EXISTS FOR (c:Case) REQUIRE c.id IS UNIQUE",
+    "CREATE CONSTRAINT case_paragraph_id IF NOT EXISTS FOR (cp:CaseParagraph) REQUIRE cp.id IS UNIQUE",
+    "CREATE INDEX paragraph_label IF NOT EXISTS FOR (pg:Paragraph) ON (pg.label)",
+    "CREATE INDEX paragraph_group_id IF NOT EXISTS FOR (pg:Paragraph) ON (pg.group_id)",
+    # Definition provisions, loaded by the Ask page's graph expansion without scanning every paragraph
+    "CREATE INDEX paragraph_is_definition IF NOT EXISTS FOR (pg:Paragraph) ON (pg.is_definition)",
+    # Relevance-ranked keyword search (query_graph.search_paragraphs) instead of CONTAINS scans
+    "CREATE FULLTEXT INDEX paragraph_text IF NOT EXISTS FOR (pg:Paragraph) ON EACH [pg.text]",
+    "CREATE FULLTEXT INDEX case_paragraph_text IF NOT EXISTS FOR (cp:CaseParagraph) ON EACH [cp.text]",
+]
+
+PARAGRAPH_BATCH_QUERY = """
+    UNWIND $rows AS row
+    MERGE (p:Part {name: row.part})
+    MERGE (c:Chapter {name: row.chapter})
+    MERGE (s:Section {name: row.section})
+    MERGE (pg:Paragraph {id: row.id})
+    SET pg.label = row.label, pg.text = row.text, pg.group_id = row.group_id, pg.is_definition = row.is_definition
+
+    MERGE (p)-[:CONTAINS]->(c)
+    MERGE (c)-[:CONTAINS]->(s)
+    MERGE (s)-[:CONTAINS]->(pg)
+"""
+
+CASE_BATCH_QUERY = """
+    UNWIND $rows AS row
+    MERGE (c:Case {id: row.case_id})
+    SET c.title = row.title, c.court = row.court, c.date = row.date
+    MERGE (cp:CaseParagraph {id: row.id})
+    SET cp.paragraph_id = row.paragraph_id, cp.text = row.text
+    MERGE (c)-[:HAS_PARAGRAPH]->(cp)
+"""
+
+
+def paragraph_key(para):
+    """Stable paragraph id: the legislation.gov.uk element id (e.g. section-6-1), else the Group ID."""
+    return para.get("Label") or para.get("Group ID", "")
+
+
+def paragraph_rows(data):
+    return [
+        {
+            "id": paragraph_key(para),
+            "part": para.get("Part", ""),
+            "chapter": para.get("Chapter", ""),
+            "section": para.get("Section", ""),
+            "label": para.get("Label", ""),
+            "text": para.get("Text", ""),
+            "group_id": para.get("Group ID", ""),
+            "is_definition": is_definition(para.get("Text", "")),
+        }
+        for para in data
+    ]
+
+
+def case_rows(data):
+    return [
+        {
+            "id": f"{item['case_id']}#{item['paragraph_id']}",
+            "case_id": item["case_id"],
+            "title": item["case_id"].replace("_", " "),
+            "court": item.get("court", ""),
+            "date": item.get("date", ""),
+            "paragraph_id": item["paragraph_id"],
+            "text": item["text"],
+        }
+        for item in data
+    ]
 
-driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASSWORD))
 
 def create_graph(tx, para):
     part = para.get("Part", "")
@@ -26,22 +104,81 @@ def create_graph(tx, para):
         MERGE (p:Part {name: $part})
         MERGE (c:Chapter {name: $chapter})
         MERGE (s:Section {name: $section})
-        MERGE (pg:Paragraph {label: $label, text: $text, group_id: $group_id})
+        MERGE (pg:Paragraph {id: $id})
+        SET pg.label = $label, pg.text = $text, pg.group_id = $group_id, pg.is_definition = $is_definition
 
         MERGE (p)-[:CONTAINS]->(c)
         MERGE (c)-[:CONTAINS]->(s)
         MERGE (s)-[:CONTAINS]->(pg)
-    """, part=part, chapter=chapter, section=section, label=label, text=text, group_id=group_id)
+    """, id=paragraph_key(para), part=part, chapter=chapter, section=section, label=label, text=text, group_id=group_id,
+         is_definition=is_definition(text))
+
+
+def reset_graph(driver):
+    """Delete every imported node in batches (for a clean full reload)."""
+    with driver.session() as session:
+        session.run("""
+            MATCH (n) WHERE n:Part OR n:Chapter OR n:Section OR n:Paragraph OR n:Case OR n:CaseParagraph
+            CALL { WITH n DETACH DELETE n } IN TRANSACTIONS OF 10000 ROWS
+        """).consume()
+
+
+def create_schema(driver):
+    with driver.session() as session:
+        for statement in SCHEMA:
+            session.run(statement).consume()
+
+
+def _write_batch(tx, query, rows):
+    tx.run(query, rows=rows).consume()
 
-def import_paragraphs():
-    with open(PARAGRAPH_FILE, "r", encoding="utf-8") as f:
-        data = json.load(f)
 
+def import_rows(driver, name, query, rows, batch_size=BATCH_SIZE):
+    """Write `rows` with one UNWIND transaction per batch; returns throughput stats."""
+    start = time.perf_counter()
     with driver.session() as session:
-        for item in data:
-            session.execute_write(create_graph, item)
+        for i in range(0, len(rows), batch_size):
+            session.execute_write(_write_batch, query, rows[i:i + batch_size])
+    seconds = time.perf_counter() - start
+    stats = {"name": name, "rows": len(rows), "seconds": round(seconds, 3),
+             "rows_per_sec": round(len(rows) / seconds, 1) if seconds else 0.0}
+    print(f"✅ {name}: {stats['rows']} rows in {stats['seconds']:.2f} s ({stats['rows_per_sec']:.0f} rows/sec)")
+    return stats
+
+
+def bulk_import(driver, jobs, batch_size=BATCH_SIZE, parallel=False):
+    """Run import jobs {name: (query, rows)}; jobs touch disjoint labels, so they can run side by side."""
+    create_schema(driver)
+    if not parallel:
+        return [import_rows(driver, name, query, rows, batch_size) for name, (query, rows) in jobs.items()]
+    with ThreadPoolExecutor(max_workers=len(jobs)) as pool:
+        futures = [pool.submit(import_rows, driver, name, query, rows, batch_size) for name, (query, rows) in jobs.items()]
+        return [future.result() for future in futures]
+
+
+def load_jobs(include_cases=True):
+    with open(PARAGRAPH_FILE, "r", encoding="utf-8") as f:
+        jobs = {"equality_act": (PARAGRAPH_BATCH_QUERY, paragraph_rows(json.load(f)))}
+    if include_cases and os.path.exists(CASE_PARAGRAPH_FILE):
+        jobs["case_law"] = (CASE_BATCH_QUERY, case_rows(iter_paragraphs(CASE_PARAGRAPH_FILE)))
+    return jobs
+
 
-    print("✅ Imported all paragraph nodes and relationships.")
+def import_paragraphs(batch_size=BATCH_SIZE, parallel=False, include_cases=True, reset=False):
+    start = time.perf_counter()
+    if reset:
+        reset_graph(driver)
+    results = bulk_import(driver, load_jobs(include_cases), batch_size=batch_size, parallel=parallel)
+    seconds = time.perf_counter() - start
+    total = sum(r["rows"] for r in results)
+    print(f"✅ Imported {total} rows in {seconds:.2f} s ({total / seconds:.0f} rows/sec overall).")
+    return results
 
 if __name__ == "__main__":
-    import_paragraphs()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Bulk-load the Equality Act (and case law) into Neo4j.")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help=f"Rows per UNWIND transaction (default={BATCH_SIZE})")
+    parser.add_argument("--parallel", action="store_true", help="Load the Act and case law concurrently")
+    parser.add_argument("--act-only", action="store_true", help="Skip case-law paragraphs")
+    parser.add_argument("--reset", action="store_true", help="Delete previously imported nodes first")
+    args = parser.parse_args()
+    import_paragraphs(batch_size=args.batch_size, parallel=args.parallel, include_cases=not args.act_only, reset=args.reset)
@@ -0,0 +1,249 @@
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone
+from urllib.parse import urlsplit
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from src.fetch_case_law import FeedCrawler, latest_cases, save_cases, QUERY, FEED_PATH
+from src.download_case_documents import download_case, get_downloader, PDF_DIR, XML_DIR, WORKERS
+from src.parse.parse_case_xmls import parse_case, write_paragraphs, OUTPUT_JSONL
+
+# === Config ===
+MANIFEST_PATH = "data/ingest_manifest.json"         # per-case state, rewritten after every step
+PARAGRAPH_DIR = "data/case_paragraphs"              # parsed paragraphs, one JSON file per case
+STAGES = ["fetched", "downloaded", "parsed", "indexed"]
+
+
+def case_key(case):
+    """Manifest id of a judgment: its Atom URI, as the crawler deduplicates on, else its title.
+
+    Titles are not unique ("R v ...", "Re X"), so they only name the downloaded documents.
+    """
+    return case.get("uri") or case["title"]
+
+
+def paragraph_filename(case_id):
+    """File stem for a case's parsed paragraphs (the URI path, e.g. ewca_civ_2024_5)."""
+    return re.sub(r"[^\w-]+", "_", urlsplit(case_id).path or case_id).strip("_")
+
+
+def load_manifest(path=MANIFEST_PATH):
+    if not os.path.exists(path):
+        return {"cases": {}, "last_run": None}
+    with open(path, "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    # Manifests written before cases were keyed on their URI are re-keyed in place
+    manifest["cases"] = {case_key(entry["case"]): entry for entry in manifest["cases"].values()}
+    return manifest
+
+
+def save_manifest(manifest, path=MANIFEST_PATH):
+    """Write via a temp file and rename, so a crash never leaves a half-written manifest."""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def plan(manifest, cases):
+    """(case_id, case, changed) for every case that is new, updated since its last run, or unfinished."""
+    todo = []
+    for case in cases:
+        case_id = case_key(case)
+        entry = manifest["cases"].get(case_id)
+        changed = entry is None or entry["case"].get("updated") != case.get("updated")
+        if changed or STAGES.index(entry["stage"]) < STAGES.index("parsed"):
+            todo.append((case_id, case, changed))
+    return todo
+
+
+def _write_json(path, data):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def reset_case(manifest, case_id, case):
+    """Start a new or updated case again from download, checkpointed by the caller."""
+    entry = manifest["cases"].get(case_id)
+    # The indexed version stays in the index until the new one has been parsed
+    previous = entry.get("previous") if entry else None
+    if entry and entry["stage"] in ("parsed", "indexed"):
+        previous = {key: entry[key] for key in ("paragraphs_path", "paragraphs", "stage")}
+    # Updated judgments are downloaded again rather than read from the old files
+    entry = manifest["cases"][case_id] = {"case": case, "stage": "fetched", "reingest": entry is not None}
+    if previous:
+        entry["previous"] = previous
+    return entry
+
+
+def download_step(entry, download):
+    """Fetch one case's documents; runs on the download pool and leaves the manifest alone."""
+    paths = download(entry["case"], overwrite=entry.get("reingest", False))
+    if not paths.get("xml"):
+        raise RuntimeError("no XML available")
+    return paths
+
+
+def parse_step(case_id, entry, parse, paragraph_dir):
+    rows = parse(entry["xml_path"])
+    paragraphs_path = os.path.join(paragraph_dir, f"{paragraph_filename(case_id)}.json")
+    _write_json(paragraphs_path, rows)
+    entry.update(paragraphs_path=paragraphs_path, paragraphs=len(rows), stage="parsed")
+    entry.pop("error", None)
+    entry.pop("previous", None)
+
+
+def _case_paragraphs(manifest):
+    for entry in manifest["cases"].values():
+        if entry["stage"] not in ("parsed", "indexed"):
+            entry = entry.get("previous")  # an update that has not been parsed yet
+        if entry:
+            with open(entry["paragraphs_path"], "r", encoding="utf-8") as f:
+                yield from json.load(f)
+
+
+def write_case_paragraphs(manifest, output_path=OUTPUT_JSONL):
+    """Stream the per-case paragraph files into the index input (no XML is re-parsed)."""
+    return write_paragraphs(_case_paragraphs(manifest), output_path)
+
+
+def build_corpus_index():
+    from src.embed.embed_corpus import build_corpus_index as build
+    build()
+
+
+def run_ingestion(cases, manifest_path=MANIFEST_PATH, download=None, parse=parse_case,
+                  build_index=build_corpus_index, paragraph_dir=PARAGRAPH_DIR, output_path=OUTPUT_JSONL,
+                  workers=WORKERS):
+    """Bring new and updated cases into the index; safe to rerun after a crash at any point.
+
+    Documents for every pending case are downloaded on one pool of `workers`
+    threads (the shared Downloader unless `download` is given), then parsed;
+    the manifest is checkpointed after each case's step.
+    """
+    start = time.perf_counter()
+    os.makedirs(paragraph_dir, exist_ok=True)
+    manifest = load_manifest(manifest_path)
+    checkpoint = lambda: save_manifest(manifest, manifest_path)
+
+    feed = 0
+
+    def counted(cases):
+        nonlocal feed
+        for case in cases:
+            feed += 1
+            yield case
+
+    # Only the cases with work to do are kept; the feed itself is streamed
+    todo = plan(manifest, counted(cases))
+    print(f"🔎 {feed} cases in the feed, {len(todo)} new, updated or unfinished")
+    failed = []
+
+    def fail(case_id, error):
+        print(f"⚠️ {case_id}: {error}")
+        manifest["cases"][case_id]["error"] = str(error)
+        checkpoint()
+        failed.append(case_id)
+
+    for case_id, case, changed in todo:
+        if changed:
+            reset_case(manifest, case_id, case)
+    checkpoint()
+
+    # === Download: every pending case shares one pool and one HTTP session ===
+    downloader = None
+    if download is None:
+        downloader = get_downloader()
+        download = lambda case, overwrite=False: download_case(case, overwrite=overwrite, downloader=downloader)
+    to_download = [case_id for case_id, _, _ in todo if manifest["cases"][case_id]["stage"] == "fetched"]
+    if to_download:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(download_step, manifest["cases"][case_id], download): case_id for case_id in to_download}
+            try:
+                for future in as_completed(futures):
+                    case_id = futures[future]
+                    try:
+                        paths = future.result()
+                    except Exception as e:
+                        fail(case_id, e)
+                        continue
+                    manifest["cases"][case_id].update(xml_path=paths["xml"], pdf_path=paths.get("pdf"), stage="downloaded")
+                    checkpoint()
+            except BaseException:
+                pool.shutdown(wait=False, cancel_futures=True)
+                raise
+            finally:
+                if downloader is not None:
+                    downloader.save_validators()  # once per run, not once per case
+
+    # === Parse ===
+    for case_id, _, _ in todo:
+        entry = manifest["cases"][case_id]
+        if entry["stage"] != "downloaded":
+            continue
+        try:
+            parse_step(case_id, entry, parse, paragraph_dir)
+            checkpoint()
+        except Exception as e:
+            fail(case_id, e)
+
+    pending = [case_id for case_id, entry in manifest["cases"].items() if entry["stage"] == "parsed"]
+    if pending and build_index is not None:
+        paragraphs = write_case_paragraphs(manifest, output_path)
+        print(f"💾 Updating the index with {len(pending)} cases ({paragraphs} case paragraphs in total)...")
+        build_index()
+        for case_id in pending:
+            manifest["cases"][case_id]["stage"] = "indexed"
+    manifest["last_run"] = datetime.now(timezone.utc).isoformat()
+    checkpoint()
+
+    summary = {
+        "feed": feed,
+        "processed": len(todo) - len(failed),
+        "failed": failed,
+        "indexed": len(pending) if build_index is not None else 0,
+        "seconds": round(time.perf_counter() - start, 2),
+    }
+    print(f"✅ Ingested {summary['processed']} cases, indexed {summary['indexed']}, "
+          f"{len(failed)} failed, in {summary['seconds']:.1f} s")
+    return summary
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Fetch, download, parse and index new or updated judgments.")
+    parser.add_argument("--query", default=QUERY, help=f"Find Case Law search (default='{QUERY}')")
+    parser.add_argument("--max-pages", type=int, default=None, help="Feed pages to crawl this run; rerun to continue")
+    parser.add_argument("--manifest", default=MANIFEST_PATH, help="Per-case state file")
+    parser.add_argument("--skip-index", action="store_true", help="Stop after parsing; index on a later run")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    os.makedirs(PDF_DIR, exist_ok=True)
+    os.makedirs(XML_DIR, exist_ok=True)
+
+    print(f"🔎 Crawling case law search for query: '{args.query}'...")
+    crawl = FeedCrawler(args.query).crawl(args.max_pages)
+    print(f"📰 {crawl['written']} new or updated feed entries from {crawl['pages']} pages")
+    # The manifest skips every case already ingested at this version
+    cases = latest_cases(FEED_PATH)
+    run_ingestion(cases, manifest_path=args.manifest, build_index=None if args.skip_index else build_corpus_index)
+
+    # The Case Law Viewer lists every case ingested so far
+    manifest = load_manifest(args.manifest)
+    save_cases(entry["case"] for entry in manifest["cases"].values())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+import os
+import time
+import logging
+import threading
+
+from src.profiling import approx_tokens
+
+logger = logging.getLogger(__name__)
+
+OLLAMA_MODEL = "mistral"  # must be available via `ollama list`
+OLLAMA_HOST = os.getenv("OLLAMA_HOST", "http://localhost:11434")
+OLLAMA_KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "30m")  # keep the model loaded between questions
+OLLAMA_OPTIONS = {
+    "num_ctx": int(os.getenv("OLLAMA_NUM_CTX", 4096)),          # fits the packed context + question
+    "num_predict": int(os.getenv("OLLAMA_NUM_PREDICT", 512)),   # cap on answer length
+}
+OLLAMA_TIMEOUT = float(os.getenv("OLLAMA_TIMEOUT", 300))
+
+
+def response_stats(response):
+    """Load vs prompt-eval vs generation time (seconds) from an Ollama response or final stream chunk."""
+    seconds = lambda key: round(response.get(key, 0) / 1e9, 4)
+    stats = {
+        "load_s": seconds("load_duration"),
+        "prompt_eval_s": seconds("prompt_eval_duration"),
+        "eval_s": seconds("eval_duration"),
+        "total_s": seconds("total_duration"),
+        "prompt_tokens": response.get("prompt_eval_count", 0),
+        "completion_tokens": response.get("eval_count", 0),
+    }
+    stats["tokens_per_s"] = round(stats["completion_tokens"] / stats["eval_s"], 1) if stats["eval_s"] else 0.0
+    return stats
+
+
+class LLMClient:
+    """One Ollama client (one pooled HTTP connection) shared by reranking and answering.
+
+    Every call gets the configured keep-alive and options; `last_stats`
+    holds the timing breakdown of the most recent finished call.
+    """
+
+    def __init__(self, host=OLLAMA_HOST, model=OLLAMA_MODEL, keep_alive=OLLAMA_KEEP_ALIVE, options=None, timeout=OLLAMA_TIMEOUT):
+        self.host = host
+        self.model = model
+        self.keep_alive = keep_alive
+        self.options = dict(OLLAMA_OPTIONS if options is None else options)
+        self.timeout = timeout
+        self.last_stats = {}
+        self.warmed_up = False
+        self._client = None
+        self._lock = threading.Lock()
+
+    @property
+    def client(self):
+        with self._lock:
+            if self._client is None:
+                import ollama
+                self._client = ollama.Client(host=self.host, timeout=self.timeout)
+            return self._client
+
+    def chat(self, model=None, messages=None, stream=False, options=None, **kwargs):
+        """Same call shape as ollama.chat, so it can be passed wherever a `chat` callable is expected."""
+        merged = dict(self.options, **(options or {}))
+        kwargs.setdefault("keep_alive", self.keep_alive)
+        response = self.client.chat(model=model or self.model, messages=messages, stream=stream, options=merged, **kwargs)
+        if stream:
+            return self._record_stream(response)
+        self.last_stats = response_stats(response)
+        return response
+
+    def _record_stream(self, chunks):
+        for chunk in chunks:
+            if chunk.get("done"):
+                self.last_stats = response_stats(chunk)
+            yield chunk
+
+    def warm_up(self):
+        """Load the model into memory now (an empty generate), so the first question skips the load."""
+        start = time.perf_counter()
+        response = self.client.generate(model=self.model, prompt="", keep_alive=self.keep_alive)
+        self.warmed_up = True
+        self.last_stats = response_stats(response)
+        logger.info("Warmed up %s in %.1f s (load %.1f s)", self.model, time.perf_counter() - start, self.last_stats["load_s"])
+        return self.last_stats
+
+    def warm_up_in_background(self):
+        """Start warming up without blocking; failures (e.g. Ollama not running) are only logged."""
+        def run():
+            try:
+                self.warm_up()
+            except Exception as e:
+                logger.warning("Could not warm up %s: %s", self.model, e)
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        return thread
+
+
+_shared_client = None
+_shared_lock = threading.Lock()
+
+
+def get_llm_client():
+    """The process-wide LLMClient."""
+    global _shared_client
+    with _shared_lock:
+        if _shared_client is None:
+            _shared_client = LLMClient()
+        return _shared_client
+
+
+def build_answer_prompt(question, chunks):
+    """Answer prompt over numbered, referenced chunks (shared by the Ask page, ask_dual.py and the benchmark)."""
+    context = "\n\n".join([f"[{i+1}] {c['ref']}\n{c['text']}" for i, c in enumerate(chunks)])
+    return f"""
+You are a helpful UK legal assistant. Use only the context below to answer the question, citing the references.
+
+Context:
+{context}
+
+Question: {question}
+
+Answer:
+"""
+
+
+class AnswerStream:
+    """Iterate over an Ollama chat answer as it is generated.
+
+    After iteration, `text` holds the full answer and `time_to_first_token`
+    / `total_time` hold the latencies users actually see.
+    """
+
+    def __init__(self, prompt, model=OLLAMA_MODEL, chat=None):
+        self.prompt = prompt
+        self.model = model
+        self._chat = chat
+        self.text = ""
+        self.time_to_first_token = None
+        self.total_time = None
+        self.final_chunk = None
+
+    def __iter__(self):
+        if self._chat is None:
+            self._chat = get_llm_client().chat
+
+        start = time.perf_counter()
+        chunks = self._chat(model=self.model, messages=[{"role": "user", "content": self.prompt}], stream=True)
+        for chunk in chunks:
+            piece = chunk["message"]["content"]
+            if piece:
+                if self.time_to_first_token is None:
+                    self.time_to_first_token = time.perf_counter() - start
+                self.text += piece
+                yield piece
+            if chunk.get("done"):
+                self.final_chunk = chunk
+        self.total_time = time.perf_counter() - start
+
+    def usage(self):
+        """Token counts (estimated if Ollama did not report them) plus load/eval timings when reported."""
+        final = self.final_chunk or {}
+        usage = response_stats(final) if "total_duration" in final else {}
+        usage["prompt_tokens"] = final.get("prompt_eval_count") or approx_tokens(self.prompt)
+        usage["completion_tokens"] = final.get("eval_count") or approx_tokens(self.text)
+        return usage
@@ -1,43 +1,34 @@
 import re
-import streamlit as st
-from neo4j import GraphDatabase
 import os
-from dotenv import load_dotenv
-load_dotenv()
-
-NEO4J_URI = os.getenv("NEO4J_URI")
-NEO4J_USER = os.getenv("NEO4J_USER")
-NEO4J_PASSWORD = os.getenv("NEO4J_PASSWORD")
+import sys
+import streamlit as st
 
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from src.graph_store import get_graph_store
+from src.query_graph import search_paragraphs, PAGE_SIZE
 
-driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASSWORD))
 # === Streamlit UI ===
 st.set_page_config(page_title="Equality Act Graph Viewer", layout="wide")
 st.title("📘 UK Equality Act - Graph Viewer")
 
+# === Graph Store (one driver and connection pool per server process, shared with query_graph) ===
+@st.cache_resource
+def load_graph_store():
+    return get_graph_store()
+
+graph = load_graph_store()
+
 query = st.text_input("🔍 Enter keyword to search in paragraphs:", "disability")
 
-# === Cypher Query ===
-cypher = '''
-MATCH (s:Section)-[:CONTAINS]->(p:Paragraph)
-WHERE toLower(p.text) CONTAINS toLower($keyword)
-RETURN s.name AS section, p.label AS label, p.group_id AS group_id, p.text AS text
-ORDER BY p.group_id
-LIMIT 10
-'''
-
-# === Run Query ===
-results = []
-with driver.session() as session:
-    rows = session.run(cypher, keyword=query)
-    results = rows.data()
-
-# === Display Results ===
-# Run Neo4j query
-results = []
-with driver.session() as session:
-    rows = session.run(cypher, keyword=query)
-    results = rows.data()
+# === Pagination: SKIP cursor per keyword ===
+if st.session_state.get("graph_query") != query:
+    st.session_state.graph_query = query
+    st.session_state.graph_skips = [0]  # start offsets of the pages visited so far
+
+skip = st.session_state.graph_skips[-1]
+
+# === Full-text Query (ranked by relevance) ===
+results, next_skip = search_paragraphs(query, skip=skip, limit=PAGE_SIZE)
 
 # Render results
 if results:
@@ -46,12 +37,13 @@ if results:
         anchor = row['label'].replace(" ", "_").replace("section-", "sec_")
         st.markdown(f"<a name='{anchor}'></a>", unsafe_allow_html=True)
         st.markdown(f"<div style='background:#201c94;padding:10px;border-left:5px solid #2196f3;'>"
-                    f"<h4>{row['section']} - {row['label']}</h4>"
+                    f"<h4>{row['section'] or ''} - {row['label']}</h4>"
                     f"<b>Group ID:</b> {row['group_id']}</div>", unsafe_allow_html=True)
 
         # Highlight keyword
-        def highlight(text, term):
-            return re.sub(f"(?i)({re.escape(term)})", r"<mark>\1</mark>", text)
+        def highlight(text, terms):
+            pattern = "|".join(re.escape(term) for term in terms.split())
+            return re.sub(f"(?i)({pattern})", r"<mark>\1</mark>", text) if pattern else text
 
         highlighted = highlight(row['text'], query)
         st.markdown(f"<div style='margin-bottom:30px;'>{highlighted}</div>", unsafe_allow_html=True)
@@ -62,5 +54,21 @@ if results:
         anchor = row['label'].replace(" ", "_").replace("section-", "sec_")
         st.sidebar.markdown(f"- [{row['label']}](#{anchor})")
 
+    # Page navigation
+    st.caption(f"Results {skip + 1}–{skip + len(results)}")
+    previous_col, next_col = st.columns(2)
+    if len(st.session_state.graph_skips) > 1 and previous_col.button("⬅️ Previous"):
+        st.session_state.graph_skips.pop()
+        st.rerun()
+    if next_skip is not None and next_col.button("Next ➡️"):
+        st.session_state.graph_skips.append(next_skip)
+        st.rerun()
+
 else:
     st.info("No results found. Try another keyword.")
+
+# === Pool and cache statistics ===
+with st.sidebar.expander("🗄️ Graph connection stats"):
+    st.json(graph.stats())
+    if st.button("Clear cached results"):
+        graph.clear_cache()
@@ -1,80 +1,102 @@
 # src/pages/3_ask_legal_question.py
 
-import streamlit as st
-import faiss
+import os
+import sys
 import json
-import numpy as np
+import streamlit as st
 from sentence_transformers import SentenceTransformer
-import ollama
 import re
 import io
 from reportlab.lib.pagesizes import LETTER
 from reportlab.pdfgen import canvas
 import textwrap
 
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from src.retrieval.corpus import Corpus
+from src.retrieval.query_cache import QueryEmbeddingCache
+from src.retrieval.answer_cache import AnswerCache, manifest_fingerprint
+from src.retrieval.rerankers import get_reranker
+from src.retrieval.context_packer import pack_context
+from src.retrieval.graph_context import GraphExpander
+from src.llm import AnswerStream, OLLAMA_MODEL, build_answer_prompt, get_llm_client
+from src.profiling import Trace, configure_trace_log, approx_tokens
+
 st.set_page_config(page_title="Ask Legal Question", layout="wide")
 
 # === Config ===
-K = 10       # Retrieve more, rerank later
-FINAL_K = 5  # Show top 5
-FAISS_LEGISLATION_INDEX = "data/faiss_index_with_refs.idx"
-FAISS_LEGISLATION_META = "data/faiss_metadata_with_refs.json"
-FAISS_CASES_INDEX = "data/faiss_index_cases.idx"
-FAISS_CASES_META = "data/faiss_metadata_cases.json"
-
-def rerank_with_llm(question, candidates):
-    numbered = []
-    for i, c in enumerate(candidates):
-        clean_text = c['text'][:300].replace('\n', ' ')
-        numbered.append(f"[{i+1}] {clean_text}")
-
-    context = "\n\n".join(numbered)
-
-    rerank_prompt = f"""
-You are a legal assistant. You will receive a question and 10 legal paragraphs (labeled [1] to [10]).
-Rank them from most to least relevant by returning a list of numbers.
-
-Question:
-{question}
-
-Paragraphs:
-{context}
-
-Return the ranking like this:
-[3, 1, 5, 2, 4, 6, 7, 8, 9, 10]
-Only return the list. No explanation.
-"""
-
-    response = ollama.chat(
-        model="mistral",
-        messages=[{"role": "user", "content": rerank_prompt}]
+K = 12       # Hybrid dense + BM25 candidates across all sources, rerank later
+FINAL_K = 4  # Show top 4
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", 1500))  # prompt context size, in tokens
+CORPUS_MANIFEST = "data/faiss_manifest_corpus.json"  # written by src/embed/embed_corpus.py
+EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+QUERY_CACHE_PATH = "data/query_cache.sqlite"
+ANSWER_CACHE_PATH = "data/answer_cache.sqlite"
+ANSWER_CACHE_THRESHOLD = 0.95        # min cosine similarity to reuse a cached answer
+ANSWER_CACHE_TTL = 7 * 24 * 3600     # seconds
+ANSWER_CACHE_MAX_ENTRIES = 5000
+RERANKER = os.getenv("RERANKER", "llm")  # llm | cross-encoder | fusion
+GRAPH_EXPANSION = os.getenv("GRAPH_EXPANSION", "1") != "0"  # add parent sections, siblings and definitions from Neo4j
+
+configure_trace_log()  # one JSON line per question in TRACE_LOG_PATH (default data/trace.jsonl)
+
+# === Load Embedding Model (behind the query embedding cache) ===
+@st.cache_resource
+def load_model():
+    return QueryEmbeddingCache(
+        lambda: SentenceTransformer(EMBEDDING_MODEL), EMBEDDING_MODEL, disk_path=QUERY_CACHE_PATH
     )
 
-    try:
-        text = response["message"]["content"]
-        order = eval(text.strip())
-        return [candidates[i - 1] for i in order if 1 <= i <= len(candidates)]
-    except Exception as e:
-        st.warning(" LLM reranking failed, using original order")
-        return candidates
+model = load_model()
+
+# === Load Combined FAISS Index (legislation + case law) ===
+def corpus_fingerprint(manifest_path):
+    """Changes when ingestion swaps in a new build, so the next rerun loads it."""
+    if not os.path.exists(manifest_path):
+        return None
+    with open(manifest_path, "r", encoding="utf-8") as f:
+        return manifest_fingerprint(json.load(f))
+
+@st.cache_resource(max_entries=2)
+def load_corpus(manifest_path, fingerprint):
+    return Corpus(manifest_path)
 
-# === Load Embedding Model ===
+fingerprint = corpus_fingerprint(CORPUS_MANIFEST)
+corpus = load_corpus(CORPUS_MANIFEST, fingerprint)
+
+# === Answer Cache (cleared whenever the corpus manifest changes) ===
 @st.cache_resource
-def load_model():
-    return SentenceTransformer("all-MiniLM-L6-v2")
+def load_answer_cache(fingerprint):
+    return AnswerCache(
+        ANSWER_CACHE_PATH, fingerprint,
+        threshold=ANSWER_CACHE_THRESHOLD,
+        ttl_seconds=ANSWER_CACHE_TTL,
+        max_entries=ANSWER_CACHE_MAX_ENTRIES,
+    )
 
-model = load_model()
+answer_cache = load_answer_cache(manifest_fingerprint(corpus.manifest))
+
+# === Reranker (selected per deployment) ===
+@st.cache_resource(max_entries=2)
+def load_reranker(name, fingerprint):
+    return get_reranker(name, embeddings=corpus.embeddings, llm_model=OLLAMA_MODEL)
+
+reranker = load_reranker(RERANKER, fingerprint)
+
+# === LLM Client (one shared connection; model loaded once per server process, not per question) ===
+@st.cache_resource
+def load_llm_client():
+    client = get_llm_client()
+    client.warm_up_in_background()
+    return client
+
+llm_client = load_llm_client()
 
-# === Load FAISS Indexes and Metadata ===
+# === Graph Expander (hot subgraphs cached across questions and sessions) ===
 @st.cache_resource
-def load_faiss_and_metadata(index_path, meta_path):
-    index = faiss.read_index(index_path)
-    with open(meta_path, "r", encoding="utf-8") as f:
-        metadata = json.load(f)
-    return index, metadata
+def load_graph_expander():
+    return GraphExpander()
 
-faiss_legislation, metadata_legislation = load_faiss_and_metadata(FAISS_LEGISLATION_INDEX, FAISS_LEGISLATION_META)
-faiss_cases, metadata_cases = load_faiss_and_metadata(FAISS_CASES_INDEX, FAISS_CASES_META)
+graph_expander = load_graph_expander() if GRAPH_EXPANSION else None
 
 def wrap_text(text, max_chars=95):
     return textwrap.wrap(text, width=max_chars)
@@ -137,94 +159,95 @@ def generate_pdf(answer_text, sources):
     return buffer
 
 
-# === Cosine similarity function ===
-def cosine_similarity(a, b):
-    return np.dot(a, b) / (np.linalg.norm(a) * np.linalg.norm(b))
-
 # === UI ===
 st.title(" Ask a Legal Question")
 
 question = st.text_input(" Enter your legal question:", "")
+sources = st.multiselect(
+    " Search in:",
+    corpus.sources,
+    default=corpus.sources,
+    format_func=lambda source: source.replace("_", " ").title(),
+)
+show_timings = st.sidebar.checkbox("Show stage timings", value=False)
 
 if st.button("Ask"):
     if not question.strip():
         st.warning("Please enter a question.")
     else:
-        query_embedding = model.encode([question])[0]
-        query_embedding_np = np.array(query_embedding).astype(np.float32).reshape(1, -1)
-
-
-        # Search FAISS
-        D_leg, I_leg = faiss_legislation.search(query_embedding_np, K)
-        D_case, I_case = faiss_cases.search(query_embedding_np, K)
-
-        candidates = []
-
-                # === Collect + Format Candidates ===
-        for idx in I_leg[0]:
-            if idx == -1:
-                continue
-            item = metadata_legislation[idx]
-            text = item["Text"]
-
-            # 🎯 Structured legal citation
-            part = item.get("Part", "")
-            chapter = item.get("Chapter", "")
-            section = item.get("Section", "")
-            label = item.get("Label", "Unknown")
-
-            ref = f"Equality Act - {label}"  # simple version
-            # Optional enhanced version: f"Equality Act - {part} {chapter} {section} ({label})"
-
-            emb = model.encode(text)
-            candidates.append({"text": text, "ref": ref, "embedding": emb})
-
-        for idx in I_case[0]:
-            if idx == -1:
-                continue
-            item = metadata_cases[idx]
-            text = item["text"]
-
-            raw_title = item.get("case_title", "Unknown")
-            pretty_title = raw_title.replace("_", " ").replace(",", ", ")
-            ref = f"Case Law - {pretty_title}"
-
-            emb = model.encode(text)
-            candidates.append({"text": text, "ref": ref, "embedding": emb})
-
-        # Rerank
-        # LLM-based reranking (Mistral will sort best 10 chunks)
-        reranked_chunks = rerank_with_llm(question, candidates)
-        top_chunks = reranked_chunks[:FINAL_K]
-
-
-
-        # Build Prompt
-        context = "\n\n".join([f"[{i+1}] {c['ref']}\n{c['text']}" for i, c in enumerate(top_chunks)])
-        prompt = f"""
-You are a helpful UK legal assistant. Use only the context below to answer the question, citing the references.
-
-Context:
-{context}
-
-Question: {question}
-
-Answer:
-"""
-
-        st.info(" Sending to Mistral model via Ollama...")
-
-        response = ollama.chat(
-            model="mistral",
-            messages=[{"role": "user", "content": prompt}]
+        trace = Trace("ask_page")
+        with trace.span("encode question") as span:
+            query_embeddings, encode_info = model.encode_with_info([question])
+            query_embedding = query_embeddings[0]
+            span["cache_hit"] = encode_info["misses"] == 0
+        cache_stats = model.stats()
+        st.sidebar.caption(
+            f"Query cache: {cache_stats['memory_hits'] + cache_stats['disk_hits']} hits, "
+            f"{cache_stats['misses']} misses"
         )
 
-        answer = response["message"]["content"]
-
-        st.subheader(" Answer")
-        # Detect [1], [2], etc. and bold them
+        # Dense + BM25 search over every selected source, fused by reciprocal rank
+        with trace.span("retrieve", k=K, sources=sources) as span:
+            candidates = corpus.search(query_embedding, K, sources=sources, question=question)
+            span["candidates"] = len(candidates)
+        chunk_ids = [c["id"] for c in candidates]
+
+        # Near-duplicate question with the same retrieved chunks: skip rerank and generation
+        with trace.span("answer cache") as span:
+            cached = answer_cache.lookup(query_embedding, chunk_ids)
+            span["cache_hit"] = cached is not None
+        if cached:
+            st.info(f" Answer served from cache (similarity {cached['similarity']:.2f})")
+            answer = cached["answer"]
+            top_chunks = cached["sources"]
+            st.subheader(" Answer")
+            answer_box = st.empty()
+        else:
+            # Rerank
+            with trace.span("rerank", reranker=reranker.name) as span:
+                reranked_chunks, rerank_info = reranker.rerank_with_info(question, candidates, query_embedding)
+                span.update(rerank_info["usage"], fallback=rerank_info["fallback"])
+            if rerank_info["fallback"]:
+                st.warning(" Reranking failed, using original order")
+            st.sidebar.caption(f"Rerank ({reranker.name}): {rerank_info['duration'] * 1000:.0f} ms")
+            # Statutory context for the top hits: one batched Neo4j query, hot sections from memory
+            extra_chunks = 0
+            if graph_expander is not None:
+                with trace.span("graph expand") as span:
+                    reranked_chunks, graph_info = graph_expander.expand_with_info(reranked_chunks, top_n=FINAL_K)
+                    span.update(graph_info["stats"], fallback=graph_info["fallback"])
+                extra_chunks = graph_info["stats"].get("definitions", 0)
+                if graph_info["fallback"]:
+                    st.warning(" Graph unavailable, using retrieved paragraphs only")
+            # Parent sections absorb their retrieved subsections; pack to the prompt token budget
+            with trace.span("pack context", budget=CONTEXT_TOKEN_BUDGET) as span:
+                top_chunks = pack_context(reranked_chunks, CONTEXT_TOKEN_BUDGET, max_chunks=FINAL_K + extra_chunks)
+                span.update(chunks=len(top_chunks), context_tokens=sum(approx_tokens(c["text"]) for c in top_chunks))
+
+            # Build Prompt
+            prompt = build_answer_prompt(question, top_chunks)
+
+            st.info(" Sending to Mistral model via Ollama...")
+
+            # Render tokens as they arrive
+            st.subheader(" Answer")
+            answer_box = st.empty()
+            stream = AnswerStream(prompt, model=OLLAMA_MODEL, chat=llm_client.chat)
+            with trace.span("generate", model=OLLAMA_MODEL) as span:
+                for _ in stream:
+                    answer_box.markdown(stream.text + "▌")
+                span.update(stream.usage())
+            answer = stream.text
+            if stream.time_to_first_token is not None:
+                trace.add("time to first token", stream.time_to_first_token)
+                st.sidebar.caption(
+                    f"First token: {stream.time_to_first_token:.1f} s, full answer: {stream.total_time:.1f} s"
+                )
+            answer_cache.put(question, query_embedding, chunk_ids, answer, top_chunks)
+
+        # Stream complete: link citations [1], [2], ... to their sources
         answer_with_links = re.sub(r"\[(\d+)\]", r"[\1](#ref\1)", answer)
-        st.markdown(answer_with_links)
+        answer_box.markdown(answer_with_links)
 
         st.subheader(" Sources")
         for i, c in enumerate(top_chunks):
@@ -232,7 +255,8 @@ Answer:
             with st.expander(f"[{i+1}] {c['ref']}"):
                 st.markdown(c["text"])
         st.subheader(" Download Answer")
-        pdf_data = generate_pdf(answer, top_chunks)
+        with trace.span("generate pdf"):
+            pdf_data = generate_pdf(answer, top_chunks)
         st.download_button(
             label=" Download PDF",
             data=pdf_data,
@@ -240,6 +264,10 @@ Answer:
             mime="application/pdf"
         )
 
-
-
-       
+        # Stage timings: always logged as JSON, shown in the sidebar on request
+        trace.emit()
+        if show_timings:
+            with st.sidebar.expander("Stage timings", expanded=True):
+                st.caption(f"Total: {trace.total_seconds() * 1000:.0f} ms")
+                st.table([{"stage": span["span"], "ms": span["ms"]} for span in trace.spans])
+                st.json(trace.spans, expanded=False)
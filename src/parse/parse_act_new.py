@@ -1,4 +1,5 @@
 import json
+import hashlib
 import xml.etree.ElementTree as ET
 import re
 
@@ -50,9 +51,16 @@ for group in root.findall(".//leg:P1group", ns):
                 "Label": p2.get("id", ""),
                 "Text": text
             })
-# Add a Group ID (unique ID for each paragraph)
-for i, item in enumerate(paragraphs):
-    item["Group ID"] = f"P{i+1:4d}"
+
+
+def paragraph_id(label, text):
+    """Content-derived id: stays the same when other paragraphs are inserted or removed."""
+    return "P" + hashlib.sha1(f"{label}\n{text}".encode("utf-8")).hexdigest()[:12]
+
+
+# Add a Group ID (unique ID for each paragraph, derived from its label and text)
+for item in paragraphs:
+    item["Group ID"] = paragraph_id(item["Label"], item["Text"])
 
 # Save the structured output with refs
 output_path = "data/equality_act_paragraphs_with_refs.json"
@@ -1,73 +1,202 @@
 import os
 import json
+import time
+import argparse
+import tempfile
 import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor
 from tqdm import tqdm
 
 # === Config ===
 CASE_XML_FOLDER = "data/case_xmls"
-OUTPUT_JSON = "data/parsed_case_paragraphs.json"
+OUTPUT_JSONL = "data/parsed_case_paragraphs.jsonl"  # one paragraph per line, written as files finish
+WORKERS = int(os.getenv("PARSE_WORKERS", os.cpu_count() or 1))
+CHUNK_SIZE = 4  # files handed to a worker at a time
 
 def clean_text(text):
     if text:
         return " ".join(text.split())
     return ""
 
-def extract_paragraphs_from_xml(filepath):
-    paragraphs = []
-    try:
-        tree = ET.parse(filepath)
-        root = tree.getroot()
+# Namespace detection
+NS = {
+    'akn': 'http://docs.oasis-open.org/legaldocml/ns/akn/3.0',
+    'uk': 'https://caselaw.nationalarchives.gov.uk/akn',
+}
 
-        # Namespace detection
-        ns = {'akn': 'http://docs.oasis-open.org/legaldocml/ns/akn/3.0'}
+def _tag(prefix, name):
+    return f"{{{NS[prefix]}}}{name}"
 
-        # Find the body
-        body = root.find(".//akn:body", ns)
-        if body is None:
-            body = root.find(".//akn:judgment", ns)  # fallback for older structure
+P_TAG = _tag("akn", "p")
+BODY_TAG = _tag("akn", "body")
+JUDGMENT_TAG = _tag("akn", "judgment")
+COURT_TAG = _tag("uk", "court")
+WORK_TAG = _tag("akn", "FRBRWork")
+DATE_TAG = _tag("akn", "FRBRdate")
+
+def extract_paragraphs_from_xml(filepath):
+    """Court/date metadata and paragraph texts, streamed with iterparse.
 
-        if body is None:
-            return []
+    Paragraphs come from the first <body>, or from <judgment> when there is
+    none. Every element is cleared and detached once it has been read, so
+    memory stays flat however long the judgment is.
+    """
+    metadata = {"court": None, "date": None}
+    found = {"body": [], "judgment": []}
+    fallback = {"body": [], "judgment": []}
+    has_body = False
+    inside = {"body": 0, "judgment": 0, "p": 0}
+    done_body = done_judgment = False
+    stack = []
+    slots = []
+    try:
+        for event, elem in ET.iterparse(filepath, events=("start", "end")):
+            tag = elem.tag
+            if event == "start":
+                stack.append(elem)
+                if tag == BODY_TAG and not done_body:
+                    inside["body"] += 1
+                    has_body = True
+                elif tag == JUDGMENT_TAG and not done_judgment:
+                    inside["judgment"] += 1
+                elif tag == P_TAG:
+                    inside["p"] += 1
+                    # Reserve the slot now so nested paragraphs keep document order
+                    slots.append({scope: len(found[scope]) for scope in ("body", "judgment") if inside[scope]})
+                    for scope in slots[-1]:
+                        found[scope].append(None)
+                continue
 
-        # Find all paragraphs (like <p> or <paragraph>)
-        for para in body.findall(".//akn:p", ns):
-            para_text = clean_text("".join(para.itertext()))
-            if para_text:
-                paragraphs.append(para_text)
+            stack.pop()
+            scopes = [scope for scope in ("body", "judgment") if inside[scope]]
+            if tag == P_TAG:
+                inside["p"] -= 1
+                para_text = clean_text("".join(elem.itertext()))
+                for scope, slot in slots.pop().items():
+                    found[scope][slot] = para_text
+            if elem.text and tag.endswith("p"):
+                # Fallback: if no <p> tags, grab any text chunks
+                for scope in scopes:
+                    fallback[scope].append(clean_text(elem.text))
+            if tag == COURT_TAG and metadata["court"] is None:
+                metadata["court"] = (elem.text or "").strip()
+            elif tag == DATE_TAG and stack and stack[-1].tag == WORK_TAG and metadata["date"] is None:
+                metadata["date"] = elem.get("date", "")
+            elif tag == BODY_TAG and inside["body"]:
+                inside["body"] -= 1
+                done_body = not inside["body"]
+            elif tag == JUDGMENT_TAG and inside["judgment"]:
+                inside["judgment"] -= 1
+                done_judgment = not inside["judgment"]
 
-        if not paragraphs:
-            # Fallback: if no <p> tags, grab any text chunks
-            for elem in body.iter():
-                if elem.text and elem.tag.endswith('p'):
-                    paragraphs.append(clean_text(elem.text))
+            # An enclosing <p> still needs this element's text
+            if not inside["p"]:
+                elem.clear()
+                if stack:
+                    stack[-1].remove(elem)
 
     except Exception as e:
         print(f"⚠️ Failed to parse {filepath}: {e}")
-    
-    return paragraphs
-
-def main():
-    output = []
-    files = [f for f in os.listdir(CASE_XML_FOLDER) if f.endswith(".xml")]
-    
-    print(f"🔎 Parsing {len(files)} case XML files...")
-
-    for filename in tqdm(files):
-        filepath = os.path.join(CASE_XML_FOLDER, filename)
-        paragraphs = extract_paragraphs_from_xml(filepath)
-        
-        for idx, para in enumerate(paragraphs):
-            output.append({
-                "case_id": filename.replace(".xml", ""),
-                "paragraph_id": idx + 1,
-                "text": para
+        found = fallback = {"body": [], "judgment": []}
+
+    metadata = {key: value or "" for key, value in metadata.items()}
+    scope = "body" if has_body else "judgment"
+    paragraphs = [text for text in found[scope] if text]
+    return metadata, paragraphs or fallback[scope]
+
+def parse_case(filepath):
+    """Paragraph rows for one case XML (case_id is the file name without .xml)."""
+    case_meta, paragraphs = extract_paragraphs_from_xml(filepath)
+    case_id = os.path.basename(filepath).replace(".xml", "")
+    return [
+        {
+            "case_id": case_id,
+            "paragraph_id": idx + 1,
+            "court": case_meta["court"],
+            "date": case_meta["date"],
+            "text": para
+        }
+        for idx, para in enumerate(paragraphs)
+    ]
+
+def iter_parsed(paths, workers=WORKERS):
+    """Paragraph rows per file, in input order; workers > 1 parses on a process pool."""
+    if workers <= 1:
+        for path in paths:
+            yield parse_case(path)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        yield from pool.map(parse_case, paths, chunksize=CHUNK_SIZE)
+
+def write_paragraphs(rows, output_path=OUTPUT_JSONL):
+    """Stream rows to a JSONL file (temp file + rename); returns how many were written."""
+    directory = os.path.dirname(output_path) or "."
+    os.makedirs(directory, exist_ok=True)
+    count = 0
+    with tempfile.NamedTemporaryFile("w", dir=directory, suffix=".tmp", delete=False, encoding="utf-8") as f:
+        for row in rows:
+            f.write(json.dumps(row, ensure_ascii=False) + "\n")
+            count += 1
+    os.replace(f.name, output_path)
+    return count
+
+def iter_paragraphs(path=OUTPUT_JSONL):
+    """Read paragraph rows back one line at a time."""
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+def parse_cases(paths, output_path=OUTPUT_JSONL, workers=WORKERS, progress=False):
+    """Parse every file into `output_path`; returns (files, paragraphs)."""
+    parsed = tqdm(iter_parsed(paths, workers), total=len(paths), disable=not progress)
+    paragraphs = write_paragraphs((row for rows in parsed for row in rows), output_path)
+    return len(paths), paragraphs
+
+def benchmark(paths, worker_counts, repeat=1):
+    """Files/sec of a full parse-and-write run at each worker count."""
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        output_path = os.path.join(tmp, "paragraphs.jsonl")
+        for workers in worker_counts:
+            best = None
+            for _ in range(repeat):
+                start = time.perf_counter()
+                _, paragraphs = parse_cases(paths, output_path, workers)
+                seconds = time.perf_counter() - start
+                best = seconds if best is None else min(best, seconds)
+            results.append({
+                "workers": workers,
+                "files": len(paths),
+                "paragraphs": paragraphs,
+                "seconds": round(best, 3),
+                "files_per_s": round(len(paths) / best, 1) if best else 0.0,
             })
+    return results
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Parse case XMLs into line-delimited paragraph records.")
+    parser.add_argument("--input", default=CASE_XML_FOLDER, help="Folder of case XMLs")
+    parser.add_argument("--output", default=OUTPUT_JSONL, help="Paragraph JSONL to write")
+    parser.add_argument("--workers", type=int, default=WORKERS, help=f"Parser processes (default={WORKERS})")
+    parser.add_argument("--benchmark", action="store_true", help="Report files/sec for 1, 2, 4, ... workers instead")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    files = sorted(os.path.join(args.input, f) for f in os.listdir(args.input) if f.endswith(".xml"))
+
+    if args.benchmark:
+        counts = sorted({1, args.workers} | {2 ** i for i in range(1, 8) if 2 ** i < args.workers})
+        print(f"⏱️ Benchmarking {len(files)} case XML files with {counts} workers...")
+        for result in benchmark(files, counts):
+            print(f"  {result['workers']:>3} workers: {result['files_per_s']:>7} files/s ({result['seconds']} s)")
+        return
 
-    # Save parsed paragraphs
-    with open(OUTPUT_JSON, "w", encoding="utf-8") as f:
-        json.dump(output, f, indent=2, ensure_ascii=False)
+    print(f"🔎 Parsing {len(files)} case XML files with {args.workers} workers...")
+    _, paragraphs = parse_cases(files, args.output, args.workers, progress=True)
 
-    print(f"\n✅ Parsed {len(output)} paragraphs and saved to {OUTPUT_JSON}")
+    print(f"\n✅ Parsed {paragraphs} paragraphs and saved to {args.output}")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,115 @@
+import os
+import sys
+import json
+import time
+import uuid
+import logging
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+TRACE_LOG_PATH = os.getenv("TRACE_LOG_PATH", "data/trace.jsonl")  # "" disables the JSON log
+
+trace_logger = logging.getLogger("legal_rag.trace")
+
+
+def configure_trace_log(path=TRACE_LOG_PATH):
+    """Send one JSON line per traced request to `path` (idempotent; no-op for an empty path)."""
+    if not path or any(getattr(h, "trace_path", None) == path for h in trace_logger.handlers):
+        return
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    handler = logging.FileHandler(path, encoding="utf-8")
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    handler.trace_path = path
+    trace_logger.addHandler(handler)
+    trace_logger.setLevel(logging.INFO)
+    trace_logger.propagate = False
+
+
+def approx_tokens(text):
+    """Rough token count (~4 characters per token) for when the LLM does not report one."""
+    return max(1, len(text) // 4) if text else 0
+
+
+class Trace:
+    """Spans (name, duration, attributes) for one request.
+
+    A span costs two perf_counter() calls and a dict, so tracing can stay on
+    in production; `emit()` writes the whole request as one JSON log line.
+    """
+
+    def __init__(self, name, start=None):
+        self.name = name
+        self.trace_id = uuid.uuid4().hex[:12]
+        self.start = time.perf_counter() if start is None else start
+        self.spans = []
+
+    @contextmanager
+    def span(self, name, **attrs):
+        """Time a block; attributes can be added to the yielded dict while it runs."""
+        record = {"span": name, **attrs}
+        began = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record["ms"] = round((time.perf_counter() - began) * 1000, 2)
+            self.spans.append(record)
+
+    def add(self, name, seconds, **attrs):
+        """Record a duration measured elsewhere (e.g. time to first token)."""
+        self.spans.append({"span": name, "ms": round(seconds * 1000, 2), **attrs})
+
+    def total_seconds(self):
+        return time.perf_counter() - self.start
+
+    def to_dict(self):
+        return {
+            "trace": self.name,
+            "trace_id": self.trace_id,
+            "recorded_at": datetime.now(timezone.utc).isoformat(),
+            "total_ms": round(self.total_seconds() * 1000, 2),
+            "spans": self.spans,
+        }
+
+    def emit(self):
+        if trace_logger.isEnabledFor(logging.INFO):
+            trace_logger.info(json.dumps(self.to_dict(), ensure_ascii=False, default=str))
+
+
+class StartupProfile(Trace):
+    """Wall-clock time of each startup stage (imports, model load, index load, ...).
+
+    `start` should be taken as early as possible in the script so `total`
+    covers everything after interpreter startup.
+    """
+
+    stage = Trace.span
+
+    @property
+    def stages(self):
+        return [(span["span"], span["ms"] / 1000) for span in self.spans]
+
+    def report(self):
+        return {
+            "script": self.name,
+            "recorded_at": datetime.now(timezone.utc).isoformat(),
+            "python": sys.version.split()[0],
+            "stages": {name: round(seconds, 4) for name, seconds in self.stages},
+            "total_seconds": round(self.total_seconds(), 4),
+        }
+
+    def print_report(self, out=sys.stderr):
+        report = self.report()
+        print("\n⏱️ Startup profile:", file=out)
+        for name, seconds in report["stages"].items():
+            print(f"   {name:<24} {seconds * 1000:8.1f} ms", file=out)
+        print(f"   {'total':<24} {report['total_seconds'] * 1000:8.1f} ms", file=out)
+        return report
+
+    def append_to(self, path):
+        """Append this run to a JSON-lines history so cold-start time can be tracked."""
+        report = self.report()
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(report) + "\n")
+        return report
@@ -1,43 +1,64 @@
-from neo4j import GraphDatabase
-from dotenv import load_dotenv
 import os
+import re
+import sys
 
-load_dotenv()
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from src.graph_store import get_graph_store
 
-NEO4J_URI = os.getenv("NEO4J_URI")
-NEO4J_USER = os.getenv("NEO4J_USER")
-NEO4J_PASSWORD = os.getenv("NEO4J_PASSWORD")
+# Shared with the Streamlit pages: one tuned connection pool and one TTL result cache
+graph = get_graph_store()
 
+PAGE_SIZE = 10
+FULLTEXT_INDEX = "paragraph_text"  # created by import_to_neo4j.py
+LUCENE_SPECIAL = re.compile(r'([+\-&|!(){}\[\]^"~*?:\\/])')
 
-driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASSWORD))
 
-def find_paragraphs_by_keyword(keyword):
-    with driver.session() as session:
-        result = session.run("""
-        MATCH (pg:Paragraph)
-        WHERE toLower(pg.text) CONTAINS toLower($kw)
-        RETURN pg.label AS label, pg.group_id AS group_id, substring(pg.text, 0, 300) AS preview
-        ORDER BY pg.group_id
-        LIMIT 10
-        """, kw=keyword)
-        return result.data()
+def fulltext_query(keyword):
+    """Lucene query matching every word of `keyword`, with the last word as a prefix (search as you type)."""
+    words = [LUCENE_SPECIAL.sub(r"\\\1", word) for word in keyword.lower().split()]
+    if not words:
+        return ""
+    words[-1] += "*"
+    return " AND ".join(words)
+
+
+def search_paragraphs(keyword, skip=0, limit=PAGE_SIZE):
+    """One page of paragraphs ranked by full-text relevance.
+
+    Returns (rows, next_skip); next_skip is None on the last page.
+    """
+    query = fulltext_query(keyword)
+    if not query:
+        return [], None
+    rows = graph.query("""
+        CALL db.index.fulltext.queryNodes($index, $query) YIELD node AS pg, score
+        OPTIONAL MATCH (s:Section)-[:CONTAINS]->(pg)
+        RETURN s.name AS section, pg.label AS label, pg.group_id AS group_id, pg.text AS text,
+               substring(pg.text, 0, 300) AS preview, score
+        ORDER BY score DESC, pg.group_id
+        SKIP $skip
+        LIMIT $limit
+        """, index=FULLTEXT_INDEX, query=query, skip=skip, limit=limit + 1)
+    next_skip = skip + limit if len(rows) > limit else None
+    return rows[:limit], next_skip
+
+
+def find_paragraphs_by_keyword(keyword, skip=0, limit=PAGE_SIZE):
+    rows, _ = search_paragraphs(keyword, skip=skip, limit=limit)
+    return [{"label": r["label"], "group_id": r["group_id"], "preview": r["preview"]} for r in rows]
 
 def find_paragraphs_in_section(section_label):
-    with driver.session() as session:
-        result = session.run("""
-        MATCH (s:Section {name: $section_label})-[:CONTAINS]->(pg:Paragraph)
-        RETURN pg.label AS label, substring(pg.text, 0, 300) AS preview
-        """, section_label=section_label)
-        return result.data()
+    return graph.query("""
+    MATCH (s:Section {name: $section_label})-[:CONTAINS]->(pg:Paragraph)
+    RETURN pg.label AS label, substring(pg.text, 0, 300) AS preview
+    """, section_label=section_label)
 
 def get_paragraph_full_chain(label):
-    with driver.session() as session:
-        result = session.run("""
-        MATCH (p:Part)-[:CONTAINS]->(c:Chapter)-[:CONTAINS]->(s:Section)-[:CONTAINS]->(pg:Paragraph {label: $label})
-        RETURN p.name AS part, c.name AS chapter, s.name AS section, pg.text AS paragraph
-        LIMIT 1
-        """, label=label)
-        return result.single()
+    return graph.query_single("""
+    MATCH (p:Part)-[:CONTAINS]->(c:Chapter)-[:CONTAINS]->(s:Section)-[:CONTAINS]->(pg:Paragraph {label: $label})
+    RETURN p.name AS part, c.name AS chapter, s.name AS section, pg.text AS paragraph
+    LIMIT 1
+    """, label=label)
 
 # === Example Usage ===
 if __name__ == "__main__":
@@ -49,3 +70,5 @@ if __name__ == "__main__":
     result = get_paragraph_full_chain("section-6")
     if result:
         print(f"Part: {result['part']}\nChapter: {result['chapter']}\nSection: {result['section']}\nText: {result['paragraph'][:300]}")
+
+    print(f"\n📊 Graph store: {graph.stats()}")
@@ -0,0 +1,129 @@
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+
+import numpy as np
+
+from src.retrieval.vector_store import normalize
+
+
+def manifest_fingerprint(manifest):
+    """Changes whenever the index is rebuilt, which invalidates every cached answer."""
+    return hashlib.sha1(json.dumps(manifest, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class AnswerCache:
+    """Persistent answers keyed on the question embedding.
+
+    A lookup hits when a cached question is at least `threshold` cosine-similar
+    to the new one *and* retrieval returned the same chunk ids, so the reranker
+    and the LLM can be skipped entirely.
+    """
+
+    def __init__(self, path, fingerprint, threshold=0.95, ttl_seconds=7 * 24 * 3600, max_entries=5000):
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS answers (
+                id INTEGER PRIMARY KEY,
+                question TEXT,
+                embedding BLOB,
+                chunk_ids TEXT,
+                answer TEXT,
+                sources TEXT,
+                created_at REAL,
+                last_used REAL
+            );
+            CREATE TABLE IF NOT EXISTS cache_meta (key TEXT PRIMARY KEY, value TEXT);
+        """)
+
+        stored = self._db.execute("SELECT value FROM cache_meta WHERE key = 'fingerprint'").fetchone()
+        if stored is None or stored[0] != fingerprint:
+            self._db.execute("DELETE FROM answers")
+            self._db.execute("INSERT OR REPLACE INTO cache_meta VALUES ('fingerprint', ?)", (fingerprint,))
+        self._db.commit()
+        self._load_matrix()
+
+    def _load_matrix(self):
+        rows = self._db.execute("SELECT id, embedding, chunk_ids FROM answers").fetchall()
+        self._ids = [row[0] for row in rows]
+        self._chunk_ids = [row[2] for row in rows]
+        if rows:
+            self._matrix = np.vstack([np.frombuffer(row[1], dtype=np.float32) for row in rows])
+        else:
+            self._matrix = None
+
+    @staticmethod
+    def _chunk_key(chunk_ids):
+        return json.dumps(sorted(int(i) for i in chunk_ids))
+
+    def _expire(self):
+        cutoff = time.time() - self.ttl_seconds
+        deleted = self._db.execute("DELETE FROM answers WHERE created_at < ?", (cutoff,)).rowcount
+        count = self._db.execute("SELECT COUNT(*) FROM answers").fetchone()[0]
+        if count > self.max_entries:
+            deleted += self._db.execute(
+                "DELETE FROM answers WHERE id IN (SELECT id FROM answers ORDER BY last_used LIMIT ?)",
+                (count - self.max_entries,),
+            ).rowcount
+        self._db.commit()
+        if deleted:
+            self._load_matrix()
+
+    def lookup(self, query_embedding, chunk_ids):
+        """Cached answer and sources, or None."""
+        with self._lock:
+            self._expire()
+            if self._matrix is None:
+                self.misses += 1
+                return None
+
+            similarities = self._matrix @ normalize(query_embedding)[0]
+            chunk_key = self._chunk_key(chunk_ids)
+            for position in np.argsort(-similarities):
+                if similarities[position] < self.threshold:
+                    break
+                if self._chunk_ids[position] != chunk_key:
+                    continue
+                entry_id = self._ids[position]
+                self._db.execute("UPDATE answers SET last_used = ? WHERE id = ?", (time.time(), entry_id))
+                self._db.commit()
+                question, answer, sources = self._db.execute(
+                    "SELECT question, answer, sources FROM answers WHERE id = ?", (entry_id,)
+                ).fetchone()
+                self.hits += 1
+                return {
+                    "question": question,
+                    "answer": answer,
+                    "sources": json.loads(sources),
+                    "similarity": float(similarities[position]),
+                }
+            self.misses += 1
+            return None
+
+    def put(self, question, query_embedding, chunk_ids, answer, sources):
+        sources = [{"ref": s["ref"], "text": s["text"]} for s in sources]
+        vector = normalize(query_embedding)
+        chunk_key = self._chunk_key(chunk_ids)
+        now = time.time()
+        with self._lock:
+            cursor = self._db.execute(
+                "INSERT INTO answers (question, embedding, chunk_ids, answer, sources, created_at, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (question, vector[0].tobytes(), chunk_key, answer, json.dumps(sources, ensure_ascii=False), now, now),
+            )
+            self._db.commit()
+            self._ids.append(cursor.lastrowid)
+            self._chunk_ids.append(chunk_key)
+            self._matrix = vector if self._matrix is None else np.vstack([self._matrix, vector])
+            self._expire()
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self._ids)}
@@ -0,0 +1,115 @@
+import re
+from collections import Counter
+
+import numpy as np
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text):
+    """Lowercase word and number tokens plus adjacent-word bigrams.
+
+    Bigrams let exact statutory phrases ("reasonable adjustments",
+    "section 20") outscore documents that merely contain both words.
+    """
+    words = TOKEN_PATTERN.findall(text.lower())
+    return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+
+class BM25Index:
+    """Inverted index stored as flat numpy arrays (CSR layout: one postings slice per term)."""
+
+    def __init__(self, terms, offsets, doc_ids, tfs, doc_len, k1=1.5, b=0.75):
+        self.terms = {term: i for i, term in enumerate(terms)}
+        self.offsets = offsets
+        self.doc_ids = doc_ids
+        self.tfs = tfs
+        self.doc_len = doc_len
+        self.k1 = k1
+        self.b = b
+        self.n_docs = len(doc_len)
+        self.avgdl = float(doc_len.mean()) if self.n_docs else 0.0
+
+    @classmethod
+    def build(cls, texts, k1=1.5, b=0.75):
+        postings = {}
+        doc_len = np.zeros(len(texts), dtype=np.int32)
+        for doc_id, text in enumerate(texts):
+            counts = Counter(tokenize(text))
+            doc_len[doc_id] = sum(counts.values())
+            for term, tf in counts.items():
+                postings.setdefault(term, []).append((doc_id, tf))
+
+        terms = sorted(postings)
+        offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+        doc_ids = []
+        tfs = []
+        for i, term in enumerate(terms):
+            entries = postings[term]
+            offsets[i + 1] = offsets[i] + len(entries)
+            doc_ids.extend(doc_id for doc_id, _ in entries)
+            tfs.extend(min(tf, 65535) for _, tf in entries)
+        return cls(
+            terms,
+            offsets,
+            np.asarray(doc_ids, dtype=np.int32),
+            np.asarray(tfs, dtype=np.uint16),
+            doc_len,
+            k1,
+            b,
+        )
+
+    def save(self, path):
+        terms = sorted(self.terms, key=self.terms.get)
+        np.savez_compressed(
+            path,
+            terms=np.asarray(terms),
+            offsets=self.offsets,
+            doc_ids=self.doc_ids,
+            tfs=self.tfs,
+            doc_len=self.doc_len,
+            params=np.asarray([self.k1, self.b]),
+        )
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            k1, b = data["params"]
+            return cls(data["terms"].tolist(), data["offsets"], data["doc_ids"], data["tfs"], data["doc_len"], k1, b)
+
+    def scores(self, query):
+        scores = np.zeros(self.n_docs, dtype=np.float32)
+        norm = self.k1 * (1 - self.b + self.b * self.doc_len / max(self.avgdl, 1e-9))
+        for term in set(tokenize(query)):
+            term_id = self.terms.get(term)
+            if term_id is None:
+                continue
+            start, end = self.offsets[term_id], self.offsets[term_id + 1]
+            ids = self.doc_ids[start:end]
+            tf = self.tfs[start:end].astype(np.float32)
+            df = end - start
+            idf = np.log(1 + (self.n_docs - df + 0.5) / (df + 0.5))
+            scores[ids] += idf * tf * (self.k1 + 1) / (tf + norm[ids])
+        return scores
+
+    def search(self, query, k, allowed=None):
+        """Top-k (doc ids, scores) with a positive score, optionally restricted by a boolean mask."""
+        scores = self.scores(query)
+        if allowed is not None:
+            scores[~allowed] = 0.0
+        k = min(k, self.n_docs)
+        if k == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        top = top[scores[top] > 0]
+        return top.astype(np.int64), scores[top]
+
+
+def reciprocal_rank_fusion(rankings, k=60):
+    """Fuse several ranked id lists: score(d) = sum over lists of 1 / (k + rank)."""
+    fused = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            fused[int(doc_id)] = fused.get(int(doc_id), 0.0) + 1.0 / (k + rank)
+    return sorted(fused.items(), key=lambda item: item[1], reverse=True)
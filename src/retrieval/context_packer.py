@@ -0,0 +1,95 @@
+import re
+
+from src.profiling import approx_tokens
+
+# Statute labels from parse_act_new.py: "section-6" (P1) contains "section-6-1" (P2)
+STATUTE_LABEL = re.compile(r"^[a-z]+(-[0-9a-z]+)+$")
+
+
+def _label(chunk):
+    return chunk["ref"].rsplit(" - ", 1)[-1]
+
+
+def _title(chunk):
+    return chunk["ref"].rsplit(" - ", 1)[0]
+
+
+def contains(parent, child):
+    """True if `parent` already holds all of `child`'s text (P1 around its P2, or a duplicate)."""
+    if parent is child:
+        return False
+    parent_label, child_label = _label(parent), _label(child)
+    if (
+        _title(parent) == _title(child)
+        and STATUTE_LABEL.match(parent_label)
+        and child_label.startswith(parent_label + "-")
+    ):
+        return True
+    return " ".join(child["text"].split()) in " ".join(parent["text"].split())
+
+
+def collapse_overlaps(chunks):
+    """Drop chunks whose text another retrieved chunk already contains.
+
+    A parent takes the rank of its best-ranked child, so the collapsed list
+    keeps the reranker's order. Each kept chunk remembers the children it
+    absorbed in `covers` (most relevant first).
+    """
+    kept = []
+    for chunk in chunks:
+        parent = next((entry for entry in kept if contains(entry["chunk"], chunk)), None)
+        if parent is not None:
+            parent["covers"].append(chunk)
+            continue
+        # Parent of chunks already kept: take over the best slot among them
+        absorbed = [entry for entry in kept if contains(chunk, entry["chunk"])]
+        if absorbed:
+            slot = kept.index(absorbed[0])
+            covers = [c for entry in absorbed for c in [entry["chunk"]] + entry["covers"]]
+            kept = [entry for entry in kept if entry not in absorbed]
+            kept.insert(slot, {"chunk": chunk, "covers": covers})
+        else:
+            kept.append({"chunk": chunk, "covers": []})
+    return kept
+
+
+def _truncate(chunk, budget, count_tokens):
+    words = chunk["text"].split()
+    while words and count_tokens(" ".join(words)) > budget:
+        words = words[: int(len(words) * 0.9)]
+    return dict(chunk, text=" ".join(words) + " …")
+
+
+def pack_context(chunks, token_budget=1500, max_chunks=None, count_tokens=approx_tokens):
+    """Pick prompt chunks in relevance order without repeated statute text, within `token_budget`.
+
+    When a parent section does not fit, every retrieved subsection that does
+    takes its place, in rank order; if nothing fits, the best chunk is
+    truncated so the prompt is never empty.
+    """
+    packed = []
+    used = 0
+    full = lambda: max_chunks is not None and len(packed) >= max_chunks
+    for entry in collapse_overlaps(chunks):
+        if full():
+            break
+        cost = count_tokens(entry["chunk"]["text"])
+        if used + cost <= token_budget:
+            packed.append(entry["chunk"])
+            used += cost
+            continue
+        subsections = []
+        for option in entry["covers"]:
+            if full():
+                break
+            # A subsection and its own retrieved sub-paragraph would repeat text
+            if any(contains(option, c) or contains(c, option) for c in subsections):
+                continue
+            cost = count_tokens(option["text"])
+            if used + cost <= token_budget:
+                subsections.append(option)
+                packed.append(option)
+                used += cost
+    if not packed and chunks:
+        packed.append(_truncate(chunks[0], token_budget, count_tokens))
+    return packed
@@ -0,0 +1,254 @@
+import os
+import re
+import json
+from datetime import datetime, timezone
+
+import faiss
+import numpy as np
+
+from src.retrieval.vector_store import save_embeddings, load_embeddings, get_vectors, cosine_scores
+from src.retrieval.index_builder import build_index, write_manifest, load_index, search_index
+from src.retrieval.bm25 import BM25Index, reciprocal_rank_fusion
+from src.retrieval.metadata_store import write_metadata_store, open_metadata
+from src.retrieval.embedding_cache import content_ids
+
+KEEP_VERSIONS = 2  # the new build plus the one a running app may still have open
+
+# One row per indexed paragraph, aligned with FAISS positions.
+ATTRIBUTE_DTYPE = np.dtype([
+    ("doc_id", np.int64),   # stable paragraph id from source + ref + text (the id map: position -> id)
+    ("source", np.uint8),   # index into manifest["sources"]
+    ("court", np.uint16),   # index into manifest["courts"], 0 = none
+    ("date", np.int32),     # YYYYMMDD, 0 = unknown
+])
+
+
+def format_ref(corpus, item):
+    name = str(item.get(corpus["ref_key"]) or "Unknown")
+    if corpus.get("pretty_titles"):
+        name = name.replace("_", " ").replace(",", ", ")
+    return f"{corpus['title']} - {name}"
+
+
+def _date_to_int(value):
+    digits = (value or "")[:10].replace("-", "")
+    return int(digits) if len(digits) == 8 and digits.isdigit() else 0
+
+
+def load_records(path):
+    """Items of a JSON array file, or of a line-delimited .jsonl file."""
+    with open(path, "r", encoding="utf-8") as f:
+        if path.endswith(".jsonl"):
+            return [json.loads(line) for line in f if line.strip()]
+        return json.load(f)
+
+
+def load_corpus_rows(corpora):
+    """Flatten every configured corpus into uniform metadata rows."""
+    rows = []
+    for corpus in corpora:
+        for item in load_records(corpus["path"]):
+            rows.append({
+                "source": corpus["source"],
+                "ref": format_ref(corpus, item),
+                "text": item[corpus["text_key"]],
+                "court": item.get("court", ""),
+                "date": item.get("date", ""),
+            })
+    return rows
+
+
+def build_attributes(rows, sources):
+    """Compact source/court/date table plus the court vocabulary it refers to."""
+    courts = [""] + sorted({row["court"] for row in rows if row["court"]})
+    court_codes = {court: i for i, court in enumerate(courts)}
+    source_codes = {source: i for i, source in enumerate(sources)}
+    # Content-derived ids: inserting a paragraph does not renumber the ones after it
+    local_ids = content_ids(f"{row['source']}\n{row['ref']}\n{row['text']}" for row in rows)
+
+    attributes = np.zeros(len(rows), dtype=ATTRIBUTE_DTYPE)
+    for position, row in enumerate(rows):
+        code = source_codes[row["source"]]
+        attributes[position] = (
+            (code << 40) | local_ids[position],
+            code,
+            court_codes[row["court"]],
+            _date_to_int(row["date"]),
+        )
+    return attributes, courts
+
+
+def _versioned(path, version):
+    stem, ext = os.path.splitext(path)
+    return f"{stem}.{version}{ext}"
+
+
+def versioned_paths(paths, version):
+    """Per-build file names for everything but the manifest, which always points at the current build."""
+    return {key: path if key == "manifest" else _versioned(path, version) for key, path in paths.items()}
+
+
+def prune_versions(paths, keep=KEEP_VERSIONS):
+    """Delete the files of all but the newest `keep` builds; returns the versions removed."""
+    found = {}
+    for key, path in paths.items():
+        if key == "manifest":
+            continue
+        directory = os.path.dirname(path) or "."
+        stem, ext = os.path.splitext(os.path.basename(path))
+        pattern = re.compile(re.escape(stem) + r"\.(\d{8}T\d{12})" + re.escape(ext) + "$")
+        for name in os.listdir(directory):
+            match = pattern.match(name)
+            if match:
+                found.setdefault(match.group(1), []).append(os.path.join(directory, name))
+    stale = sorted(found)[:-keep] if keep else sorted(found)
+    for version in stale:
+        for path in found[version]:
+            os.remove(path)
+    return stale
+
+
+def write_corpus(rows, embeddings, config, paths, sources, model_name, version=None):
+    """Write the combined index, BM25 index, embedding store, attribute table, metadata and manifest.
+
+    Every build goes to new versioned files and the manifest is swapped in
+    last, so an app still reading the previous build never sees a half-written
+    or truncated file; it picks up the new build when the manifest changes.
+    """
+    version = version or datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%f")
+    files = versioned_paths(paths, version)
+    attributes, courts = build_attributes(rows, sources)
+    for row, doc_id in zip(rows, attributes["doc_id"]):
+        row["id"] = int(doc_id)
+
+    index = build_index(embeddings, config)
+    faiss.write_index(index, files["index"])
+    save_embeddings(embeddings, files["embeddings"])
+    np.save(files["attributes"], attributes)
+    BM25Index.build([row["text"] for row in rows]).save(files["bm25"])
+    write_metadata_store(rows, files["metadata"], text_key="text")
+
+    manifest = write_manifest(
+        paths["manifest"], index, config,
+        index_path=files["index"],
+        metadata_path=files["metadata"],
+        embeddings_path=files["embeddings"],
+        attributes_path=files["attributes"],
+        bm25_path=files["bm25"],
+        sources=list(sources),
+        courts=courts,
+        model=model_name,
+        version=version,
+    )
+    prune_versions(paths)
+    return index, manifest
+
+
+class Corpus:
+    """Every source in one FAISS index (plus a BM25 index over the same rows), filterable by source."""
+
+    def __init__(self, manifest_path):
+        if not os.path.exists(manifest_path):
+            raise FileNotFoundError(f"No corpus manifest found at {manifest_path}")
+        self.index, self.manifest = load_index(None, manifest_path)
+        self.sources = self.manifest["sources"]
+        self.courts = self.manifest["courts"]
+        self.attributes = np.load(self.manifest["attributes_path"])
+        self.embeddings = load_embeddings(self.manifest["embeddings_path"], self.index)
+        self.metadata = open_metadata(self.manifest["metadata_path"])
+        bm25_path = self.manifest.get("bm25_path")
+        self.bm25 = BM25Index.load(bm25_path) if bm25_path and os.path.exists(bm25_path) else None
+        self._selectors = {}
+
+    def positions_for(self, sources):
+        codes = [self.sources.index(source) for source in sources]
+        return np.flatnonzero(np.isin(self.attributes["source"], codes)).astype(np.int64)
+
+    def _search_params(self, sources):
+        key = tuple(sorted(sources))
+        if key not in self._selectors:
+            selector = faiss.IDSelectorBatch(self.positions_for(sources))
+            ivf = faiss.try_extract_index_ivf(self.index)
+            if ivf is not None:
+                params = faiss.SearchParametersIVF(sel=selector, nprobe=ivf.nprobe)
+            else:
+                params = faiss.SearchParameters(sel=selector)
+            self._selectors[key] = (selector, params)
+        return self._selectors[key][1]
+
+    def dense_search(self, query_embedding, k, sources=None):
+        """FAISS top-k positions and scores across all sources, or only the given ones."""
+        if not sources or set(sources) >= set(self.sources):
+            return search_index(self.index, query_embedding, k, self.manifest, self.embeddings)
+        if self.manifest["index_type"] == "hnsw":
+            # HNSW graph walks do not honour selectors reliably: over-fetch and filter instead,
+            # widening the fetch until k allowed results come back. Once the sources have no more
+            # rows than the fetch, scoring those rows exactly is cheaper (and the graph walk may
+            # never reach some of them), so a rare source always gets its k results.
+            positions = self.positions_for(sources)
+            allowed = set(positions.tolist())
+            fetch = k * 4
+            while len(positions) > fetch:
+                ids, scores = search_index(self.index, query_embedding, fetch, self.manifest, self.embeddings)
+                keep = [i for i, idx in enumerate(ids) if idx in allowed][:k]
+                if len(keep) == k:
+                    return ids[keep], scores[keep]
+                fetch *= 4
+            scores = cosine_scores(query_embedding, get_vectors(self.embeddings, positions))
+            order = np.argsort(-scores, kind="stable")[:k]
+            return positions[order], scores[order]
+        return search_index(
+            self.index, query_embedding, k, self.manifest, self.embeddings,
+            params=self._search_params(sources),
+        )
+
+    def sparse_search(self, question, k, sources=None):
+        """BM25 top-k positions and scores for the question's exact wording."""
+        allowed = None
+        if sources and not set(sources) >= set(self.sources):
+            allowed = np.zeros(len(self.attributes), dtype=bool)
+            allowed[self.positions_for(sources)] = True
+        return self.bm25.search(question, k, allowed)
+
+    def search(self, query_embedding, k, sources=None, question=None):
+        """Top-k paragraphs across all sources, or only the given ones.
+
+        With a question and a BM25 index, dense and keyword rankings are
+        fused with reciprocal rank fusion; `score` stays the cosine similarity.
+        """
+        ids, scores = self.dense_search(query_embedding, k, sources)
+        if not question or self.bm25 is None:
+            return self.candidates(ids, scores)
+
+        sparse_ids, _ = self.sparse_search(question, k, sources)
+        fused = reciprocal_rank_fusion([ids, sparse_ids])[:k]
+        dense_scores = {int(idx): float(score) for idx, score in zip(ids, scores)}
+        keyword_only = [idx for idx, _ in fused if idx not in dense_scores]
+        if keyword_only:
+            vectors = get_vectors(self.embeddings, keyword_only)
+            dense_scores.update(zip(keyword_only, cosine_scores(query_embedding, vectors).tolist()))
+        return self.candidates([idx for idx, _ in fused], [dense_scores[idx] for idx, _ in fused])
+
+    def candidates(self, positions, scores):
+        """Candidate dicts for FAISS positions, fetching only those metadata rows."""
+        positions = [int(position) for position in positions]
+        if isinstance(self.metadata, list):
+            rows = [self.metadata[position] for position in positions]
+        else:
+            rows = self.metadata.get_many(positions)
+        return [
+            {
+                "id": row["id"],
+                "position": position,
+                "source": row["source"],
+                "ref": row["ref"],
+                "text": row["text"],
+                "court": row["court"],
+                "date": row["date"],
+                "score": float(score),
+            }
+            for position, row, score in zip(positions, rows, scores)
+        ]
+
+    def candidate(self, position, score):
+        return self.candidates([position], [score])[0]
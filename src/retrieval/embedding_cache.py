@@ -0,0 +1,116 @@
+import os
+import json
+import sqlite3
+import hashlib
+
+import numpy as np
+
+
+def text_hash(text):
+    """Content key of a paragraph: SHA-1 of its whitespace-normalised text."""
+    return hashlib.sha1(" ".join(text.split()).encode("utf-8")).hexdigest()
+
+
+def content_ids(keys, bits=40):
+    """Stable integer ids derived from each key (e.g. ref + text), independent of row order.
+
+    Identical keys get an occurrence suffix so every row still has its own id;
+    ids only change for paragraphs whose reference or text changed.
+    """
+    seen = {}
+    ids = []
+    for key in keys:
+        occurrence = seen.get(key, 0)
+        seen[key] = occurrence + 1
+        digest = hashlib.sha1(f"{key}\n{occurrence}".encode("utf-8")).hexdigest()
+        ids.append(int(digest, 16) & ((1 << bits) - 1))
+    return ids
+
+
+class EmbeddingCache:
+    """Persistent paragraph vectors keyed by (model, text hash).
+
+    A rebuild only sends new or edited paragraphs to the model; unchanged
+    ones are read back from SQLite, whatever their position in the corpus.
+    """
+
+    def __init__(self, path, model_name):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.model_name = model_name
+        self._db = sqlite3.connect(path)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "model TEXT, text_hash TEXT, vector BLOB, PRIMARY KEY (model, text_hash))"
+        )
+        self._db.commit()
+        self.last_stats = {}
+
+    def lookup(self, hashes, chunk_size=500):
+        """{text hash: vector} for the hashes already embedded with this model."""
+        found = {}
+        unique = list(dict.fromkeys(hashes))
+        for i in range(0, len(unique), chunk_size):
+            chunk = unique[i:i + chunk_size]
+            placeholders = ",".join("?" * len(chunk))
+            for key, blob in self._db.execute(
+                f"SELECT text_hash, vector FROM embeddings WHERE model = ? AND text_hash IN ({placeholders})",
+                [self.model_name] + chunk,
+            ):
+                found[key] = np.frombuffer(blob, dtype=np.float32)
+        return found
+
+    def store(self, hashes, vectors):
+        self._db.executemany(
+            "INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?)",
+            [(self.model_name, key, np.asarray(vector, dtype=np.float32).tobytes()) for key, vector in zip(hashes, vectors)],
+        )
+        self._db.commit()
+
+    def encode(self, texts, load_model, **kwargs):
+        """Embedding matrix for `texts` (raw model output), encoding only uncached texts.
+
+        `load_model` is only called when something needs encoding.
+        """
+        hashes = [text_hash(text) for text in texts]
+        vectors = self.lookup(hashes)
+        missing = [key for key in dict.fromkeys(hashes) if key not in vectors]
+        encoded_keys = set(missing)
+        if missing:
+            first_text = {}
+            for key, text in zip(hashes, texts):
+                first_text.setdefault(key, text)
+            encoded = load_model().encode([first_text[key] for key in missing], convert_to_numpy=True, **kwargs)
+            self.store(missing, encoded)
+            vectors.update(zip(missing, np.asarray(encoded, dtype=np.float32)))
+        self.last_stats = {
+            "texts": len(texts),
+            "reused": sum(1 for key in hashes if key not in encoded_keys),
+            "encoded": len(missing),
+        }
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+        return np.vstack([vectors[key] for key in hashes])
+
+    def close(self):
+        self._db.close()
+
+
+def compare_builds(previous_hashes, hashes):
+    """How many paragraphs were added, removed or kept since the previous build."""
+    previous, current = set(previous_hashes), set(hashes)
+    return {"added": len(current - previous), "removed": len(previous - current), "kept": len(current & previous)}
+
+
+def load_hashes(path):
+    if not path or not os.path.exists(path):
+        return []
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_hashes(path, hashes):
+    """Text hash of every indexed row, in index order (compared on the next build)."""
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(hashes, f)
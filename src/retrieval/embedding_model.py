@@ -0,0 +1,18 @@
+import os
+
+
+def load_sentence_transformer(model_name, snapshot_dir=None):
+    """Load the embedding model from a local snapshot, saving one on first use.
+
+    Loading from a local directory skips the Hugging Face hub lookups that
+    dominate a cold CLI start. sentence_transformers (and torch) are only
+    imported here, so callers that never miss the query cache never pay for them.
+    """
+    from sentence_transformers import SentenceTransformer
+
+    if snapshot_dir and os.path.isdir(snapshot_dir):
+        return SentenceTransformer(snapshot_dir)
+    model = SentenceTransformer(model_name)
+    if snapshot_dir:
+        model.save(snapshot_dir)
+    return model
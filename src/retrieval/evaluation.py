@@ -0,0 +1,114 @@
+import json
+import math
+import time
+
+import numpy as np
+
+
+def load_benchmark(path):
+    """Labelled questions from JSONL: {"question": ..., "expected": [ref, ...], "sources": [...] (optional)}."""
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def matches(ref, expected_ref):
+    """A retrieved ref counts for an expected one if it is that provision or one of its subsections."""
+    return ref == expected_ref or ref.startswith(expected_ref + "-")
+
+
+def _first_matches(retrieved_refs, expected_refs):
+    """Rank (0-based) of the first hit for each expected ref; later hits on the same ref earn nothing."""
+    hits = {}
+    for rank, ref in enumerate(retrieved_refs):
+        for expected in expected_refs:
+            if expected not in hits and matches(ref, expected):
+                hits[expected] = rank
+                break
+    return hits
+
+
+def recall_at_k(retrieved_refs, expected_refs, k):
+    if not expected_refs:
+        return 0.0
+    return len(_first_matches(retrieved_refs[:k], expected_refs)) / len(expected_refs)
+
+
+def reciprocal_rank(retrieved_refs, expected_refs):
+    hits = _first_matches(retrieved_refs, expected_refs)
+    return 1.0 / (min(hits.values()) + 1) if hits else 0.0
+
+
+def ndcg_at_k(retrieved_refs, expected_refs, k):
+    """Binary-gain nDCG@k, with one gain per expected ref."""
+    hits = _first_matches(retrieved_refs[:k], expected_refs)
+    dcg = sum(1.0 / math.log2(rank + 2) for rank in hits.values())
+    ideal = sum(1.0 / math.log2(rank + 2) for rank in range(min(len(expected_refs), k)))
+    return dcg / ideal if ideal else 0.0
+
+
+def latency_summary(seconds):
+    values = np.asarray(seconds, dtype=np.float64) * 1000
+    if values.size == 0:
+        return {}
+    return {
+        "p50_ms": round(float(np.percentile(values, 50)), 2),
+        "p95_ms": round(float(np.percentile(values, 95)), 2),
+        "p99_ms": round(float(np.percentile(values, 99)), 2),
+        "mean_ms": round(float(values.mean()), 2),
+    }
+
+
+def run_benchmark(questions, model, corpus, reranker, k, final_k, answer=None, hybrid=True):
+    """Retrieval quality and per-stage latency for one configuration.
+
+    `answer(question, chunks)` is called for the generation stage (a stub in
+    CI-style runs); quality is measured on the first-stage (k) and final
+    (final_k, after reranking) lists.
+    """
+    stages = {"encode": [], "search": [], "rerank": [], "generate": []}
+    scores = {f"recall@{k}": [], f"recall@{final_k}": [], "mrr": [], f"ndcg@{final_k}": []}
+    per_question = []
+
+    for item in questions:
+        question, expected = item["question"], item["expected"]
+
+        start = time.perf_counter()
+        query_embedding = model.encode([question])[0]
+        stages["encode"].append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        candidates = corpus.search(query_embedding, k, sources=item.get("sources"), question=question if hybrid else None)
+        stages["search"].append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        final = reranker.rerank(question, candidates, query_embedding)[:final_k]
+        stages["rerank"].append(time.perf_counter() - start)
+
+        if answer is not None:
+            start = time.perf_counter()
+            answer(question, final)
+            stages["generate"].append(time.perf_counter() - start)
+
+        first_stage_refs = [c["ref"] for c in candidates]
+        final_refs = [c["ref"] for c in final]
+        scores[f"recall@{k}"].append(recall_at_k(first_stage_refs, expected, k))
+        scores[f"recall@{final_k}"].append(recall_at_k(final_refs, expected, final_k))
+        scores["mrr"].append(reciprocal_rank(final_refs, expected))
+        scores[f"ndcg@{final_k}"].append(ndcg_at_k(final_refs, expected, final_k))
+        per_question.append({"question": question, "expected": expected, "retrieved": final_refs})
+
+    return {
+        "questions": len(questions),
+        "metrics": {name: round(float(np.mean(values)), 4) if values else 0.0 for name, values in scores.items()},
+        "latency": {stage: latency_summary(values) for stage, values in stages.items() if values},
+        "per_question": per_question,
+    }
+
+
+def compare_reports(previous, current):
+    """Metric deltas (current - previous) for the metrics both reports share."""
+    return {
+        name: round(value - previous["metrics"][name], 4)
+        for name, value in current["metrics"].items()
+        if name in previous.get("metrics", {})
+    }
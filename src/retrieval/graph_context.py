@@ -0,0 +1,235 @@
+import os
+import re
+import time
+import logging
+import threading
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+STATUTE_SOURCE = "equality_act"
+STATUTE_TITLE = "Equality Act"
+SECTION_ID = re.compile(r"^(section-[0-9]+[A-Z]*)(-.+)?$")  # section-6-1 -> section-6
+DEFINED_TERM = re.compile(r"[“\"]([^”\"]{2,60})[”\"] (?:means|includes|has the meaning)")
+MAX_DEFINITION_CHARS = 400
+RETRY_AFTER = float(os.getenv("GRAPH_RETRY_AFTER", 30))  # seconds without graph queries after a failure
+
+# One round trip for every hit: its Section node, parent provision and sibling subsections.
+# The Act's definition provisions (flagged by import_to_neo4j, backed by an index) are fetched in
+# the same call the first time, then kept in memory.
+SUBGRAPH_QUERY = """
+CALL {
+    MATCH (d:Paragraph {is_definition: true})
+    WHERE $include_definitions
+    RETURN collect(d {.id, .text}) AS definitions
+}
+UNWIND $hits AS hit
+OPTIONAL MATCH (pg:Paragraph {id: hit.id})
+OPTIONAL MATCH (s:Section)-[:CONTAINS]->(pg)
+OPTIONAL MATCH (parent:Paragraph {id: hit.parent})
+CALL {
+    WITH hit
+    OPTIONAL MATCH (sibling:Paragraph)
+    WHERE sibling.id STARTS WITH hit.parent + '-' AND sibling.id <> hit.id
+    WITH sibling ORDER BY sibling.id
+    RETURN collect(sibling {.id, .text})[..$max_siblings] AS siblings
+}
+RETURN hit.id AS id, s.name AS section, parent {.id, .text} AS parent, siblings, definitions
+"""
+
+
+def statute_id(chunk):
+    """Graph Paragraph id for a retrieved Equality Act chunk ("Equality Act - section-6-1" -> section-6-1)."""
+    if chunk.get("source") != STATUTE_SOURCE:
+        return None
+    label = chunk["ref"].rsplit(" - ", 1)[-1]
+    return label if SECTION_ID.match(label) else None
+
+
+def parent_id(paragraph_id):
+    return SECTION_ID.match(paragraph_id).group(1)
+
+
+def is_definition(text):
+    """Whether a provision defines terms; set on Paragraph nodes at import time."""
+    return bool(DEFINED_TERM.search(text or ""))
+
+
+def split_definitions(paragraphs):
+    """{defined term (lowercase): (paragraph id, definition text)} from definition provisions."""
+    terms = {}
+    for paragraph in paragraphs:
+        text = paragraph["text"]
+        matches = list(DEFINED_TERM.finditer(text))
+        for i, match in enumerate(matches):
+            end = matches[i + 1].start() if i + 1 < len(matches) else len(text)
+            definition = text[match.start():end].strip(" ;,")
+            if len(definition) > MAX_DEFINITION_CHARS:
+                definition = definition[:MAX_DEFINITION_CHARS].rsplit(" ", 1)[0] + " …"
+            terms.setdefault(match.group(1).lower(), (paragraph["id"], definition))
+    return terms
+
+
+def _context_chunk(paragraph_id, text, via, ref_id=None):
+    return {
+        "id": ref_id or paragraph_id,
+        "source": STATUTE_SOURCE,
+        "ref": f"{STATUTE_TITLE} - {paragraph_id}",
+        "text": text,
+        "via": via,
+    }
+
+
+class GraphExpander:
+    """Adds statutory context from Neo4j to retrieved Equality Act paragraphs.
+
+    Each hit brings its parent section, its sibling subsections and the
+    definitions of terms it uses. Subgraphs are fetched for all uncached hits
+    in one Cypher call and kept in a small LRU cache, since the same popular
+    sections come back question after question. Case-law chunks pass through.
+    After a database error no query is sent for `retry_after` seconds, so an
+    unreachable Neo4j does not stall every question on a connection timeout.
+    One instance is shared by every session of the Ask page, so per-call
+    results (duration, fallback, stats) are returned, never stored.
+    """
+
+    def __init__(self, graph=None, cache_size=256, max_siblings=6, max_definitions=3, retry_after=RETRY_AFTER):
+        self._graph = graph
+        self.retry_after = retry_after
+        self._down_until = 0.0
+        self.cache_size = cache_size
+        self.max_siblings = max_siblings
+        self.max_definitions = max_definitions
+        self._subgraphs = OrderedDict()  # paragraph id -> subgraph, least recently used first
+        self._definitions = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.queries = 0
+
+    @property
+    def graph(self):
+        if self._graph is None:
+            from src.graph_store import get_graph_store
+            self._graph = get_graph_store()
+        return self._graph
+
+    def fetch(self, ids):
+        """Subgraphs for paragraph ids: cached ones from memory, the rest in one query."""
+        return self._fetch(ids)[0]
+
+    def _fetch(self, ids):
+        """(subgraphs, {"cache_hits", "queries"}) for this call alone."""
+        found, missing = {}, []
+        with self._lock:
+            for paragraph_id in dict.fromkeys(ids):
+                if paragraph_id in self._subgraphs:
+                    self._subgraphs.move_to_end(paragraph_id)
+                    found[paragraph_id] = self._subgraphs[paragraph_id]
+                else:
+                    missing.append(paragraph_id)
+            self.hits += len(found)
+            self.misses += len(missing)
+            include_definitions = self._definitions is None
+        counts = {"cache_hits": len(found), "queries": 0}
+        if not missing:
+            return found, counts
+        wait = self._down_until - time.monotonic()
+        if wait > 0:
+            raise ConnectionError(f"graph unavailable, next attempt in {wait:.0f} s")
+
+        try:
+            rows = self.graph.query(
+                SUBGRAPH_QUERY, ttl=0,  # cached per paragraph below, not per id list
+                hits=[{"id": paragraph_id, "parent": parent_id(paragraph_id)} for paragraph_id in missing],
+                include_definitions=include_definitions,
+                max_siblings=self.max_siblings,
+            )
+        except Exception:
+            self._down_until = time.monotonic() + self.retry_after
+            raise
+        counts["queries"] = 1
+
+        with self._lock:
+            self.queries += 1
+            if include_definitions and self._definitions is None:
+                self._definitions = split_definitions(rows[0]["definitions"] if rows else [])
+            for row in rows:
+                subgraph = {"section": row["section"], "parent": row["parent"], "siblings": row["siblings"]}
+                self._subgraphs[row["id"]] = subgraph
+                found[row["id"]] = subgraph
+            while len(self._subgraphs) > self.cache_size:
+                self._subgraphs.popitem(last=False)
+        return found, counts
+
+    def definitions_for(self, chunks, exclude=()):
+        """Definitions of defined terms that appear in the chunks' text, in order of first use."""
+        text = " ".join(chunk["text"] for chunk in chunks).lower()
+        picked = []
+        for term, (paragraph_id, definition) in (self._definitions or {}).items():
+            if paragraph_id in exclude or parent_id(paragraph_id) in exclude:
+                continue
+            position = re.search(rf"\b{re.escape(term)}\b", text)
+            if position:
+                picked.append((position.start(), term, paragraph_id, definition))
+        picked.sort()
+        return [
+            _context_chunk(paragraph_id, definition, "definition", ref_id=f"{paragraph_id}#{term}")
+            for _, term, paragraph_id, definition in picked[: self.max_definitions]
+        ]
+
+    def expand_with_info(self, chunks, top_n=None):
+        """(chunks with graph context, {"duration", "fallback", "stats"}) for one call.
+
+        Context is inserted after the first `top_n` chunks (all by default).
+        Each expanded hit is followed by its parent section and sibling
+        subsections (pack_context folds those into one entry and uses the
+        subsections when the whole section is over budget); definitions follow
+        the expanded hits. On any database error the chunks come back unchanged.
+        """
+        start = time.perf_counter()
+        top_n = len(chunks) if top_n is None else top_n
+        head, tail = chunks[:top_n], chunks[top_n:]
+        ids = [paragraph_id for paragraph_id in map(statute_id, head) if paragraph_id]
+        try:
+            subgraphs, counts = self._fetch(ids) if ids else ({}, {"cache_hits": 0, "queries": 0})
+        except Exception as e:
+            logger.warning("Graph expansion failed, using retrieved chunks only: %s", e)
+            info = {"duration": time.perf_counter() - start, "fallback": True, "stats": {"hits": len(ids)}}
+            return list(chunks), info
+
+        seen = {statute_id(chunk) or chunk["id"] for chunk in chunks}
+        expanded = []
+        for chunk in head:
+            expanded.append(chunk)
+            subgraph = subgraphs.get(statute_id(chunk))
+            if not subgraph:
+                continue
+            context = []
+            parent = subgraph["parent"]
+            if parent and parent["id"] != statute_id(chunk):
+                context.append(_context_chunk(parent["id"], parent["text"], "parent"))
+            context += [_context_chunk(s["id"], s["text"], "sibling") for s in subgraph["siblings"]]
+            for extra in context:
+                if extra["id"] not in seen:
+                    seen.add(extra["id"])
+                    expanded.append(extra)
+        covered = {parent_id(paragraph_id) for paragraph_id in ids}
+        definitions = [d for d in self.definitions_for(head, exclude=covered) if d["id"] not in seen]
+        expanded += definitions + tail
+
+        stats = dict(counts, hits=len(ids), added=len(expanded) - len(chunks), definitions=len(definitions))
+        return expanded, {"duration": time.perf_counter() - start, "fallback": False, "stats": stats}
+
+    def expand(self, chunks, top_n=None):
+        return self.expand_with_info(chunks, top_n)[0]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "cached_subgraphs": len(self._subgraphs),
+                "hits": self.hits,
+                "misses": self.misses,
+                "queries": self.queries,
+                "definitions": len(self._definitions or {}),
+            }
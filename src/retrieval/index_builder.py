@@ -0,0 +1,201 @@
+import os
+import json
+import time
+from datetime import datetime, timezone
+
+import faiss
+import numpy as np
+
+from src.retrieval.vector_store import normalize, get_vectors, cosine_scores
+
+# === Defaults ===
+INDEX_TYPES = ("flat", "ivf_flat", "ivf_pq", "hnsw")
+METRICS = {"ip": faiss.METRIC_INNER_PRODUCT, "l2": faiss.METRIC_L2}
+DEFAULT_INDEX_CONFIG = {
+    "type": "flat",
+    "metric": "ip",         # "ip" on unit vectors = cosine similarity, or "l2"
+    "nlist": 100,           # IVF: number of coarse clusters
+    "nprobe": 10,           # IVF: clusters visited per query
+    "pq_m": 16,             # PQ: sub-quantizers (must divide the dimension)
+    "pq_nbits": 8,          # PQ: bits per sub-quantizer code
+    "hnsw_m": 32,           # HNSW: graph neighbours per node
+    "ef_construction": 80,  # HNSW: build-time beam width
+    "ef_search": 64,        # HNSW: query-time beam width
+    "train_size": 50000,    # max vectors sampled for training
+    "report_queries": 200,  # sample queries used for the build report
+    "report_k": 10,
+    "seed": 42,
+}
+
+
+def load_index_config(path=None):
+    """Defaults overlaid with an optional JSON config file."""
+    config = dict(DEFAULT_INDEX_CONFIG)
+    if path:
+        with open(path, "r", encoding="utf-8") as f:
+            config.update(json.load(f))
+    if config["type"] not in INDEX_TYPES:
+        raise ValueError(f"Unknown index type '{config['type']}', expected one of {INDEX_TYPES}")
+    if config["metric"] not in METRICS:
+        raise ValueError(f"Unknown metric '{config['metric']}', expected one of {tuple(METRICS)}")
+    return config
+
+
+def prepare_embeddings(embeddings, config):
+    """Float32 vectors as the index expects them: unit length for inner-product indexes."""
+    if config["metric"] == "ip":
+        return normalize(embeddings)
+    return np.ascontiguousarray(embeddings, dtype=np.float32)
+
+
+def factory_string(config, dimension, n_vectors):
+    """FAISS index_factory description, with parameters clamped to the corpus size."""
+    index_type = config["type"]
+    if index_type == "flat":
+        return "Flat"
+    if index_type == "hnsw":
+        return f"HNSW{config['hnsw_m']}"
+
+    # FAISS wants ~39 training points per centroid
+    nlist = max(1, min(config["nlist"], n_vectors // 39))
+    if index_type == "ivf_flat":
+        return f"IVF{nlist},Flat"
+
+    if dimension % config["pq_m"] != 0:
+        raise ValueError(f"pq_m={config['pq_m']} must divide the embedding dimension {dimension}")
+    nbits = max(1, min(config["pq_nbits"], int(np.log2(max(n_vectors, 2)))))
+    return f"IVF{nlist},PQ{config['pq_m']}x{nbits}"
+
+
+def apply_search_params(index, config):
+    """Set query-time knobs (nprobe / efSearch) on a loaded or freshly built index."""
+    params = faiss.ParameterSpace()
+    if config["type"] in ("ivf_flat", "ivf_pq"):
+        params.set_index_parameter(index, "nprobe", config["nprobe"])
+    elif config["type"] == "hnsw":
+        params.set_index_parameter(index, "efSearch", config["ef_search"])
+    return index
+
+
+def build_index(embeddings, config):
+    """Train (on a sample) and fill an index of the configured type.
+
+    `embeddings` should come from `prepare_embeddings` so the stored vectors
+    and the index agree on normalisation.
+    """
+    embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+    n_vectors, dimension = embeddings.shape
+    factory = factory_string(config, dimension, n_vectors)
+    index = faiss.index_factory(dimension, factory, METRICS[config["metric"]])
+
+    if config["type"] == "hnsw":
+        faiss.downcast_index(index).hnsw.efConstruction = config["ef_construction"]
+
+    if not index.is_trained:
+        rng = np.random.default_rng(config["seed"])
+        sample_size = min(config["train_size"], n_vectors)
+        sample = embeddings[rng.choice(n_vectors, sample_size, replace=False)]
+        index.train(sample)
+
+    index.add(embeddings)
+    return apply_search_params(index, config)
+
+
+def _percentile_ms(timings, q):
+    return round(float(np.percentile(timings, q)) * 1000, 3)
+
+
+def _timed_search(index, queries, k):
+    timings = []
+    results = []
+    for query in queries:
+        start = time.perf_counter()
+        _, ids = index.search(query.reshape(1, -1), k)
+        timings.append(time.perf_counter() - start)
+        results.append(ids[0])
+    return np.array(results), timings
+
+
+def evaluate_index(index, embeddings, config):
+    """Compare an index against exact search: recall@k plus p50/p99 latency."""
+    embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+    n_vectors, dimension = embeddings.shape
+    k = min(config["report_k"], n_vectors)
+    rng = np.random.default_rng(config["seed"] + 1)
+    queries = embeddings[rng.choice(n_vectors, min(config["report_queries"], n_vectors), replace=False)]
+
+    exact = faiss.IndexFlatIP(dimension) if config["metric"] == "ip" else faiss.IndexFlatL2(dimension)
+    exact.add(embeddings)
+    exact_ids, exact_timings = _timed_search(exact, queries, k)
+    ann_ids, ann_timings = _timed_search(index, queries, k)
+
+    hits = [len(set(a[a >= 0]) & set(e)) for a, e in zip(ann_ids, exact_ids)]
+    return {
+        "index_type": config["type"],
+        "metric": config["metric"],
+        "factory": factory_string(config, dimension, n_vectors),
+        "vectors": n_vectors,
+        "queries": len(queries),
+        "k": k,
+        f"recall@{k}": round(sum(hits) / (len(queries) * k), 4),
+        "latency_ms": {"p50": _percentile_ms(ann_timings, 50), "p99": _percentile_ms(ann_timings, 99)},
+        "exact_latency_ms": {"p50": _percentile_ms(exact_timings, 50), "p99": _percentile_ms(exact_timings, 99)},
+    }
+
+
+def write_manifest(path, index, config, **fields):
+    """Record how an index was built so the query side can load it the same way."""
+    manifest = {
+        "index_type": config["type"],
+        "metric": config["metric"],
+        "normalized": config["metric"] == "ip",
+        "factory": factory_string(config, index.d, index.ntotal),
+        "dimension": index.d,
+        "count": index.ntotal,
+        "config": config,
+        "built_at": datetime.now(timezone.utc).isoformat(),
+    }
+    manifest.update(fields)
+    # Temp file + rename: readers see either the old manifest or the new one
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, path)
+    return manifest
+
+
+def write_report(path, report):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+
+def load_index(index_path, manifest_path=None):
+    """Load the index a manifest names, falling back to a bare index file."""
+    manifest = {}
+    if manifest_path and os.path.exists(manifest_path):
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        index_path = manifest.get("index_path", index_path)
+
+    index = faiss.read_index(index_path)
+    if manifest:
+        config = dict(DEFAULT_INDEX_CONFIG)
+        config.update(manifest.get("config", {}))
+        apply_search_params(index, config)
+    return index, manifest
+
+
+def search_index(index, query_embedding, k, manifest=None, store=None, params=None):
+    """Top-k FAISS ids with cosine similarity scores, dropping empty (-1) slots.
+
+    Inner-product indexes over unit vectors already return cosine scores.
+    Legacy L2 indexes (no manifest) are scored against the embedding store.
+    """
+    inner_product = (manifest or {}).get("metric") == "ip"
+    query = normalize(query_embedding) if inner_product else np.array(query_embedding, dtype=np.float32, ndmin=2)
+    distances, ids = index.search(query, k, params=params)
+    keep = ids[0] != -1
+    ids, distances = ids[0][keep], distances[0][keep]
+    if inner_product:
+        return ids, distances
+    return ids, cosine_scores(query, get_vectors(store, ids))
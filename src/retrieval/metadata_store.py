@@ -0,0 +1,87 @@
+import json
+import sqlite3
+
+
+def write_metadata_store(rows, path, text_key="text"):
+    """Write one SQLite row per FAISS position; the paragraph text gets its own column."""
+    db = sqlite3.connect(path)
+    db.executescript("""
+        DROP TABLE IF EXISTS metadata;
+        DROP TABLE IF EXISTS store_meta;
+        CREATE TABLE metadata (position INTEGER PRIMARY KEY, fields TEXT, text TEXT);
+        CREATE TABLE store_meta (key TEXT PRIMARY KEY, value TEXT);
+    """)
+    db.execute("INSERT INTO store_meta VALUES ('text_key', ?)", (text_key,))
+    db.executemany(
+        "INSERT INTO metadata VALUES (?, ?, ?)",
+        (
+            (position, json.dumps({k: v for k, v in row.items() if k != text_key}, ensure_ascii=False), row.get(text_key))
+            for position, row in enumerate(rows)
+        ),
+    )
+    db.commit()
+    db.close()
+
+
+class MetadataStore:
+    """Read-only, list-like view of the metadata rows, fetched from SQLite on demand.
+
+    Nothing is loaded up front, so memory and startup time do not grow with
+    the corpus; `fields()` skips the paragraph text entirely.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._db = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+        self.text_key = self._db.execute("SELECT value FROM store_meta WHERE key = 'text_key'").fetchone()[0]
+        self._length = self._db.execute("SELECT COUNT(*) FROM metadata").fetchone()[0]
+
+    def __len__(self):
+        return self._length
+
+    def _position(self, position):
+        position = int(position)
+        if position < 0:
+            position += self._length
+        if not 0 <= position < self._length:
+            raise IndexError(f"metadata position {position} out of range")
+        return position
+
+    def __getitem__(self, position):
+        if isinstance(position, slice):
+            return self.get_many(range(*position.indices(self._length)))
+        return self.get_many([position])[0]
+
+    def __iter__(self):
+        for position in range(self._length):
+            yield self[position]
+
+    def get_many(self, positions, text=True):
+        """Rows for the given FAISS positions, in the same order, in one query."""
+        positions = [self._position(p) for p in positions]
+        if not positions:
+            return []
+        column = "text" if text else "NULL"
+        placeholders = ",".join("?" * len(set(positions)))
+        found = {}
+        for position, fields, value in self._db.execute(
+            f"SELECT position, fields, {column} FROM metadata WHERE position IN ({placeholders})",
+            sorted(set(positions)),
+        ):
+            row = json.loads(fields)
+            if text:
+                row[self.text_key] = value
+            found[position] = row
+        return [dict(found[p]) for p in positions]
+
+    def fields(self, position):
+        """Row without its text."""
+        return self.get_many([position], text=False)[0]
+
+
+def open_metadata(path):
+    """Metadata for an index: a SQLite store, or the legacy whole-file JSON list."""
+    if path.endswith(".json"):
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    return MetadataStore(path)
@@ -0,0 +1,116 @@
+import re
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+
+def normalize_question(text):
+    """Collapse case, whitespace and trailing punctuation so near-identical questions share a key."""
+    return re.sub(r"\s+", " ", text).strip().rstrip("?!. ").lower()
+
+
+class QueryEmbeddingCache:
+    """Drop-in `encode()` for question embeddings with an LRU memory tier and an optional SQLite tier.
+
+    `load_model` is only called on the first miss, so fully cached questions
+    never load the sentence transformer. One instance is shared by every
+    session of the Ask page, so per-call misses are returned, never stored.
+    """
+
+    def __init__(self, load_model, model_name, max_entries=1024, disk_path=None):
+        self._load_model = load_model
+        self._model = None
+        self.model_name = model_name
+        self.max_entries = max_entries
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        self._db = None
+        if disk_path:
+            self._db = sqlite3.connect(disk_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS query_embeddings ("
+                "key TEXT PRIMARY KEY, model TEXT, question TEXT, vector BLOB)"
+            )
+            self._db.commit()
+
+    @property
+    def model(self):
+        if self._model is None:
+            self._model = self._load_model()
+        return self._model
+
+    def key(self, text):
+        return hashlib.sha1(f"{self.model_name}\n{normalize_question(text)}".encode("utf-8")).hexdigest()
+
+    def _remember(self, key, vector):
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _lookup(self, key):
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            self.memory_hits += 1
+            return self._memory[key]
+        if self._db is not None:
+            row = self._db.execute("SELECT vector FROM query_embeddings WHERE key = ?", (key,)).fetchone()
+            if row:
+                vector = np.frombuffer(row[0], dtype=np.float32)
+                self._remember(key, vector)
+                self.disk_hits += 1
+                return vector
+        return None
+
+    def encode(self, sentences, **kwargs):
+        """Same call shape as SentenceTransformer.encode; only misses reach the model."""
+        return self.encode_with_info(sentences, **kwargs)[0]
+
+    def encode_with_info(self, sentences, **kwargs):
+        """(embeddings, {"misses"}) for one call, misses being the texts sent to the model."""
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        if not texts:
+            # Nothing to encode, so the model is not loaded just to learn its width
+            dim = len(next(iter(self._memory.values()))) if self._memory else 0
+            return np.empty((0, dim), dtype=np.float32), {"misses": 0}
+        keys = [self.key(text) for text in texts]
+
+        with self._lock:
+            vectors = [self._lookup(key) for key in keys]
+            missing = [i for i, vector in enumerate(vectors) if vector is None]
+            self.misses += len(missing)
+
+        if missing:
+            encoded = self.model.encode([texts[i] for i in missing], convert_to_numpy=True, **kwargs)
+            with self._lock:
+                for i, vector in zip(missing, encoded):
+                    vector = np.asarray(vector, dtype=np.float32)
+                    vectors[i] = vector
+                    self._remember(keys[i], vector)
+                    if self._db is not None:
+                        self._db.execute(
+                            "INSERT OR REPLACE INTO query_embeddings VALUES (?, ?, ?, ?)",
+                            (keys[i], self.model_name, normalize_question(texts[i]), vector.tobytes()),
+                        )
+                if self._db is not None:
+                    self._db.commit()
+
+        return (vectors[0] if single else np.vstack(vectors)), {"misses": len(missing)}
+
+    def stats(self):
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": round((lookups - self.misses) / lookups, 3) if lookups else 0.0,
+            "memory_entries": len(self._memory),
+        }
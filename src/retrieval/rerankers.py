@@ -0,0 +1,208 @@
+import os
+import re
+import time
+import logging
+import threading
+
+import numpy as np
+
+from src.retrieval.vector_store import normalize, get_vectors
+from src.profiling import approx_tokens
+
+logger = logging.getLogger(__name__)
+
+RANKING_LINE = re.compile(r"ranking:\s*\[?\s*(\d+(?:\s*,\s*\d+)*)", re.IGNORECASE)
+NUMBER_LIST = re.compile(r"\[(\s*\d+\s*(?:,\s*\d+\s*)*)\]")
+
+
+class Reranker:
+    """Reorders first-stage candidates; every call is timed.
+
+    One instance is shared by every session of the Ask page, so per-call
+    results (duration, fallback, token usage) are returned, never stored.
+    """
+
+    name = "base"
+
+    def __init__(self):
+        self.calls = 0
+        self.total_duration = 0.0
+        self._lock = threading.Lock()
+
+    def rerank_with_info(self, question, candidates, query_embedding=None):
+        """(ranked candidates, {"duration", "fallback", "usage"}) for one call."""
+        info = {"duration": 0.0, "fallback": False, "usage": {}}
+        start = time.perf_counter()
+        ranked = []
+        if candidates:
+            ranked, details = self._rerank_with_info(question, candidates, query_embedding)
+            info.update(details)
+        info["duration"] = time.perf_counter() - start
+        with self._lock:
+            self.calls += 1
+            self.total_duration += info["duration"]
+        logger.info("%s rerank of %d candidates took %.1f ms", self.name, len(candidates), info["duration"] * 1000)
+        return ranked, info
+
+    def rerank(self, question, candidates, query_embedding=None):
+        return self.rerank_with_info(question, candidates, query_embedding)[0]
+
+    def _rerank_with_info(self, question, candidates, query_embedding):
+        """Override when a backend has more to report than its ranking (fallback, usage)."""
+        return self._rerank(question, candidates, query_embedding), {}
+
+    def _rerank(self, question, candidates, query_embedding):
+        raise NotImplementedError
+
+
+class LLMReranker(Reranker):
+    """Asks the chat model for a ranking of the numbered paragraphs (one extra LLM round trip)."""
+
+    name = "llm"
+
+    def __init__(self, model="mistral", chat=None):
+        super().__init__()
+        self.model = model
+        self._chat = chat
+
+    def _prompt(self, question, candidates):
+        numbered = []
+        for i, c in enumerate(candidates):
+            clean_text = c['text'][:300].replace('\n', ' ')
+            numbered.append(f"[{i+1}] {clean_text}")
+        context = "\n\n".join(numbered)
+        example = list(range(1, len(candidates) + 1))
+        return f"""
+You are a legal assistant. You will receive a question and {len(candidates)} legal paragraphs (labeled [1] to [{len(candidates)}]).
+Rank them from most to least relevant by returning a list of numbers.
+
+Question:
+{question}
+
+Paragraphs:
+{context}
+
+Return the ranking on one line like this:
+Ranking: {example}
+Only return that line. No explanation.
+"""
+
+    @staticmethod
+    def parse_ranking(text, count):
+        """1-based candidate numbers from the "Ranking: [...]" line (else the last bracketed number list).
+
+        Numbers anywhere else in the reply, such as "section 20", are ignored.
+        """
+        match = RANKING_LINE.search(text)
+        if match is None:
+            lists = NUMBER_LIST.findall(text)
+            if not lists:
+                return []
+            numbers = lists[-1]
+        else:
+            numbers = match.group(1)
+        order = []
+        for number in re.findall(r"\d+", numbers):
+            i = int(number)
+            if 1 <= i <= count and i not in order:
+                order.append(i)
+        return order
+
+    def _rerank_with_info(self, question, candidates, query_embedding):
+        if self._chat is None:
+            from src.llm import get_llm_client
+            self._chat = get_llm_client().chat
+
+        prompt = self._prompt(question, candidates)
+        response = self._chat(model=self.model, messages=[{"role": "user", "content": prompt}])
+        text = response["message"]["content"]
+        usage = {
+            "prompt_tokens": response.get("prompt_eval_count") or approx_tokens(prompt),
+            "completion_tokens": response.get("eval_count") or approx_tokens(text),
+        }
+
+        order = self.parse_ranking(text, len(candidates))
+        if not order:
+            logger.warning("LLM rerank reply had no usable ranking, keeping original order: %r", text[:200])
+            return candidates, {"fallback": True, "usage": usage}
+
+        # Candidates the model left out keep their original relative order at the end
+        order += [i for i in range(1, len(candidates) + 1) if i not in order]
+        return [candidates[i - 1] for i in order], {"usage": usage}
+
+
+class CrossEncoderReranker(Reranker):
+    """Scores every (question, paragraph) pair with a local cross-encoder in one batch."""
+
+    name = "cross-encoder"
+
+    def __init__(self, model_name="cross-encoder/ms-marco-MiniLM-L-6-v2", model=None):
+        super().__init__()
+        self.model_name = model_name
+        self._model = model
+
+    def _rerank(self, question, candidates, query_embedding):
+        if self._model is None:
+            from sentence_transformers import CrossEncoder
+            self._model = CrossEncoder(self.model_name)
+
+        pairs = [(question, c["text"]) for c in candidates]
+        scores = np.asarray(self._model.predict(pairs, batch_size=len(pairs)))
+        return [candidates[i] for i in np.argsort(-scores, kind="stable")]
+
+
+class ScoreFusionReranker(Reranker):
+    """No-model reranker over the stored vectors.
+
+    Fuses (reciprocal rank fusion) the first-stage cosine ranking with a
+    ranking against a pseudo-relevance-feedback query: the question vector
+    pulled towards the centroid of the top `feedback_k` candidates.
+    """
+
+    name = "fusion"
+
+    def __init__(self, embeddings, feedback_k=5, rrf_k=60):
+        super().__init__()
+        self.embeddings = embeddings
+        self.feedback_k = feedback_k
+        self.rrf_k = rrf_k
+
+    def _rerank(self, question, candidates, query_embedding):
+        vectors = normalize(get_vectors(self.embeddings, [c["position"] for c in candidates]))
+        if query_embedding is None:
+            first_stage = vectors.mean(axis=0)
+        else:
+            first_stage = normalize(query_embedding)[0]
+        dense = vectors @ first_stage
+
+        top = np.argsort(-dense)[: self.feedback_k]
+        feedback = normalize(first_stage + vectors[top].mean(axis=0))[0]
+        expanded = vectors @ feedback
+
+        fused = np.zeros(len(candidates))
+        for scores in (dense, expanded):
+            ranks = np.empty(len(candidates))
+            ranks[np.argsort(-scores, kind="stable")] = np.arange(1, len(candidates) + 1)
+            fused += 1.0 / (self.rrf_k + ranks)
+        return [candidates[i] for i in np.argsort(-fused, kind="stable")]
+
+
+RERANKERS = {
+    LLMReranker.name: LLMReranker,
+    CrossEncoderReranker.name: CrossEncoderReranker,
+    ScoreFusionReranker.name: ScoreFusionReranker,
+}
+
+
+def get_reranker(name=None, embeddings=None, llm_model="mistral"):
+    """Reranker for this deployment, chosen by name or the RERANKER environment variable."""
+    name = name or os.getenv("RERANKER", "llm")
+    if name == LLMReranker.name:
+        return LLMReranker(model=llm_model)
+    if name == CrossEncoderReranker.name:
+        return CrossEncoderReranker(os.getenv("CROSS_ENCODER_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2"))
+    if name == ScoreFusionReranker.name:
+        if embeddings is None:
+            raise ValueError("The fusion reranker needs the stored embedding matrix")
+        return ScoreFusionReranker(embeddings)
+    raise ValueError(f"Unknown reranker '{name}', expected one of {list(RERANKERS)}")
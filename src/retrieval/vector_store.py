@@ -0,0 +1,44 @@
+import os
+import numpy as np
+
+
+def normalize(vectors):
+    """Float32 copy of `vectors` with unit-length rows."""
+    vectors = np.array(vectors, dtype=np.float32, ndmin=2)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def save_embeddings(embeddings, path):
+    """Save the embedding matrix so row i matches FAISS id i."""
+    np.save(path, np.ascontiguousarray(embeddings, dtype=np.float32))
+
+
+def load_embeddings(path, index=None):
+    """Memory-map a stored embedding matrix.
+
+    Indexes built before the store existed can still be used: for flat
+    indexes the vectors are reconstructed from the index itself.
+    """
+    if os.path.exists(path):
+        return np.load(path, mmap_mode="r")
+    if index is not None:
+        return index.reconstruct_n(0, index.ntotal)
+    raise FileNotFoundError(f"No embedding store found at {path}")
+
+
+def get_vectors(store, ids):
+    ids = np.asarray(ids, dtype=np.int64)
+    if ids.size == 0:
+        return np.empty((0, store.shape[1]), dtype=np.float32)
+    return np.asarray(store[ids], dtype=np.float32)
+
+
+def cosine_scores(query_embedding, vectors):
+    """Cosine similarity of one query against every row of `vectors`."""
+    query = np.asarray(query_embedding, dtype=np.float32).ravel()
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1) * np.linalg.norm(query)
+    norms[norms == 0] = 1.0
+    return vectors @ query / norms
@@ -0,0 +1,53 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import time
+import numpy as np
+from src.retrieval.answer_cache import AnswerCache, manifest_fingerprint
+
+SOURCES = [{"ref": "Equality Act - section-20", "text": "Duty to make adjustments", "score": 0.8}]
+
+def make_cache(tmp_path, fingerprint="v1", **kwargs):
+    return AnswerCache(str(tmp_path / "answers.sqlite"), fingerprint, **kwargs)
+
+def test_near_duplicate_with_same_chunks_hits(tmp_path):
+    cache = make_cache(tmp_path, threshold=0.95)
+    query = np.array([1.0, 0.0, 0.0], dtype=np.float32)
+    cache.put("What are reasonable adjustments?", query, [3, 1, 2], "Answer [1]", SOURCES)
+
+    near = np.array([1.0, 0.05, 0.0], dtype=np.float32)
+    hit = cache.lookup(near, [1, 2, 3])
+    assert hit["answer"] == "Answer [1]"
+    assert hit["sources"] == [{"ref": SOURCES[0]["ref"], "text": SOURCES[0]["text"]}]
+    assert hit["similarity"] > 0.95
+
+def test_different_chunks_or_distant_question_misses(tmp_path):
+    cache = make_cache(tmp_path, threshold=0.95)
+    query = np.array([1.0, 0.0, 0.0], dtype=np.float32)
+    cache.put("q", query, [1, 2, 3], "a", SOURCES)
+
+    assert cache.lookup(query, [1, 2, 4]) is None
+    assert cache.lookup(np.array([0.0, 1.0, 0.0], dtype=np.float32), [1, 2, 3]) is None
+    assert cache.stats() == {"hits": 0, "misses": 2, "entries": 1}
+
+def test_manifest_change_invalidates_entries(tmp_path):
+    query = np.array([1.0, 0.0], dtype=np.float32)
+    make_cache(tmp_path, manifest_fingerprint({"built_at": "1"})).put("q", query, [1], "a", SOURCES)
+
+    assert make_cache(tmp_path, manifest_fingerprint({"built_at": "1"})).lookup(query, [1]) is not None
+    assert make_cache(tmp_path, manifest_fingerprint({"built_at": "2"})).lookup(query, [1]) is None
+
+def test_ttl_and_size_eviction(tmp_path):
+    cache = make_cache(tmp_path, max_entries=2)
+    for i in range(3):
+        vector = np.zeros(3, dtype=np.float32)
+        vector[i] = 1.0
+        cache.put(f"q{i}", vector, [i], f"a{i}", SOURCES)
+    assert cache.stats()["entries"] == 2
+    assert cache.lookup(np.array([1.0, 0.0, 0.0], dtype=np.float32), [0]) is None
+
+    cache.ttl_seconds = 0
+    time.sleep(0.01)
+    assert cache.lookup(np.array([0.0, 0.0, 1.0], dtype=np.float32), [2]) is None
+    assert cache.stats()["entries"] == 0
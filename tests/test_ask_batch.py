@@ -0,0 +1,88 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import json
+import faiss
+import numpy as np
+from src.ask import read_batch, run_batch, retrieve_top_k, retrieve_top_k_batch
+
+METADATA = [{"Label": f"section-{i}", "Text": f"Paragraph {i}"} for i in range(20)]
+
+class FakeModel:
+    def __init__(self):
+        self.calls = []
+
+    def encode(self, sentences, **kwargs):
+        self.calls.append(list(sentences))
+        return np.vstack([VECTORS[int(s.split()[-1])] for s in sentences])
+
+VECTORS = np.random.default_rng(0).random((20, 8), dtype=np.float32)
+
+def make_index():
+    index = faiss.IndexFlatL2(8)
+    index.add(VECTORS)
+    return index
+
+def write_questions(path, numbers):
+    with open(path, "w", encoding="utf-8") as f:
+        for n in numbers:
+            f.write(json.dumps({"id": f"q{n}", "question": f"about paragraph {n}"}) + "\n")
+
+def test_batch_search_matches_single_search():
+    index = make_index()
+    batch = retrieve_top_k_batch(VECTORS[:3], index, METADATA, top_k=4)
+    assert batch == [retrieve_top_k(v, index, METADATA, top_k=4) for v in VECTORS[:3]]
+
+def test_run_batch_encodes_once_and_writes_jsonl(tmp_path):
+    questions_path = tmp_path / "questions.jsonl"
+    write_questions(questions_path, [1, 2, 3])
+    output = str(tmp_path / "answers.jsonl")
+    model = FakeModel()
+
+    answered = run_batch(read_batch(questions_path), model, make_index(), METADATA, output, top_k=2, workers=2,
+                         generate=lambda context, question: f"answer to {question}")
+
+    assert answered == 3
+    assert len(model.calls) == 1
+    records = {r["id"]: r for r in map(json.loads, open(output, encoding="utf-8"))}
+    assert set(records) == {"q1", "q2", "q3"}
+    assert records["q2"]["answer"] == "answer to about paragraph 2"
+    assert records["q2"]["sources"][0] == "section-2"
+
+def test_run_batch_resumes_after_interruption(tmp_path):
+    questions_path = tmp_path / "questions.jsonl"
+    write_questions(questions_path, [1, 2, 3])
+    output = tmp_path / "answers.jsonl"
+    output.write_text(json.dumps({"id": "q1", "answer": "done"}) + "\n" + '{"id": "q2", "ans')
+    asked = []
+
+    def generate(context, question):
+        asked.append(question)
+        return "new"
+
+    answered = run_batch(read_batch(questions_path), FakeModel(), make_index(), METADATA, str(output), generate=generate)
+
+    assert answered == 2
+    assert sorted(asked) == ["about paragraph 2", "about paragraph 3"]
+    ids = [json.loads(line)["id"] for line in output.read_text().splitlines()[2:]]
+    assert sorted(ids) == ["q2", "q3"]
+
+def test_failed_generation_is_skipped_and_retried(tmp_path):
+    questions_path = tmp_path / "questions.jsonl"
+    write_questions(questions_path, [1, 2, 3])
+    output = str(tmp_path / "answers.jsonl")
+
+    def flaky(context, question):
+        if question.endswith(" 2"):
+            raise RuntimeError("model crashed")
+        return "ok"
+
+    answered = run_batch(read_batch(questions_path), FakeModel(), make_index(), METADATA, output, generate=flaky)
+    assert answered == 2
+    assert sorted(json.loads(line)["id"] for line in open(output, encoding="utf-8")) == ["q1", "q3"]
+
+    asked = []
+    answered = run_batch(read_batch(questions_path), FakeModel(), make_index(), METADATA, output,
+                         generate=lambda context, question: asked.append(question) or "ok")
+    assert answered == 1 and asked == ["about paragraph 2"]
@@ -0,0 +1,50 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+from src.retrieval.bm25 import BM25Index, tokenize, reciprocal_rank_fusion
+
+TEXTS = [
+    "An employer must make reasonable adjustments for a disabled employee.",
+    "Section 20 sets out the duty to make adjustments.",
+    "The tribunal considered whether the adjustments were reasonable.",
+    "Harassment related to a protected characteristic is unlawful.",
+]
+
+def test_tokenize_keeps_numbers_and_bigrams():
+    tokens = tokenize("Section 20, reasonable adjustments")
+    assert "20" in tokens
+    assert "section 20" in tokens
+    assert "reasonable adjustments" in tokens
+
+def test_exact_phrase_ranks_first():
+    index = BM25Index.build(TEXTS)
+
+    ids, scores = index.search("reasonable adjustments", 3)
+    assert ids[0] == 0
+    assert list(scores) == sorted(scores, reverse=True)
+
+    ids, _ = index.search("section 20", 3)
+    assert ids[0] == 1
+
+def test_search_respects_mask_and_drops_zero_scores():
+    index = BM25Index.build(TEXTS)
+    allowed = np.array([False, True, True, True])
+
+    ids, _ = index.search("reasonable adjustments", 4, allowed)
+    assert 0 not in ids
+    assert 3 not in ids
+
+def test_save_and_load_round_trip(tmp_path):
+    index = BM25Index.build(TEXTS)
+    path = str(tmp_path / "bm25.npz")
+    index.save(path)
+
+    loaded = BM25Index.load(path)
+    np.testing.assert_allclose(loaded.scores("harassment"), index.scores("harassment"))
+
+def test_reciprocal_rank_fusion_rewards_agreement():
+    fused = reciprocal_rank_fusion([[1, 2, 3], [3, 1, 4]])
+    assert [doc_id for doc_id, _ in fused][:2] == [1, 3]
+    assert {doc_id for doc_id, _ in fused} == {1, 2, 3, 4}
@@ -0,0 +1,66 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import json
+import subprocess
+import pytest
+from src.profiling import StartupProfile
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+HEAVY_MODULES = ["faiss", "sentence_transformers", "torch", "ollama"]
+
+@pytest.mark.parametrize("module", ["src.ask", "src.ask_dual"])
+def test_cli_modules_import_without_heavy_dependencies(module):
+    code = f"import sys, {module}; print([m for m in {HEAVY_MODULES!r} if m in sys.modules])"
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == "[]"
+
+@pytest.mark.parametrize("script", ["src/ask.py", "src/ask_dual.py"])
+def test_help_and_usage_errors_skip_heavy_work(script):
+    result = subprocess.run([sys.executable, script, "--help"], cwd=ROOT, capture_output=True, text=True)
+    assert result.returncode == 0
+    assert "--profile" in result.stdout
+
+    result = subprocess.run([sys.executable, script], cwd=ROOT, capture_output=True, text=True)
+    assert result.returncode == 2
+    assert "question" in result.stderr
+
+def test_startup_profile_records_stages(tmp_path):
+    profile = StartupProfile("test")
+    with profile.stage("load"):
+        pass
+
+    history = tmp_path / "startup.jsonl"
+    profile.append_to(str(history))
+    profile.append_to(str(history))
+
+    runs = [json.loads(line) for line in history.read_text().splitlines()]
+    assert len(runs) == 2
+    assert set(runs[0]["stages"]) == {"load"}
+    assert runs[0]["total_seconds"] >= runs[0]["stages"]["load"]
+
+def test_trace_spans_are_logged_as_one_json_line(tmp_path):
+    from src.profiling import Trace, configure_trace_log, trace_logger
+
+    path = str(tmp_path / "trace.jsonl")
+    configure_trace_log(path)
+    try:
+        trace = Trace("ask")
+        with trace.span("encode question") as span:
+            span["cache_hit"] = True
+        trace.add("time to first token", 0.25)
+        trace.emit()
+    finally:
+        for handler in list(trace_logger.handlers):
+            if getattr(handler, "trace_path", None) == path:
+                trace_logger.removeHandler(handler)
+                handler.close()
+
+    lines = open(path, encoding="utf-8").read().splitlines()
+    assert len(lines) == 1
+    record = json.loads(lines[0])
+    assert record["trace"] == "ask"
+    assert record["spans"][0]["span"] == "encode question"
+    assert record["spans"][0]["cache_hit"] is True
+    assert record["spans"][1]["ms"] == 250.0
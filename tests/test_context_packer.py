@@ -0,0 +1,54 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.retrieval.context_packer import collapse_overlaps, pack_context
+
+SUB_1 = {"ref": "Equality Act - section-6-1", "text": "A person has a disability if they have a physical or mental impairment."}
+SUB_2 = {"ref": "Equality Act - section-6-2", "text": "A reference to a disabled person is a reference to a person who has a disability."}
+SECTION = {"ref": "Equality Act - section-6", "text": SUB_1["text"] + " " + SUB_2["text"]}
+OTHER = {"ref": "Equality Act - section-60", "text": "Enquiries about disability and health."}
+CASE = {"ref": "Case Law - Dr K Sharma v University of Portsmouth", "text": "The tribunal found the adjustment reasonable."}
+
+def words(chunks):
+    return sum(len(c["text"].split()) for c in chunks)
+
+def test_parent_replaces_children_at_best_rank():
+    kept = collapse_overlaps([SUB_1, OTHER, SECTION, SUB_2])
+    assert [entry["chunk"]["ref"] for entry in kept] == ["Equality Act - section-6", "Equality Act - section-60"]
+    assert kept[0]["covers"] == [SUB_1, SUB_2]
+
+def test_prefix_without_hierarchy_is_not_overlap():
+    kept = collapse_overlaps([{"ref": "Equality Act - section-6", "text": "x"}, OTHER])
+    assert len(kept) == 2
+
+def test_duplicate_case_paragraphs_are_dropped():
+    assert [entry["chunk"] for entry in collapse_overlaps([CASE, dict(CASE), OTHER])] == [CASE, OTHER]
+
+def test_pack_context_never_repeats_statute_text():
+    packed = pack_context([SUB_1, SECTION, SUB_2, CASE], token_budget=1000)
+    assert [c["ref"] for c in packed] == [SECTION["ref"], CASE["ref"]]
+    assert words(packed) < words([SUB_1, SECTION, SUB_2, CASE])
+
+def test_pack_context_falls_back_to_children_and_respects_budget():
+    count = lambda text: len(text.split())
+    packed = pack_context([SUB_1, SECTION, OTHER], token_budget=20, count_tokens=count)
+    assert [c["ref"] for c in packed] == [SUB_1["ref"], OTHER["ref"]]
+    assert words(packed) <= 20
+
+def test_pack_context_truncates_when_nothing_fits():
+    packed = pack_context([SECTION], token_budget=5, count_tokens=lambda text: len(text.split()))
+    assert len(packed) == 1
+    assert len(packed[0]["text"].split()) <= 6
+
+def test_pack_context_limits_chunk_count():
+    assert len(pack_context([CASE, OTHER, SECTION], max_chunks=2)) == 2
+
+def test_pack_context_keeps_every_retrieved_subsection_that_fits():
+    count = lambda text: len(text.split())
+    long_section = dict(SECTION, text=SECTION["text"] + " This section is subject to Schedule 1.")
+    packed = pack_context([SUB_2, long_section, SUB_1, CASE], token_budget=35, count_tokens=count)
+    assert [c["ref"] for c in packed] == [SUB_2["ref"], SUB_1["ref"], CASE["ref"]]  # 16 + 13 + 6 words
+
+    packed = pack_context([SUB_2, long_section, SUB_1], token_budget=35, max_chunks=1, count_tokens=count)
+    assert [c["ref"] for c in packed] == [SUB_2["ref"]]
@@ -0,0 +1,91 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+import pytest
+from src.retrieval.index_builder import load_index_config, prepare_embeddings
+from src.retrieval.corpus import Corpus, write_corpus
+
+SOURCES = ["equality_act", "case_law"]
+
+def build_corpus(tmp_path, index_type, rare_every=None):
+    """600 rows alternating between the sources, or with case law only every `rare_every` rows."""
+    rng = np.random.default_rng(1)
+    rows = []
+    for i in range(600):
+        source = SOURCES[i % 2] if rare_every is None else SOURCES[int(i % rare_every == 0)]
+        rows.append({
+            "source": source,
+            "ref": f"{source} - {i}",
+            "text": "duty to make reasonable adjustments" if i == 301 else f"paragraph {i}",
+            "court": "EAT" if source == "case_law" else "",
+            "date": "2025-03-11" if source == "case_law" else "",
+        })
+    config = load_index_config()
+    config.update({"type": index_type, "nlist": 8, "nprobe": 8})
+    embeddings = prepare_embeddings(rng.random((len(rows), 16), dtype=np.float32), config)
+
+    paths = {name: str(tmp_path / f"corpus_{name}") for name in ["index", "metadata", "embeddings", "attributes", "manifest", "bm25"]}
+    paths["metadata"] += ".sqlite"
+    paths["embeddings"] += ".npy"
+    paths["attributes"] += ".npy"
+    paths["bm25"] += ".npz"
+    write_corpus(rows, embeddings, config, paths, SOURCES, "test-model")
+    return Corpus(paths["manifest"]), embeddings
+
+@pytest.mark.parametrize("index_type", ["flat", "ivf_flat", "hnsw"])
+def test_search_filters_by_source(tmp_path, index_type):
+    corpus, embeddings = build_corpus(tmp_path, index_type)
+
+    everything = corpus.search(embeddings[0], 10)
+    assert len(everything) == 10
+    assert everything[0]["position"] == 0
+    assert {c["source"] for c in everything} == set(SOURCES)
+
+    cases_only = corpus.search(embeddings[0], 5, sources=["case_law"])
+    assert len(cases_only) == 5
+    assert all(c["source"] == "case_law" for c in cases_only)
+
+def test_attribute_table_records_court_and_date(tmp_path):
+    corpus, _ = build_corpus(tmp_path, "flat")
+
+    case_row = corpus.attributes[1]
+    assert corpus.sources[case_row["source"]] == "case_law"
+    assert corpus.courts[case_row["court"]] == "EAT"
+    assert case_row["date"] == 20250311
+    assert corpus.attributes[0]["court"] == 0
+
+def test_hybrid_search_surfaces_keyword_match(tmp_path):
+    corpus, embeddings = build_corpus(tmp_path, "flat")
+
+    dense_only = corpus.search(embeddings[0], 5)
+    assert 301 not in [c["position"] for c in dense_only]
+
+    hybrid = corpus.search(embeddings[0], 5, question="reasonable adjustments")
+    positions = [c["position"] for c in hybrid]
+    assert positions[:2] == [0, 301]
+    assert len(hybrid) == 5
+
+    equality_only = corpus.search(embeddings[0], 5, sources=["equality_act"], question="reasonable adjustments")
+    assert 301 not in [c["position"] for c in equality_only]
+
+def test_rebuild_swaps_in_new_files_without_touching_the_open_build(tmp_path):
+    corpus, embeddings = build_corpus(tmp_path, "flat")
+    before = corpus.search(embeddings[3], 3)
+
+    rebuilt, _ = build_corpus(tmp_path, "flat")
+    assert rebuilt.manifest["version"] != corpus.manifest["version"]
+    assert rebuilt.manifest["index_path"] != corpus.manifest["index_path"]
+    assert corpus.search(embeddings[3], 3) == before  # the open build still reads its own files
+
+    build_corpus(tmp_path, "flat")
+    assert not os.path.exists(corpus.manifest["index_path"])  # only the two newest builds are kept
+    assert os.path.exists(rebuilt.manifest["metadata_path"])
+    assert not os.path.exists(str(tmp_path / "corpus_manifest.tmp"))
+
+def test_hnsw_filter_widens_the_search_for_a_rare_source(tmp_path):
+    corpus, embeddings = build_corpus(tmp_path, "hnsw", rare_every=100)
+    hits = corpus.search(embeddings[1], 5, sources=["case_law"])
+    assert len(hits) == 5 and {hit["source"] for hit in hits} == {"case_law"}
+    assert len(corpus.search(embeddings[1], 10, sources=["case_law"])) == 6  # every case law row there is
@@ -0,0 +1,104 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from src.download_case_documents import Downloader, HostRateLimiter, download_case
+
+DOCUMENTS = {f"/doc/{i}.xml": (f"<judgment n='{i}'>" + "x" * 5000 + "</judgment>").encode() for i in range(12)}
+
+class StubCaseLaw(BaseHTTPRequestHandler):
+    """Serves documents with ETags, answers If-None-Match with 304, and fails /flaky twice."""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self.server.requests.append((self.path, self.headers.get("If-None-Match")))
+        self.server.ports.add(self.client_address[1])
+        if self.path == "/flaky":
+            self.server.flaky_calls += 1
+            if self.server.flaky_calls <= 2:
+                return self._send(503, b"busy")
+            return self._send(200, b"finally", etag='"flaky"')
+        body = DOCUMENTS.get(self.path)
+        if body is None:
+            return self._send(404, b"not found")
+        etag = f'"{hash(body)}"'
+        if self.headers.get("If-None-Match") == etag:
+            return self._send(304, b"", etag=etag)
+        self._send(200, body, etag=etag)
+
+    def _send(self, status, body, etag=None):
+        self.send_response(status)
+        if etag:
+            self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def stub_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubCaseLaw)
+    server.requests, server.ports, server.flaky_calls = [], set(), 0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+def base_url(server):
+    return f"http://127.0.0.1:{server.server_address[1]}"
+
+def make_downloader(tmp_path, **kwargs):
+    kwargs.setdefault("rate_per_host", 0)
+    kwargs.setdefault("validators_path", str(tmp_path / "validators.json"))
+    return Downloader(workers=4, backoff=0.01, **kwargs)
+
+def test_concurrent_download_then_revalidation_saves_bytes(stub_server, tmp_path):
+    jobs = [(base_url(stub_server) + name, str(tmp_path / "xml" / name.rsplit("/", 1)[-1])) for name in DOCUMENTS]
+
+    results, report = make_downloader(tmp_path).fetch_many(jobs)
+    assert report["downloaded"] == 12 and report["bytes"] == sum(map(len, DOCUMENTS.values()))
+    assert open(jobs[3][1], "rb").read() == DOCUMENTS["/doc/3.xml"]
+    assert len(stub_server.ports) <= 4  # pooled keep-alive connections, one per worker at most
+    assert not [f for f in os.listdir(tmp_path / "xml") if f.startswith(".download-")]
+
+    # A new process revalidates with the stored ETags: 304s, no bodies
+    results, report = make_downloader(tmp_path).fetch_many(jobs, overwrite=True)
+    assert report["not_modified"] == 12 and report["bytes"] == 0
+    assert report["saved_bytes"] == sum(map(len, DOCUMENTS.values()))
+    assert all(etag for _, etag in stub_server.requests[12:])
+
+    # Without revalidation, files on disk are kept without any request
+    _, report = make_downloader(tmp_path).fetch_many(jobs)
+    assert report["exists"] == 12 and len(stub_server.requests) == 24
+
+def test_transient_errors_are_retried_with_backoff(stub_server, tmp_path):
+    result = make_downloader(tmp_path).fetch(base_url(stub_server) + "/flaky", str(tmp_path / "flaky.xml"))
+    assert result["status"] == "downloaded"
+    assert stub_server.flaky_calls == 3
+
+def test_missing_document_fails_without_leaving_a_file(stub_server, tmp_path):
+    result = make_downloader(tmp_path).fetch(base_url(stub_server) + "/doc/missing.xml", str(tmp_path / "missing.xml"))
+    assert result["status"] == "failed" and result["error"] == "HTTP 404"
+    assert os.listdir(tmp_path) == []
+
+def test_download_case_returns_paths(stub_server, tmp_path, monkeypatch):
+    monkeypatch.setattr("src.download_case_documents.SITE_URL", base_url(stub_server))
+    case = {"title": "Lee v Ashers", "link_xml": "/doc/1.xml", "link_pdf": base_url(stub_server) + "/doc/missing.pdf"}
+    paths = download_case(case, pdf_dir=str(tmp_path), xml_dir=str(tmp_path), downloader=make_downloader(tmp_path))
+    assert paths == {"pdf": None, "xml": str(tmp_path / "Lee_v_Ashers.xml")}
+
+def test_rate_limit_spaces_requests_per_host():
+    limiter = HostRateLimiter(rate_per_host=50)
+    start = time.monotonic()
+    for _ in range(6):
+        limiter.wait("http://a.example/doc")
+    limiter.wait("http://b.example/doc")  # another host is not held back
+    assert time.monotonic() - start >= 5 / 50
@@ -0,0 +1,67 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+from src.retrieval.embedding_cache import EmbeddingCache, content_ids, compare_builds, text_hash
+from src.retrieval.corpus import build_attributes
+
+
+class CountingModel:
+    """Deterministic fake sentence transformer that records what it was asked to encode."""
+
+    def __init__(self):
+        self.encoded = []
+
+    def encode(self, texts, convert_to_numpy=True, **kwargs):
+        self.encoded.extend(texts)
+        return np.array([[len(t), sum(map(ord, t)) % 97, 1.0] for t in texts], dtype=np.float32)
+
+
+def test_rebuild_only_encodes_new_or_changed_text(tmp_path):
+    path = str(tmp_path / "embedding_cache.sqlite")
+    model = CountingModel()
+    texts = ["section one", "section two", "section three"]
+
+    first = EmbeddingCache(path, "test-model").encode(texts, lambda: model)
+    assert len(model.encoded) == 3
+
+    # Reopened cache: one paragraph edited, one inserted at the front
+    cache = EmbeddingCache(path, "test-model")
+    edited = ["a new section", "section one", "section two (amended)", "section three"]
+    second = cache.encode(edited, lambda: model)
+
+    assert model.encoded[3:] == ["a new section", "section two (amended)"]
+    assert cache.last_stats == {"texts": 4, "reused": 2, "encoded": 2}
+    assert np.array_equal(second[1], first[0]) and np.array_equal(second[3], first[2])
+
+def test_fully_cached_corpus_never_loads_the_model(tmp_path):
+    path = str(tmp_path / "embedding_cache.sqlite")
+    EmbeddingCache(path, "test-model").encode(["a", "b"], CountingModel)
+
+    def fail():
+        raise AssertionError("model should not be loaded")
+
+    vectors = EmbeddingCache(path, "test-model").encode(["b", "a", "a"], fail)
+    assert vectors.shape == (3, 3)
+
+def test_vectors_are_kept_per_model(tmp_path):
+    path = str(tmp_path / "embedding_cache.sqlite")
+    EmbeddingCache(path, "model-a").encode(["text"], CountingModel)
+    other = EmbeddingCache(path, "model-b")
+    other.encode(["text"], CountingModel)
+    assert other.last_stats["encoded"] == 1
+
+def test_content_ids_survive_insertions_and_duplicates():
+    before = content_ids(["ref 1\nA", "ref 2\nB", "ref 2\nB"])
+    after = content_ids(["ref 0\nNEW", "ref 1\nA", "ref 2\nB", "ref 2\nB"])
+    assert after[1:] == before
+    assert len(set(after)) == 4
+    assert compare_builds([text_hash("A"), text_hash("B")], [text_hash("B"), text_hash("C")]) == {"added": 1, "removed": 1, "kept": 1}
+
+def test_corpus_doc_ids_do_not_shift():
+    row = lambda ref, text: {"source": "equality_act", "ref": ref, "text": text, "court": "", "date": ""}
+    rows = [row("Equality Act - section-1", "one"), row("Equality Act - section-2", "two")]
+    before, _ = build_attributes(rows, ["equality_act"])
+    after, _ = build_attributes([row("Equality Act - section-1A", "inserted")] + rows, ["equality_act"])
+    assert list(after["doc_id"][1:]) == list(before["doc_id"])
@@ -0,0 +1,54 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import math
+import numpy as np
+import pytest
+from src.retrieval.evaluation import recall_at_k, reciprocal_rank, ndcg_at_k, run_benchmark, compare_reports
+from src.retrieval.rerankers import Reranker
+
+def test_subsections_count_once_for_their_section():
+    retrieved = ["Equality Act - section-20-1", "Equality Act - section-20-3", "Equality Act - section-2"]
+    assert recall_at_k(retrieved, ["Equality Act - section-20"], 1) == 1.0
+    assert recall_at_k(retrieved, ["Equality Act - section-2", "Equality Act - section-6"], 3) == 0.5
+    assert ndcg_at_k(retrieved, ["Equality Act - section-20"], 3) == 1.0
+
+def test_rank_sensitive_metrics():
+    retrieved = ["a", "b", "c"]
+    assert reciprocal_rank(retrieved, ["c"]) == pytest.approx(1 / 3)
+    assert reciprocal_rank(retrieved, ["z"]) == 0.0
+    assert ndcg_at_k(retrieved, ["b"], 3) == pytest.approx(1 / math.log2(3))
+
+class Identity(Reranker):
+    name = "identity"
+
+    def _rerank(self, question, candidates, query_embedding):
+        return candidates
+
+class FakeModel:
+    def encode(self, sentences, **kwargs):
+        return np.zeros((len(sentences), 4), dtype=np.float32)
+
+class FakeCorpus:
+    def search(self, query_embedding, k, sources=None, question=None):
+        refs = ["Equality Act - section-13", "Equality Act - section-20-1", "Equality Act - section-26"]
+        return [{"ref": ref, "text": ""} for ref in refs][:k]
+
+def test_run_benchmark_reports_metrics_and_stage_latency():
+    questions = [
+        {"question": "adjustments?", "expected": ["Equality Act - section-20"]},
+        {"question": "victimisation?", "expected": ["Equality Act - section-27"]},
+    ]
+    answers = []
+    report = run_benchmark(questions, FakeModel(), FakeCorpus(), Identity(), k=3, final_k=2,
+                           answer=lambda question, chunks: answers.append(question))
+
+    assert report["metrics"]["recall@3"] == 0.5
+    assert report["metrics"]["mrr"] == pytest.approx(0.25)
+    assert set(report["latency"]) == {"encode", "search", "rerank", "generate"}
+    assert report["latency"]["search"]["p50_ms"] >= 0
+    assert answers == ["adjustments?", "victimisation?"]
+
+    baseline = dict(report, metrics=dict(report["metrics"], mrr=0.5))
+    assert compare_reports(baseline, report)["mrr"] == pytest.approx(-0.25)
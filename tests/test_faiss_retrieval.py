@@ -2,16 +2,16 @@ import sys
 import os
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-import json
 import faiss
 import numpy as np
 import pytest
 from sentence_transformers import SentenceTransformer
 from src.ask import embed_query, retrieve_top_k, format_context
+from src.retrieval.metadata_store import open_metadata
 
 # === Constants ===
 FAISS_INDEX_PATH = "data/faiss_index.idx"
-METADATA_PATH = "data/faiss_metadata.json"
+METADATA_PATH = "data/faiss_metadata.sqlite"
 EMBEDDING_MODEL = "all-MiniLM-L6-v2"
 
 @pytest.fixture(scope="module")
@@ -19,8 +19,7 @@ def load_resources():
     model = SentenceTransformer(EMBEDDING_MODEL)
     index = faiss.read_index(FAISS_INDEX_PATH)
 
-    with open(METADATA_PATH, "r", encoding="utf-8") as f:
-        metadata = json.load(f)
+    metadata = open_metadata(METADATA_PATH)
 
     return model, index, metadata
 
@@ -0,0 +1,118 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import json
+import threading
+from urllib.parse import urlsplit, parse_qs, urlencode
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from src.fetch_case_law import FeedCrawler, feed_url, iter_feed, latest_cases, save_cases
+
+SITE = "https://caselaw.nationalarchives.gov.uk"
+
+
+def judgment(n, day):
+    return {"uri": f"{SITE}/ewca/civ/2024/{n}", "title": f"Claimant {n} v Employer",
+            "updated": f"2024-{(day - 1) // 28 + 1:02d}-{(day - 1) % 28 + 1:02d}T10:00:00+00:00"}
+
+
+class StubFeed(BaseHTTPRequestHandler):
+    """Pages of an Atom search feed, newest first, with rel="next" and rel="last" links."""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        params = {key: values[0] for key, values in parse_qs(urlsplit(self.path).query).items()}
+        self.server.requests.append(params)
+        page, per_page = int(params["page"]), int(params["per_page"])
+        entries = sorted(self.server.entries, key=lambda e: e["updated"], reverse=True)
+        last = max(1, -(-len(entries) // per_page))
+        body = self._feed(entries[(page - 1) * per_page:page * per_page], params, page, last).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/atom+xml")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _feed(self, entries, params, page, last):
+        link = lambda rel, n: f'<link rel="{rel}" href="/atom.xml?{urlencode(dict(params, page=n))}"/>'
+        links = link("last", last) + (link("next", page + 1) if page < last else "")
+        items = "".join(
+            f'<entry><title>{e["title"]}</title><id>{e["uri"]}</id><updated>{e["updated"]}</updated>'
+            f'<link rel="alternate" type="application/akn+xml" href="{urlsplit(e["uri"]).path}/data.xml"/></entry>'
+            for e in entries
+        )
+        return f'<?xml version="1.0"?><feed xmlns="http://www.w3.org/2005/Atom"><title>Search</title>{links}{items}</feed>'
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub_feed():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubFeed)
+    server.entries = [judgment(n, n) for n in range(1, 24)]
+    server.requests = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+def make_crawler(server, tmp_path, **kwargs):
+    return FeedCrawler(
+        "Equality Act 2010 s.20 & 21", feed_path=str(tmp_path / "feed.jsonl"), state_path=str(tmp_path / "state.json"),
+        per_page=5, workers=2, rate_per_host=0, base_url=f"http://127.0.0.1:{server.server_address[1]}/atom.xml", **kwargs,
+    )
+
+
+def test_feed_url_encodes_the_query():
+    url = feed_url("Equality Act 2010 s.20 & 21", page=3, per_page=50)
+    assert parse_qs(urlsplit(url).query) == {"query": ["Equality Act 2010 s.20 & 21"], "order": ["-updated"],
+                                             "page": ["3"], "per_page": ["50"]}
+
+def test_crawl_follows_every_page(stub_feed, tmp_path):
+    summary = make_crawler(stub_feed, tmp_path).crawl()
+    assert summary["complete"] and summary["pages"] == 5 and summary["written"] == 23
+    assert sorted(int(r["page"]) for r in stub_feed.requests) == [1, 2, 3, 4, 5]
+    assert {r["query"] for r in stub_feed.requests} == {"Equality Act 2010 s.20 & 21"}
+    assert len(list(iter_feed(str(tmp_path / "feed.jsonl")))) == 23
+
+    state = json.loads((tmp_path / "state.json").read_text())
+    assert state["high_water"] == judgment(23, 23)["updated"] and state["run"] is None
+
+def test_later_run_only_fetches_newer_entries(stub_feed, tmp_path):
+    make_crawler(stub_feed, tmp_path).crawl()
+    stub_feed.requests.clear()
+    stub_feed.entries += [judgment(24, 30), judgment(5, 31)]  # one new judgment, one republished
+
+    summary = make_crawler(stub_feed, tmp_path).crawl()
+    assert summary["written"] == 2 and summary["complete"]
+    assert max(int(r["page"]) for r in stub_feed.requests) <= 2  # stopped at the high-water mark
+
+    cases = {case["title"]: case for case in latest_cases(str(tmp_path / "feed.jsonl"))}
+    assert len(cases) == 24
+    assert cases["Claimant 5 v Employer"]["updated"] == judgment(5, 31)["updated"]
+
+def test_interrupted_crawl_resumes_without_duplicates(stub_feed, tmp_path):
+    summary = make_crawler(stub_feed, tmp_path).crawl(max_pages=2)
+    assert not summary["complete"] and summary["written"] == 10
+    assert json.loads((tmp_path / "state.json").read_text())["run"]["next_page"] == 3
+
+    # A judgment published between the two runs shifts every page by one entry
+    stub_feed.entries.append(judgment(40, 40))
+    summary = make_crawler(stub_feed, tmp_path).crawl()
+    assert summary["complete"] and summary["duplicates"] == 1
+    uris = [case["uri"] for case in iter_feed(str(tmp_path / "feed.jsonl"))]
+    assert len(uris) == len(set(uris)) == 23  # the newest arrives on the next crawl
+
+    assert make_crawler(stub_feed, tmp_path).crawl()["written"] == 1
+
+def test_save_cases_streams_a_valid_json_array(tmp_path):
+    json_path, csv_path = str(tmp_path / "cases.json"), str(tmp_path / "cases.csv")
+    cases = (dict(judgment(n, n), link_pdf="", link_xml="", summary="") for n in range(1, 4))
+    assert save_cases(cases, json_path, csv_path) == 3
+    assert [case["title"] for case in json.load(open(json_path, encoding="utf-8"))][-1] == "Claimant 3 v Employer"
+    assert len(open(csv_path, encoding="utf-8").read().splitlines()) == 4
+    assert save_cases(iter([]), json_path, csv_path) == 0 and json.load(open(json_path, encoding="utf-8")) == []
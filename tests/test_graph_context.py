@@ -0,0 +1,116 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.retrieval.graph_context import GraphExpander, split_definitions, statute_id, parent_id
+from src.retrieval.context_packer import pack_context
+
+SUB_1_TEXT = "A person (P) has a disability if P has a physical or mental impairment."
+SUB_2_TEXT = "A reference to a disabled person is a reference to a person who has a disability."
+DEFINITIONS = [{"id": "section-212-1", "text": "In this Act— “employment” means employment under a contract of service; "
+                                               "“impairment” includes a sensory impairment; “Minister of the Crown” has the meaning given in section 8."}]
+
+
+class FakeGraph:
+    """Answers SUBGRAPH_QUERY from an in-memory Act and counts round trips."""
+
+    def __init__(self):
+        self.calls = []
+        self.paragraphs = {
+            "section-6": SUB_1_TEXT + " " + SUB_2_TEXT,
+            "section-6-1": SUB_1_TEXT,
+            "section-6-2": SUB_2_TEXT,
+        }
+
+    def query(self, cypher, ttl=None, **params):
+        self.calls.append(params)
+        rows = []
+        for hit in params["hits"]:
+            siblings = [{"id": pid, "text": text} for pid, text in sorted(self.paragraphs.items())
+                        if pid.startswith(hit["parent"] + "-") and pid != hit["id"]]
+            parent = {"id": hit["parent"], "text": self.paragraphs[hit["parent"]]} if hit["parent"] in self.paragraphs else None
+            rows.append({"id": hit["id"], "section": "Meaning of disability", "parent": parent, "siblings": siblings,
+                         "definitions": DEFINITIONS if params["include_definitions"] else []})
+        return rows
+
+
+def chunk(label, text, source="equality_act", title="Equality Act"):
+    return {"id": label, "source": source, "ref": f"{title} - {label}", "text": text}
+
+
+def test_statute_ids_and_parents():
+    assert statute_id(chunk("section-6-1", "")) == "section-6-1"
+    assert statute_id(chunk("Lee v Ashers", "", source="case_law", title="Case Law")) is None
+    assert parent_id("section-60A-1-b") == "section-60A"
+
+def test_split_definitions_one_entry_per_term():
+    terms = split_definitions(DEFINITIONS)
+    assert set(terms) == {"employment", "impairment", "minister of the crown"}
+    assert terms["impairment"] == ("section-212-1", "“impairment” includes a sensory impairment")
+
+def test_expand_adds_parent_siblings_and_definitions_in_one_query():
+    graph = FakeGraph()
+    expander = GraphExpander(graph=graph)
+    case = chunk("Lee v Ashers", "A case about a cake.", source="case_law", title="Case Law")
+    chunks = [chunk("section-6-1", SUB_1_TEXT), case]
+
+    expanded, info = expander.expand_with_info(chunks, top_n=1)
+
+    assert len(graph.calls) == 1
+    assert graph.calls[0]["hits"] == [{"id": "section-6-1", "parent": "section-6"}]
+    assert [c.get("via") for c in expanded] == [None, "parent", "sibling", "definition", None]
+    assert expanded[3]["text"].startswith("“impairment”")
+    assert info["stats"]["added"] == 3 and not info["fallback"]
+
+    # The packer folds the parent and its subsections into the section text
+    packed = pack_context(expanded, token_budget=1000)
+    assert [c["ref"] for c in packed] == ["Equality Act - section-6", "Equality Act - section-212-1", "Case Law - Lee v Ashers"]
+
+def test_hot_subgraphs_come_from_memory():
+    graph = FakeGraph()
+    expander = GraphExpander(graph=graph, cache_size=1)
+    expander.expand([chunk("section-6-1", SUB_1_TEXT)])
+    _, info = expander.expand_with_info([chunk("section-6-1", SUB_1_TEXT)])
+    assert len(graph.calls) == 1
+    assert info["stats"]["cache_hits"] == 1 and info["stats"]["queries"] == 0
+
+    expander.expand([chunk("section-6-2", SUB_2_TEXT)])
+    assert graph.calls[-1]["include_definitions"] is False  # definitions are loaded once
+    assert expander.stats()["cached_subgraphs"] == 1
+
+def test_expand_falls_back_when_graph_is_down():
+    class DownGraph:
+        def query(self, *args, **kwargs):
+            raise ConnectionError("Neo4j unavailable")
+
+    expander = GraphExpander(graph=DownGraph())
+    chunks = [chunk("section-6-1", SUB_1_TEXT)]
+    expanded, info = expander.expand_with_info(chunks)
+    assert expanded == chunks and info["fallback"]
+
+def test_failed_graph_is_not_queried_again_until_the_backoff_ends():
+    class DownGraph:
+        calls = 0
+
+        def query(self, *args, **kwargs):
+            DownGraph.calls += 1
+            raise ConnectionError("Neo4j unavailable")
+
+    expander = GraphExpander(graph=DownGraph(), retry_after=60)
+    chunks = [chunk("section-6-1", SUB_1_TEXT)]
+    for _ in range(3):
+        expanded, info = expander.expand_with_info(chunks)
+        assert expanded == chunks and info["fallback"]
+    assert DownGraph.calls == 1
+
+    expander._down_until = 0.0  # backoff over: the next question tries again
+    expander.expand(chunks)
+    assert DownGraph.calls == 2
+
+def test_each_call_gets_its_own_stats():
+    expander = GraphExpander(graph=FakeGraph())
+    _, first = expander.expand_with_info([chunk("section-6-1", SUB_1_TEXT)])
+    _, second = expander.expand_with_info([chunk("Lee v Ashers", "A case.", source="case_law", title="Case Law")])
+    assert first["stats"]["definitions"] == 1 and first["stats"]["queries"] == 1
+    assert second["stats"] == {"cache_hits": 0, "queries": 0, "hits": 0, "added": 0, "definitions": 0}
+    assert not hasattr(expander, "last_stats")
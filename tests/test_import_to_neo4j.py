@@ -4,7 +4,9 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')
 
 import pytest
 from unittest.mock import MagicMock
-from src.import_to_neo4j import create_graph
+from src.import_to_neo4j import (
+    create_graph, bulk_import, paragraph_rows, case_rows, SCHEMA, PARAGRAPH_BATCH_QUERY, CASE_BATCH_QUERY,
+)
 
 @pytest.fixture
 def mock_tx():
@@ -33,3 +35,53 @@ def test_create_graph_runs_cypher(mock_tx):
     assert kwargs["label"] == "1"
     assert kwargs["text"] == "This is a test paragraph."
     assert kwargs["group_id"] == "G1"
+
+def fake_driver():
+    tx = MagicMock()
+    session = MagicMock()
+    session.execute_write.side_effect = lambda fn, *args: fn(tx, *args)
+    driver = MagicMock()
+    driver.session.return_value.__enter__.return_value = session
+    return driver, session, tx
+
+def test_create_graph_merges_paragraph_on_stable_id(mock_tx):
+    create_graph(mock_tx, {"Label": "section-6-1", "Text": "A person has a disability...", "Group ID": "P  12"})
+
+    args, kwargs = mock_tx.run.call_args
+    assert "MERGE (pg:Paragraph {id: $id})" in args[0]
+    assert kwargs["id"] == "section-6-1"
+
+def test_bulk_import_unwinds_rows_in_batches():
+    driver, session, tx = fake_driver()
+    rows = paragraph_rows([{"Label": f"section-{i}", "Text": f"text {i}", "Group ID": f"P{i}"} for i in range(5)])
+
+    results = bulk_import(driver, {"equality_act": (PARAGRAPH_BATCH_QUERY, rows)}, batch_size=2)
+
+    assert [call.args[0] for call in session.run.call_args_list] == SCHEMA
+    batches = [call.kwargs["rows"] for call in tx.run.call_args_list]
+    assert [len(batch) for batch in batches] == [2, 2, 1]
+    assert all("UNWIND $rows AS row" in call.args[0] for call in tx.run.call_args_list)
+    assert batches[0][0]["id"] == "section-0"
+    assert results[0]["rows"] == 5
+
+def test_parallel_import_runs_every_label_set():
+    driver, session, tx = fake_driver()
+    cases = case_rows([{"case_id": "BR_v_BR", "paragraph_id": 1, "text": "Judgment", "court": "EWFC", "date": "2025-01-02"}])
+    jobs = {
+        "equality_act": (PARAGRAPH_BATCH_QUERY, paragraph_rows([{"Label": "section-1", "Text": "x"}])),
+        "case_law": (CASE_BATCH_QUERY, cases),
+    }
+
+    results = bulk_import(driver, jobs, parallel=True)
+
+    assert sorted(r["name"] for r in results) == ["case_law", "equality_act"]
+    assert cases[0]["id"] == "BR_v_BR#1"
+    assert tx.run.call_count == 2
+
+def test_definition_provisions_are_flagged_at_import():
+    rows = paragraph_rows([
+        {"Label": "section-212-1", "Text": "In this Act— “employment” means employment under a contract of service;"},
+        {"Label": "section-6-1", "Text": "A person (P) has a disability if P has a physical or mental impairment."},
+    ])
+    assert [row["is_definition"] for row in rows] == [True, False]
+    assert "pg.is_definition = row.is_definition" in PARAGRAPH_BATCH_QUERY
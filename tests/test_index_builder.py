@@ -0,0 +1,79 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import json
+import faiss
+import numpy as np
+import pytest
+from src.retrieval.index_builder import (
+    load_index_config,
+    prepare_embeddings,
+    build_index,
+    evaluate_index,
+    write_manifest,
+    load_index,
+    search_index,
+)
+from src.retrieval.vector_store import cosine_scores
+
+@pytest.fixture(scope="module")
+def embeddings():
+    rng = np.random.default_rng(0)
+    return rng.random((2000, 32), dtype=np.float32)
+
+@pytest.mark.parametrize("index_type", ["flat", "ivf_flat", "ivf_pq", "hnsw"])
+def test_build_and_report_each_index_type(embeddings, index_type, tmp_path):
+    config_path = tmp_path / "config.json"
+    config_path.write_text(json.dumps({"type": index_type, "nlist": 16, "pq_m": 8, "pq_nbits": 4, "report_queries": 20}))
+    config = load_index_config(str(config_path))
+
+    index = build_index(embeddings, config)
+    assert index.ntotal == len(embeddings)
+
+    report = evaluate_index(index, embeddings, config)
+    assert 0.0 <= report["recall@10"] <= 1.0
+    assert report["latency_ms"]["p99"] >= report["latency_ms"]["p50"]
+    if index_type == "flat":
+        assert report["recall@10"] == 1.0
+
+def test_load_index_applies_manifest_search_params(embeddings, tmp_path):
+    config = load_index_config()
+    config.update({"type": "ivf_flat", "nlist": 16, "nprobe": 7})
+    index = build_index(embeddings, config)
+
+    index_path = str(tmp_path / "index.idx")
+    manifest_path = str(tmp_path / "manifest.json")
+    faiss.write_index(index, index_path)
+    write_manifest(manifest_path, index, config, index_path=index_path)
+
+    loaded, manifest = load_index("does-not-matter.idx", manifest_path)
+    assert manifest["index_type"] == "ivf_flat"
+    assert faiss.extract_index_ivf(loaded).nprobe == 7
+
+def test_unknown_index_type_is_rejected(tmp_path):
+    config_path = tmp_path / "config.json"
+    config_path.write_text(json.dumps({"type": "lsh"}))
+    with pytest.raises(ValueError):
+        load_index_config(str(config_path))
+
+def test_inner_product_scores_are_cosine_similarities(embeddings, tmp_path):
+    config = load_index_config()
+    vectors = prepare_embeddings(embeddings, config)
+    assert np.allclose(np.linalg.norm(vectors, axis=1), 1.0, atol=1e-5)
+
+    index = build_index(vectors, config)
+    manifest = write_manifest(str(tmp_path / "manifest.json"), index, config)
+    query = embeddings[5] * 3.0  # raw, unnormalised query
+
+    ids, scores = search_index(index, query, 5, manifest)
+    assert ids[0] == 5
+    assert np.allclose(scores, cosine_scores(query, embeddings[ids]), atol=1e-5)
+
+def test_legacy_l2_index_is_scored_from_store(embeddings):
+    index = faiss.IndexFlatL2(embeddings.shape[1])
+    index.add(embeddings)
+
+    ids, scores = search_index(index, embeddings[3], 5, manifest={}, store=embeddings)
+    assert ids[0] == 3
+    assert np.allclose(scores, cosine_scores(embeddings[3], embeddings[ids]), atol=1e-5)
@@ -0,0 +1,160 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import time
+import threading
+import pytest
+from src.ingest_cases import run_ingestion, load_manifest, save_manifest
+from src.parse.parse_case_xmls import iter_paragraphs
+
+SITE = "https://caselaw.nationalarchives.gov.uk"
+LEE, SMITH = f"{SITE}/uksc/2025/1", f"{SITE}/ewca/civ/2025/2"
+CASES = [
+    {"title": "Lee v Ashers", "updated": "2025-04-01T10:00:00+00:00", "link_xml": "/uksc/2025/1/data.xml", "uri": LEE},
+    {"title": "Smith v Jones", "updated": "2025-04-02T10:00:00+00:00", "link_xml": "/ewca/civ/2025/2/data.xml", "uri": SMITH},
+]
+
+
+class FakeStages:
+    """Download and parse stand-ins that count calls and can crash on a chosen case."""
+
+    def __init__(self, tmp_path, crash_on=None):
+        self.tmp_path = tmp_path
+        self.crash_on = crash_on
+        self.downloads = []
+        self.parses = []
+        self.builds = 0
+
+    def download(self, case, overwrite=False):
+        self.downloads.append((case["title"], overwrite))
+        path = self.tmp_path / (case["title"].replace(" ", "_") + ".xml")
+        path.write_text(case["updated"])
+        return {"xml": str(path), "pdf": None}
+
+    def parse(self, xml_path):
+        if self.crash_on and self.crash_on in xml_path:
+            raise KeyboardInterrupt  # the process dies mid-run
+        self.parses.append(xml_path)
+        case_id = os.path.basename(xml_path)[:-4]
+        return [{"case_id": case_id, "paragraph_id": 1, "court": "", "date": "", "text": open(xml_path).read()}]
+
+    def build_index(self):
+        self.builds += 1
+
+    def run(self, cases):
+        return run_ingestion(
+            cases, manifest_path=str(self.tmp_path / "manifest.json"),
+            download=self.download, parse=self.parse, build_index=self.build_index,
+            paragraph_dir=str(self.tmp_path / "paragraphs"), output_path=str(self.tmp_path / "paragraphs.jsonl"),
+        )
+
+
+def test_second_run_only_processes_updated_cases(tmp_path):
+    stages = FakeStages(tmp_path)
+    stages.run(CASES)
+    assert len(stages.parses) == 2 and stages.builds == 1
+
+    stages.run(CASES)
+    assert len(stages.parses) == 2 and stages.builds == 1  # nothing new: no download, parse or rebuild
+
+    updated = [CASES[0], dict(CASES[1], updated="2025-05-01T10:00:00+00:00")]
+    stages.run(updated)
+    assert stages.downloads[-1] == ("Smith v Jones", True)
+    assert len(stages.parses) == 3 and stages.builds == 2
+
+    paragraphs = list(iter_paragraphs(str(tmp_path / "paragraphs.jsonl")))
+    assert sorted(p["text"] for p in paragraphs) == ["2025-04-01T10:00:00+00:00", "2025-05-01T10:00:00+00:00"]
+
+def test_crash_resumes_from_last_checkpoint(tmp_path):
+    stages = FakeStages(tmp_path, crash_on="Smith")
+    with pytest.raises(KeyboardInterrupt):
+        stages.run(CASES)
+
+    manifest = load_manifest(str(tmp_path / "manifest.json"))
+    assert manifest["cases"][LEE]["stage"] == "parsed"
+    assert manifest["cases"][SMITH]["stage"] == "downloaded"
+
+    stages.crash_on = None
+    summary = stages.run(CASES)
+    assert sorted(title for title, _ in stages.downloads) == ["Lee v Ashers", "Smith v Jones"]  # nothing downloaded twice
+    assert summary["indexed"] == 2
+    manifest = load_manifest(str(tmp_path / "manifest.json"))
+    assert {entry["stage"] for entry in manifest["cases"].values()} == {"indexed"}
+
+def test_failed_case_is_retried_next_run(tmp_path):
+    stages = FakeStages(tmp_path)
+    real_download = stages.download
+    stages.download = lambda case, overwrite=False: {"xml": None} if case["title"] == "Lee v Ashers" else real_download(case, overwrite)
+
+    summary = stages.run(CASES)
+    assert summary["failed"] == [LEE] and summary["indexed"] == 1
+
+    stages.download = real_download
+    summary = stages.run(CASES)
+    assert summary["processed"] == 1 and summary["indexed"] == 1
+
+def test_failed_update_keeps_the_indexed_version(tmp_path):
+    stages = FakeStages(tmp_path)
+    stages.run(CASES)
+
+    real_download = stages.download
+    stages.download = lambda case, overwrite=False: {"xml": None} if case["title"] == "Lee v Ashers" else real_download(case, overwrite)
+    updated = [dict(case, updated="2025-06-01T10:00:00+00:00") for case in CASES]
+    summary = stages.run(updated)
+    assert summary["failed"] == [LEE] and stages.builds == 2
+
+    paragraphs = list(iter_paragraphs(str(tmp_path / "paragraphs.jsonl")))
+    assert sorted(p["text"] for p in paragraphs) == ["2025-04-01T10:00:00+00:00", "2025-06-01T10:00:00+00:00"]
+
+    stages.download = real_download
+    stages.run(updated)
+    manifest = load_manifest(str(tmp_path / "manifest.json"))
+    assert "previous" not in manifest["cases"][LEE]
+    paragraphs = list(iter_paragraphs(str(tmp_path / "paragraphs.jsonl")))
+    assert [p["text"] for p in paragraphs] == ["2025-06-01T10:00:00+00:00"] * 2
+
+def test_downloads_for_many_cases_share_one_pool(tmp_path):
+    stages = FakeStages(tmp_path)
+    real_download = stages.download
+    active, peak, lock = [0], [0], threading.Lock()
+
+    def slow_download(case, overwrite=False):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.05)
+        with lock:
+            active[0] -= 1
+        return real_download(case, overwrite)
+
+    stages.download = slow_download
+    cases = [{"title": f"Case {n}", "updated": "2025-04-01T10:00:00+00:00", "link_xml": f"/{n}/data.xml"} for n in range(8)]
+    summary = run_ingestion(
+        cases, manifest_path=str(tmp_path / "manifest.json"), download=stages.download, parse=stages.parse,
+        build_index=stages.build_index, paragraph_dir=str(tmp_path / "paragraphs"),
+        output_path=str(tmp_path / "paragraphs.jsonl"), workers=4,
+    )
+    assert summary["processed"] == 8 and peak[0] > 1
+
+def test_judgments_with_the_same_title_are_kept_apart(tmp_path):
+    stages = FakeStages(tmp_path)
+    cases = [
+        {"title": "R v Smith", "updated": "2025-04-01T10:00:00+00:00", "link_xml": "/ewca/crim/2025/1/data.xml",
+         "uri": f"{SITE}/ewca/crim/2025/1"},
+        {"title": "R v Smith", "updated": "2025-04-03T10:00:00+00:00", "link_xml": "/ewca/crim/2025/7/data.xml",
+         "uri": f"{SITE}/ewca/crim/2025/7"},
+    ]
+    stages.run(cases)
+    manifest = load_manifest(str(tmp_path / "manifest.json"))
+    assert sorted(manifest["cases"]) == [case["uri"] for case in cases]
+    assert sorted(os.listdir(tmp_path / "paragraphs")) == ["ewca_crim_2025_1.json", "ewca_crim_2025_7.json"]
+    assert len(list(iter_paragraphs(str(tmp_path / "paragraphs.jsonl")))) == 2
+
+    stages.run(cases)
+    assert len(stages.downloads) == 2 and stages.builds == 1  # neither is mistaken for an update of the other
+
+def test_title_keyed_manifests_are_rekeyed(tmp_path):
+    path = str(tmp_path / "manifest.json")
+    save_manifest({"cases": {"Lee_v_Ashers": {"case": CASES[0], "stage": "indexed"}}, "last_run": None}, path)
+    assert list(load_manifest(path)["cases"]) == [LEE]
@@ -0,0 +1,30 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.llm import AnswerStream
+
+def fake_streaming_chat(pieces):
+    def chat(model, messages, stream):
+        assert stream is True
+        for piece in pieces:
+            yield {"message": {"content": piece}, "done": False}
+        yield {"message": {"content": ""}, "done": True, "eval_count": len(pieces)}
+    return chat
+
+def test_answer_stream_yields_pieces_and_records_timings():
+    stream = AnswerStream("prompt", chat=fake_streaming_chat(["Under ", "section 20 ", "[1]."]))
+
+    pieces = list(stream)
+    assert pieces == ["Under ", "section 20 ", "[1]."]
+    assert stream.text == "Under section 20 [1]."
+    assert 0 <= stream.time_to_first_token <= stream.total_time
+    assert stream.final_chunk["eval_count"] == 3
+
+def test_answer_stream_usage_prefers_reported_counts():
+    stream = AnswerStream("a prompt of some length", chat=fake_streaming_chat(["one ", "two"]))
+    list(stream)
+
+    usage = stream.usage()
+    assert usage["completion_tokens"] == 2
+    assert usage["prompt_tokens"] > 0  # not reported by the fake server, so estimated
@@ -0,0 +1,89 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from src.llm import LLMClient, AnswerStream, response_stats
+
+STATS = {"total_duration": 3_000_000_000, "load_duration": 2_000_000_000, "prompt_eval_count": 40,
+         "prompt_eval_duration": 400_000_000, "eval_count": 10, "eval_duration": 500_000_000}
+
+class StubOllama(BaseHTTPRequestHandler):
+    """Just enough of the Ollama HTTP API: /api/chat (plain and streamed) and /api/generate."""
+
+    protocol_version = "HTTP/1.1"  # keep-alive, so connection reuse is observable
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        self.server.requests.append((self.path, body))
+        self.server.ports.add(self.client_address[1])
+        if self.path == "/api/generate":
+            self._send(json.dumps(dict(STATS, model=body["model"], response="", done=True)))
+        elif body.get("stream"):
+            lines = [{"message": {"role": "assistant", "content": word}, "done": False} for word in ["Section ", "20."]]
+            lines.append(dict(STATS, message={"role": "assistant", "content": ""}, done=True))
+            self._send("\n".join(json.dumps(line) for line in lines) + "\n", "application/x-ndjson")
+        else:
+            self._send(json.dumps(dict(STATS, message={"role": "assistant", "content": "[2, 1]"}, done=True)))
+
+    def _send(self, text, content_type="application/json"):
+        data = text.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def stub_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubOllama)
+    server.requests, server.ports = [], set()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+def make_client(server):
+    host = f"http://127.0.0.1:{server.server_address[1]}"
+    return LLMClient(host=host, model="stub", keep_alive="10m", options={"num_ctx": 2048, "num_predict": 64})
+
+def test_calls_share_one_connection_and_send_configured_options(stub_server):
+    client = make_client(stub_server)
+
+    client.warm_up()
+    client.chat(messages=[{"role": "user", "content": "rank"}])
+    list(AnswerStream("answer", model="stub", chat=client.chat))
+
+    assert [path for path, _ in stub_server.requests] == ["/api/generate", "/api/chat", "/api/chat"]
+    assert len(stub_server.ports) == 1
+    for _, body in stub_server.requests:
+        assert body["keep_alive"] == "10m"
+    chat_body = stub_server.requests[1][1]
+    assert chat_body["options"] == {"num_ctx": 2048, "num_predict": 64}
+    assert client.warmed_up
+
+def test_stats_split_load_from_eval_time(stub_server):
+    client = make_client(stub_server)
+
+    stream = AnswerStream("answer", model="stub", chat=client.chat)
+    assert "".join(stream) == "Section 20."
+    assert client.last_stats["load_s"] == 2.0
+    assert client.last_stats["eval_s"] == 0.5
+    assert client.last_stats["tokens_per_s"] == 20.0
+    assert stream.usage()["load_s"] == 2.0
+    assert stream.usage()["prompt_tokens"] == 40
+
+def test_warm_up_failure_is_only_logged():
+    client = LLMClient(host="http://127.0.0.1:9", model="stub", timeout=1)
+    client.warm_up_in_background().join(timeout=5)
+    assert not client.warmed_up
+
+def test_response_stats_without_timings():
+    assert response_stats({})["tokens_per_s"] == 0.0
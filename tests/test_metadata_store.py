@@ -0,0 +1,41 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import json
+import pytest
+from src.retrieval.metadata_store import write_metadata_store, MetadataStore, open_metadata
+
+ROWS = [
+    {"Label": "section-1", "Part": "Part 1", "Text": "First paragraph."},
+    {"Label": "section-2", "Part": "Part 1", "Text": "Second paragraph."},
+    {"Label": "section-3", "Part": "Part 2", "Text": "Third paragraph."},
+]
+
+def test_rows_match_list_semantics(tmp_path):
+    path = str(tmp_path / "metadata.sqlite")
+    write_metadata_store(ROWS, path, text_key="Text")
+    store = MetadataStore(path)
+
+    assert len(store) == 3
+    assert store[1] == ROWS[1]
+    assert store[-1] == ROWS[2]
+    assert store[:2] == ROWS[:2]
+    assert list(store) == ROWS
+    with pytest.raises(IndexError):
+        store[3]
+
+def test_get_many_keeps_order_and_can_skip_text(tmp_path):
+    path = str(tmp_path / "metadata.sqlite")
+    write_metadata_store(ROWS, path, text_key="Text")
+    store = MetadataStore(path)
+
+    assert [row["Label"] for row in store.get_many([2, 0, 2])] == ["section-3", "section-1", "section-3"]
+    assert store.fields(0) == {"Label": "section-1", "Part": "Part 1"}
+
+def test_open_metadata_reads_legacy_json(tmp_path):
+    path = str(tmp_path / "metadata.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(ROWS, f)
+
+    assert open_metadata(path) == ROWS
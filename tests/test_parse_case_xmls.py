@@ -0,0 +1,57 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.parse.parse_case_xmls import parse_case, parse_cases, iter_paragraphs, benchmark
+
+JUDGMENT = """<?xml version="1.0"?>
+<akomaNtoso xmlns="http://docs.oasis-open.org/legaldocml/ns/akn/3.0" xmlns:uk="https://caselaw.nationalarchives.gov.uk/akn">
+  <judgment>
+    <meta>
+      <identification>
+        <FRBRWork><FRBRdate date="2025-02-20" name="judgment"/></FRBRWork>
+        <FRBRExpression><FRBRdate date="2025-03-01" name="published"/></FRBRExpression>
+      </identification>
+      <proprietary><uk:court> EWCA-Civil </uk:court></proprietary>
+    </meta>
+    <header><p>Neutral Citation Number: [2025] EWCA Civ 1</p></header>
+    <judgmentBody>
+      <p>1. The claimant   relies on section 20.</p>
+      <p>Table: <p>Rounded to one decimal place.</p></p>
+      <p>   </p>
+    </judgmentBody>
+  </judgment>
+</akomaNtoso>
+"""
+
+XML_DIR = "data/case_xmls"
+
+
+def test_parse_case_streams_paragraphs_and_metadata(tmp_path):
+    path = tmp_path / "Smith_v_Jones.xml"
+    path.write_text(JUDGMENT, encoding="utf-8")
+    rows = parse_case(str(path))
+
+    assert [row["text"] for row in rows] == [
+        "Neutral Citation Number: [2025] EWCA Civ 1",
+        "1. The claimant relies on section 20.",
+        "Table: Rounded to one decimal place.",
+        "Rounded to one decimal place.",
+    ]
+    assert rows[0]["case_id"] == "Smith_v_Jones" and [row["paragraph_id"] for row in rows] == [1, 2, 3, 4]
+    assert (rows[0]["court"], rows[0]["date"]) == ("EWCA-Civil", "2025-02-20")
+
+def test_broken_file_yields_no_paragraphs(tmp_path):
+    path = tmp_path / "broken.xml"
+    path.write_text(JUDGMENT[:400], encoding="utf-8")
+    assert parse_case(str(path)) == []
+
+def test_process_pool_writes_the_same_records(tmp_path):
+    files = sorted(os.path.join(XML_DIR, f) for f in os.listdir(XML_DIR) if f.endswith(".xml"))[:6]
+    serial, pooled = str(tmp_path / "serial.jsonl"), str(tmp_path / "pooled.jsonl")
+
+    assert parse_cases(files, serial, workers=1) == parse_cases(files, pooled, workers=2)
+    assert list(iter_paragraphs(pooled)) == [row for path in files for row in parse_case(path)]
+
+    results = benchmark(files[:2], [1, 2])
+    assert [r["workers"] for r in results] == [1, 2] and all(r["files_per_s"] > 0 for r in results)
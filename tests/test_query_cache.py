@@ -0,0 +1,68 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+from src.retrieval.query_cache import QueryEmbeddingCache, normalize_question
+
+class FakeModel:
+    def __init__(self):
+        self.calls = 0
+
+    def encode(self, texts, **kwargs):
+        self.calls += 1
+        return np.array([[len(t), 1.0, 2.0] for t in texts], dtype=np.float32)
+
+def test_normalize_question_collapses_variants():
+    assert normalize_question("  What is   Disability? ") == normalize_question("what is disability")
+
+def test_memory_tier_skips_encoder_and_evicts_lru():
+    model = FakeModel()
+    cache = QueryEmbeddingCache(lambda: model, "fake", max_entries=2)
+
+    first = cache.encode(["What is disability?"])[0]
+    again = cache.encode(["what is disability"])[0]
+    assert model.calls == 1
+    assert np.array_equal(first, again)
+
+    cache.encode(["second question"])
+    cache.encode(["third question"])
+    cache.encode(["What is disability?"])  # evicted, so encoded again
+    assert model.calls == 4
+    assert cache.stats()["memory_hits"] == 1
+    assert cache.stats()["memory_entries"] == 2
+
+def test_disk_tier_survives_restart_without_loading_model(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    model = FakeModel()
+    QueryEmbeddingCache(lambda: model, "fake", disk_path=path).encode("reasonable adjustments")
+
+    def fail_to_load():
+        raise AssertionError("model should not be loaded on a disk hit")
+
+    restarted = QueryEmbeddingCache(fail_to_load, "fake", disk_path=path)
+    vector = restarted.encode("Reasonable adjustments?")
+    assert vector.shape == (3,)
+    assert restarted.stats()["disk_hits"] == 1
+
+def test_keys_are_scoped_to_model_name():
+    cache_a = QueryEmbeddingCache(FakeModel, "model-a")
+    cache_b = QueryEmbeddingCache(FakeModel, "model-b")
+    assert cache_a.key("same question") != cache_b.key("same question")
+
+def test_misses_are_reported_per_call():
+    cache = QueryEmbeddingCache(FakeModel, "fake")
+    vectors, info = cache.encode_with_info(["first question", "second question"])
+    assert vectors.shape == (2, 3) and info == {"misses": 2}
+    _, info = cache.encode_with_info(["first question", "third question"])
+    assert info == {"misses": 1}
+    assert cache.stats()["misses"] == 3 and not hasattr(cache, "last_misses")
+
+def test_empty_batch_returns_an_empty_array_without_loading_the_model():
+    def fail_to_load():
+        raise AssertionError("model should not be loaded for an empty batch")
+
+    assert QueryEmbeddingCache(fail_to_load, "fake").encode([]).shape == (0, 0)
+    cache = QueryEmbeddingCache(FakeModel, "fake")
+    cache.encode(["a question"])
+    assert cache.encode([]).shape == (0, 3)
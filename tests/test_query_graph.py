@@ -5,6 +5,7 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')
 import pytest
 from unittest.mock import MagicMock, patch
 from src.query_graph import find_paragraphs_by_keyword, find_paragraphs_in_section, get_paragraph_full_chain
+from src.graph_store import GraphStore
 
 # Sample fake Neo4j return data
 sample_data = [{"label": "section-6", "group_id": "G1", "preview": "Disability is defined as..."}]
@@ -12,7 +13,13 @@ chain_data = {
     "part": "Part 2", "chapter": "Chapter 1", "section": "Section 6", "paragraph": "This paragraph defines disability..."
 }
 
-@patch("src.query_graph.driver")
+@pytest.fixture
+def mock_driver():
+    """query_graph's shared GraphStore, backed by a fake driver and with result caching off."""
+    driver = MagicMock()
+    with patch("src.query_graph.graph", GraphStore(driver=driver, ttl=0)):
+        yield driver
+
 def test_find_paragraphs_by_keyword(mock_driver):
     mock_session = MagicMock()
     mock_session.run.return_value.data.return_value = sample_data
@@ -22,7 +29,6 @@ def test_find_paragraphs_by_keyword(mock_driver):
     assert isinstance(results, list)
     assert "label" in results[0]
 
-@patch("src.query_graph.driver")
 def test_find_paragraphs_in_section(mock_driver):
     mock_session = MagicMock()
     mock_session.run.return_value.data.return_value = sample_data
@@ -32,12 +38,81 @@ def test_find_paragraphs_in_section(mock_driver):
     assert isinstance(results, list)
     assert "label" in results[0]
 
-@patch("src.query_graph.driver")
 def test_get_paragraph_full_chain(mock_driver):
     mock_session = MagicMock()
-    mock_session.run.return_value.single.return_value = chain_data
+    mock_session.run.return_value.data.return_value = [chain_data]
     mock_driver.session.return_value.__enter__.return_value = mock_session
 
     result = get_paragraph_full_chain("section-6")
     assert isinstance(result, dict)
     assert "part" in result and "paragraph" in result
+
+def test_fulltext_query_escapes_and_prefixes_last_word():
+    from src.query_graph import fulltext_query
+    assert fulltext_query("Reasonable adjust") == "reasonable AND adjust*"
+    assert fulltext_query("section 20(1)") == "section AND 20\\(1\\)*"
+    assert fulltext_query("   ") == ""
+
+def test_search_paragraphs_pages_with_skip_cursor(mock_driver):
+    from src.query_graph import search_paragraphs
+    rows = [{"label": f"section-{i}", "group_id": f"G{i}", "preview": "...", "text": "...", "section": None, "score": 1.0}
+            for i in range(3)]
+    mock_session = MagicMock()
+    mock_session.run.return_value.data.return_value = rows
+    mock_driver.session.return_value.__enter__.return_value = mock_session
+
+    page, next_skip = search_paragraphs("disability", skip=4, limit=2)
+
+    assert len(page) == 2
+    assert next_skip == 6
+    args, kwargs = mock_session.run.call_args
+    assert "db.index.fulltext.queryNodes" in args[0]
+    assert kwargs["skip"] == 4 and kwargs["limit"] == 3
+
+    mock_session.run.return_value.data.return_value = rows[:1]
+    _, next_skip = search_paragraphs("disability", skip=6, limit=2)
+    assert next_skip is None
+
+def test_graph_store_caches_results_by_query_and_params():
+    driver = MagicMock()
+    session = driver.session.return_value.__enter__.return_value
+    session.run.return_value.data.return_value = sample_data
+    store = GraphStore(driver=driver, ttl=60)
+
+    first = store.query("MATCH (pg:Paragraph {label: $label}) RETURN pg", label="section-6")
+    again = store.query("MATCH (pg:Paragraph   {label: $label})\n RETURN pg", label="section-6")
+    other = store.query("MATCH (pg:Paragraph {label: $label}) RETURN pg", label="section-7")
+
+    assert first == again == sample_data
+    assert session.run.call_count == 2  # the reformatted query was a cache hit
+    again[0]["label"] = "changed"
+    assert store.query("MATCH (pg:Paragraph {label: $label}) RETURN pg", label="section-6")[0]["label"] == "section-6"
+    stats = store.cache_stats()
+    assert stats["hits"] == 2 and stats["misses"] == 2 and stats["entries"] == 2
+
+def test_graph_store_expires_and_evicts(monkeypatch):
+    import src.graph_store as graph_store
+    now = [1000.0]
+    monkeypatch.setattr(graph_store.time, "monotonic", lambda: now[0])
+    driver = MagicMock()
+    session = driver.session.return_value.__enter__.return_value
+    session.run.return_value.data.return_value = sample_data
+    store = GraphStore(driver=driver, ttl=10, max_entries=2)
+
+    store.query("RETURN 1")
+    now[0] += 11
+    store.query("RETURN 1")
+    assert session.run.call_count == 2  # expired after the TTL
+
+    store.query("RETURN 2")
+    store.query("RETURN 3")
+    assert store.cache_stats()["entries"] == 2
+    assert store.cache_stats()["evictions"] == 1
+    assert store.pool_stats()["max_size"] is not None
+
+def test_import_does_not_connect_to_neo4j():
+    import subprocess
+    env = {k: v for k, v in os.environ.items() if k != "NEO4J_URI"}
+    code = "import src.query_graph as q; assert q.graph._driver is None"
+    root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+    subprocess.run([sys.executable, "-c", code], cwd=root, env=env, check=True)
@@ -0,0 +1,72 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+import pytest
+from src.retrieval.rerankers import (
+    LLMReranker,
+    CrossEncoderReranker,
+    ScoreFusionReranker,
+    get_reranker,
+)
+
+CANDIDATES = [{"text": f"paragraph {i}", "ref": f"ref {i}", "position": i, "score": 1.0 - i / 10} for i in range(4)]
+
+def fake_chat(reply):
+    def chat(model, messages):
+        return {"message": {"content": reply}}
+    return chat
+
+def test_llm_reranker_parses_ranking_without_eval():
+    reranker = LLMReranker(chat=fake_chat("Ranking: [3, 1, 3, 9]"))
+    ranked, info = reranker.rerank_with_info("question", CANDIDATES)
+    assert [c["position"] for c in ranked] == [2, 0, 1, 3]
+    assert not info["fallback"]
+    assert reranker.calls == 1 and info["duration"] >= 0
+
+def test_llm_reranker_flags_fallback_on_unusable_reply():
+    reranker = LLMReranker(chat=fake_chat("I cannot rank these."))
+    ranked, info = reranker.rerank_with_info("question", CANDIDATES)
+    assert ranked == CANDIDATES and info["fallback"]
+
+def test_llm_reranker_ignores_numbers_outside_the_ranking():
+    parse = LLMReranker.parse_ranking
+    assert parse("Paragraph [2] cites section 3 of the Act.\nRanking: [4, 2]", 4) == [4, 2]
+    assert parse("Section 20 applies, so the order is [2, 1]", 4) == [2, 1]
+    assert parse("Section 2 and section 3 are relevant.", 4) == []
+    assert parse("ranking: 3, 1", 4) == [3, 1]
+
+    reranker = LLMReranker(chat=fake_chat("Under section 2 of the Act: Ranking: [4, 1]"))
+    assert [c["position"] for c in reranker.rerank("question", CANDIDATES)] == [3, 0, 1, 2]
+
+def test_cross_encoder_scores_all_pairs_in_one_batch():
+    class FakeCrossEncoder:
+        def __init__(self):
+            self.batches = []
+
+        def predict(self, pairs, batch_size):
+            self.batches.append(len(pairs))
+            return [float(text.endswith("2")) for _, text in pairs]
+
+    model = FakeCrossEncoder()
+    ranked = CrossEncoderReranker(model=model).rerank("question", CANDIDATES)
+    assert ranked[0]["position"] == 2
+    assert model.batches == [len(CANDIDATES)]
+
+def test_score_fusion_uses_stored_vectors():
+    embeddings = np.eye(4, dtype=np.float32)
+    embeddings[3] = [0.9, 0.1, 0.0, 0.0]
+    query = np.array([1.0, 0.0, 0.0, 0.0], dtype=np.float32)
+
+    ranked = ScoreFusionReranker(embeddings, feedback_k=2).rerank("question", CANDIDATES, query)
+    assert [c["position"] for c in ranked][:2] == [0, 3]
+
+def test_get_reranker_by_name(monkeypatch):
+    monkeypatch.setenv("RERANKER", "fusion")
+    assert get_reranker(embeddings=np.eye(2)).name == "fusion"
+    assert get_reranker("llm").name == "llm"
+    with pytest.raises(ValueError):
+        get_reranker("fusion")
+    with pytest.raises(ValueError):
+        get_reranker("bm25")
@@ -0,0 +1,33 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import faiss
+import numpy as np
+from src.retrieval.vector_store import save_embeddings, load_embeddings, get_vectors, cosine_scores
+
+def test_store_rows_match_faiss_ids(tmp_path):
+    embeddings = np.random.rand(20, 8).astype(np.float32)
+    path = str(tmp_path / "embeddings.npy")
+    save_embeddings(embeddings, path)
+
+    store = load_embeddings(path)
+    vectors = get_vectors(store, [3, 0, 17])
+    assert vectors.shape == (3, 8)
+    assert np.allclose(vectors, embeddings[[3, 0, 17]])
+
+def test_load_embeddings_falls_back_to_flat_index(tmp_path):
+    embeddings = np.random.rand(10, 4).astype(np.float32)
+    index = faiss.IndexFlatL2(4)
+    index.add(embeddings)
+
+    store = load_embeddings(str(tmp_path / "missing.npy"), index)
+    assert np.allclose(store, embeddings)
+
+def test_cosine_scores_matches_pairwise():
+    query = np.random.rand(8).astype(np.float32)
+    vectors = np.random.rand(5, 8).astype(np.float32)
+
+    scores = cosine_scores(query, vectors)
+    expected = [np.dot(query, v) / (np.linalg.norm(query) * np.linalg.norm(v)) for v in vectors]
+    assert np.allclose(scores, expected, atol=1e-6)